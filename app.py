@@ -1,41 +1,45 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, request, jsonify, send_from_directory, Response
 from flask_cors import CORS
+from werkzeug.utils import secure_filename
 import logging
 import os
 import tempfile
+import atexit
 import base64
+import contextvars
 import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
 from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple, Union
 
 from config import Config
 from tsc_printer_service import TSCPrinterService
-from label_bitmap_generator import LabelBitmapGenerator
-from dto import UserInputModel, UserInputModelSchema
+from layout_repository import LayoutRepository
+from template_registry import CompiledTemplate, TemplateRegistry, TemplateVariant, with_label_size
+from icon_asset_store import IconAssetStore
+from bulk_label_runner import BulkLabelRunner
+from printer_pool import PrinterPool, PrintUncertain, BLUETOOTH_ROLE, CARTON_ROLE, role_for
+from printer_status import PrinterStatusMonitor, decode_status
+from printer_worker import PrinterWorkerPool
+from label_spool import LabelSpool, SpoolEntry
+from job_coalescer import JobCoalescer
+from sequential_run import CounterField, SequentialRun, counter_commands, increment_serial
+from dto import LabelElements, LabelVariants, PayloadError, parse_label_payload
+from print_journal import JOB_FAILED, JOB_OPEN, JOB_PRINTED, STEP_UNCERTAIN, JournalJob, PrintJournal
+from metrics import LatencyWindow, hit_rate, process_stats
+from logging_setup import PER_LABEL, current_job, job_context, logging_stats, setup_logging
 
-# Logging ayarları - Türkçe karakterleri destekleyecek şekilde
-import sys
+# Ağır modüller (Pillow, qrcode, requests, pyserial) ilk kullanımda yüklenir
+if TYPE_CHECKING:
+    from label_bitmap_generator import LabelBitmapGenerator
+    from service_layer_client import ServiceLayerClient
+    from serial_scanner_service import SerialScannerService
 
-# Logs dizinini oluştur
-os.makedirs('logs', exist_ok=True)
-
-# File handler için UTF-8 encoding
-file_handler = logging.FileHandler('logs/app.log', encoding='utf-8')
-file_handler.setLevel(logging.INFO)
-
-# Stream handler için UTF-8 encoding
-stream_handler = logging.StreamHandler(sys.stdout)
-stream_handler.setLevel(logging.INFO)
-
-# Formatter
-formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-file_handler.setFormatter(formatter)
-stream_handler.setFormatter(formatter)
-
-# Root logger'ı yapılandır
-root_logger = logging.getLogger()
-root_logger.setLevel(logging.INFO)
-root_logger.addHandler(file_handler)
-root_logger.addHandler(stream_handler)
+# Logging - kayıtlar kuyruğa atılır, dosya (döner) ve konsol yazımı arka plan iş parçacığında yapılır
+setup_logging(Config.LOG_SETTINGS)
 
 app = Flask(__name__, static_folder='frontend/build', static_url_path='')
 CORS(app)
@@ -44,16 +48,172 @@ CORS(app)
 app.config.from_object(Config)
 
 # Servisler
-tsc_printer_service = TSCPrinterService()
-label_generator = LabelBitmapGenerator()
+# Printer başına G/Ç süreçleri - kopan bir printer'ın takılan çağrısı diğer printer'ları ve isteği kilitlemez
+printer_io_workers = PrinterWorkerPool(
+    timeout=Config.PRINTER_SETTINGS['printer_io_timeout'],
+    print_timeout_per_label=Config.PRINTER_SETTINGS['printer_io_timeout_per_label'],
+    transfer_rate=Config.PRINTER_SETTINGS['printer_io_transfer_rate'],
+    start_timeout=Config.PRINTER_SETTINGS['printer_io_start_timeout'],
+    # Sahte printer da worker sürecinde çalışır
+    mock=(Config.PRINTER_SETTINGS['mock_printer_time_scale'], Config.PRINTER_SETTINGS['mock_printer_media_capacity'])
+    if Config.PRINTER_SETTINGS['mock_printer'] else None
+) if Config.PRINTER_SETTINGS['printer_io_workers'] else None
+if printer_io_workers is not None:
+    atexit.register(printer_io_workers.close)
+
+if Config.PRINTER_SETTINGS['mock_printer']:
+    from mock_printer import MockTSCLib
+    tsc_printer_service = TSCPrinterService(
+        lazy=Config.LAZY_STARTUP,
+        library=MockTSCLib(
+            Config.PRINTER_SETTINGS['mock_printer_time_scale'],
+            media_capacity=Config.PRINTER_SETTINGS['mock_printer_media_capacity'] or None
+        ),
+        io_workers=printer_io_workers
+    )
+else:
+    tsc_printer_service = TSCPrinterService(lazy=Config.LAZY_STARTUP, io_workers=printer_io_workers)
 
-# Schema
-user_input_schema = UserInputModelSchema()
+@dataclass(frozen=True)
+class BitmapFile:
+    """Çizilmiş etiketin geçici BMP dosyası ve etiket boyutu (mm, şablon varyantı tanımlıyorsa)"""
+    file_path: str
+    label_size: Optional[Tuple[float, float]] = None
+
+def print_job(printer_name: str, job: Any, is_bluetooth_label: bool, copies: int = 1) -> bool:
+    """Havuzdan gelen işi yazdır: spool kaydı ise raster, seri iş ise sayaçlı, değilse bitmap dosyası"""
+    trace = current_job()
+    if trace is not None:
+        trace.use_printer(printer_name)
+    # Printer'a gönderilen SIZE, etiketin çizildiği boyutla aynı olmalı
+    settings = with_label_size(Config.PRINTER_SETTINGS, is_bluetooth_label, job.label_size)
+    if isinstance(job, SpoolEntry):
+        success = tsc_printer_service.print_raster(
+            job.tspl_header(), job.data, settings,
+            is_bluetooth_label=is_bluetooth_label, printer_name=printer_name, copies=copies
+        )
+    elif isinstance(job, SequentialRun):
+        success = tsc_printer_service.print_sequence(
+            job.file_path, job.commands, job.count, settings,
+            is_bluetooth_label=is_bluetooth_label, printer_name=printer_name
+        )
+    else:
+        success = tsc_printer_service.print_label(
+            job.file_path, settings, is_bluetooth_label=is_bluetooth_label, printer_name=printer_name,
+            copies=copies
+        )
+    if success and printer_monitor is not None:
+        # Printer komutu hata durumundayken de kabul eder; gönderilmiş etiket basılmış olabileceğinden
+        # iş başka printer'a gitmez, günlükte belirsiz işaretlenir ve operatör kontrol eder
+        status = printer_monitor.refresh(printer_name)
+        if status is not None and status.error:
+            raise PrintUncertain(printer_name, f"Printer '{printer_name}' reported "
+                                               f"{', '.join(decode_status(status.code))} after the label was sent")
+    return success
+
+# Printer durum izleme - hata bildiren printer'a iş gönderilmez
+printer_monitor = PrinterStatusMonitor(
+    Config.PRINTER_SETTINGS['bluetooth_printer_names'] + Config.PRINTER_SETTINGS['carton_printer_names'],
+    query=lambda name: tsc_printer_service.query_status(name, Config.PRINTER_SETTINGS),
+    interval=Config.PRINTER_SETTINGS['status_poll_interval'],
+    on_recovered=lambda name: printer_pool.mark_recovered(name)
+) if Config.PRINTER_SETTINGS['status_poll_interval'] > 0 else None
+
+# Printer havuzu - her iş rolündeki en az yüklü sağlıklı printer'a gider
+printer_pool = PrinterPool(
+    {
+        BLUETOOTH_ROLE: Config.PRINTER_SETTINGS['bluetooth_printer_names'],
+        CARTON_ROLE: Config.PRINTER_SETTINGS['carton_printer_names']
+    },
+    print_func=print_job,
+    failure_cooldown=Config.PRINTER_SETTINGS['printer_failure_cooldown'],
+    printer_dpi=Config.PRINTER_SETTINGS['printer_dpi'],
+    default_dpi=Config.PRINTER_SETTINGS['dpi'],
+    availability=printer_monitor.is_available if printer_monitor is not None else None,
+    busy=printer_monitor.is_busy if printer_monitor is not None else None,
+    hold_timeout=Config.PRINTER_SETTINGS['printer_hold_timeout']
+)
+
+# Aynı etiket basılırken gelen aynı etiketler tek işte birleştirilir (PRINT 1,n)
+print_coalescer = JobCoalescer(
+    max_copies=Config.PRINTER_SETTINGS['print_coalesce_max_copies']
+) if Config.PRINTER_SETTINGS['print_coalesce'] else None
+
+# Çizilmiş etiketlerin spool'u (yeniden basım için)
+label_spool = LabelSpool(
+    Config.SPOOL_SETTINGS['spool_dir'],
+    max_segment_size=Config.SPOOL_SETTINGS['max_segment_size'],
+    max_segments=Config.SPOOL_SETTINGS['max_segments']
+) if Config.SPOOL_SETTINGS['enabled'] else None
+
+# Yazdırma günlüğü - süreç çökerse hangi etiketlerin basıldığı buradan bilinir
+print_journal = PrintJournal(
+    Config.PRINT_JOURNAL_SETTINGS['db_path'],
+    synchronous=Config.PRINT_JOURNAL_SETTINGS['synchronous'],
+    retention_days=Config.PRINT_JOURNAL_SETTINGS['retention_days'],
+    lease_seconds=Config.PRINT_JOURNAL_SETTINGS['lease_seconds']
+) if Config.PRINT_JOURNAL_SETTINGS['enabled'] else None
+if print_journal is not None:
+    # Çıkışta kuyrukta kalan günlük kayıtları yazılır
+    atexit.register(print_journal.close)
 
 def get_db_connection():
     """SQLite veritabanı bağlantısı oluştur"""
     return sqlite3.connect('labelPrint.db')
 
+# İkon deposu ve yerleşim önbelleği
+icon_store = IconAssetStore(get_db_connection)
+layout_repository = LayoutRepository(
+    get_db_connection,
+    icon_store,
+    version_check_interval=Config.LAYOUT_CACHE_CHECK_INTERVAL
+)
+
+# Ürüne (ItemCode / model) göre seçilen şablonlar; sık kullanılanlar derlenmiş planlarıyla bellekte kalır
+template_registry = TemplateRegistry(
+    get_db_connection,
+    icon_store,
+    cache_size=Config.TEMPLATE_CACHE_SIZE,
+    version_check_interval=Config.LAYOUT_CACHE_CHECK_INTERVAL
+)
+
+# Etiket üreticisi ilk kullanımda (veya ısınmada) oluşturulur
+_label_generator = None
+_label_generator_lock = threading.Lock()
+
+def get_label_generator() -> 'LabelBitmapGenerator':
+    """Paylaşılan etiket üreticisini getir"""
+    global _label_generator
+    with _label_generator_lock:
+        if _label_generator is None:
+            from label_bitmap_generator import LabelBitmapGenerator
+            _label_generator = LabelBitmapGenerator(
+                asset_loader=icon_store.load_bytes,
+                text_sprite_cache_size=Config.TEXT_SPRITE_CACHE_SIZE,
+                use_packed_raster=Config.PACKED_RASTER
+            )
+        return _label_generator
+
+# Service Layer istemcisi ilk kullanımda oluşturulur (oturum ve bağlantılar paylaşılır)
+_service_layer_client = None
+_service_layer_lock = threading.Lock()
+
+def get_service_layer_client() -> 'ServiceLayerClient':
+    """Paylaşılan Service Layer istemcisini getir"""
+    global _service_layer_client
+    with _service_layer_lock:
+        if _service_layer_client is None:
+            from service_layer_client import ServiceLayerClient
+            _service_layer_client = ServiceLayerClient(Config.API_SETTINGS)
+        return _service_layer_client
+
+# Çizim ve yazdırma sürelerinin kayan pencereleri (/health)
+render_latency = LatencyWindow(Config.LATENCY_WINDOW_SIZE)
+print_latency = LatencyWindow(Config.LATENCY_WINDOW_SIZE)
+
+# Etiket varyantlarını paralel çizmek için iş parçacığı havuzu
+render_executor = ThreadPoolExecutor(max_workers=Config.RENDER_WORKERS, thread_name_prefix='label-render')
+
 # React uygulamasını serve et
 @app.route('/')
 def serve():
@@ -162,29 +322,118 @@ def debug_database():
         logging.error(f"Database debug error: {e}")
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/label/input-items', methods=['GET'])
-def get_input_items():
-    """Veritabanından input item'ları getir"""
+@app.route('/api/label/layout', methods=['GET'])
+def get_layout():
+    """Tüm etiket yerleşimini tek istekte getir (ETag destekli)"""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        snapshot = layout_repository.get_layout()
+        response = Response(snapshot.body, mimetype='application/json')
+        response.set_etag(snapshot.etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
+    except Exception as e:
+        logging.error(f"Get layout error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/templates', methods=['GET'])
+def list_templates():
+    """Etiket şablonlarını, güncel versiyonlarını ve atandıkları ürünleri listele"""
+    try:
+        return jsonify(template_registry.list_templates()), 200
+    except Exception as e:
+        logging.error(f"List templates error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/templates/<name>', methods=['GET'])
+def get_template(name):
+    """Şablonu getir (?version=N ile eski versiyon, ETag destekli)"""
+    try:
+        template = template_registry.get(name, request.args.get('version', type=int))
+        if template is None:
+            return jsonify({'error': 'Template not found'}), 404
+        return template_response(template)
+    except Exception as e:
+        logging.error(f"Get template error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/templates/<name>', methods=['PUT'])
+def save_template(name):
+    """Şablonu kaydet; yerleşim değiştiyse yeni versiyon oluşur (variants, isteğe bağlı itemCodes ve models)"""
+    try:
+        data = request.get_json(silent=True)
+        if not data:
+            return jsonify({'error': 'Invalid template data'}), 400
         
-        cursor.execute("SELECT Id, Text, FontSize, FontFamily, XCoordinate, YCoordinate FROM InputInfo")
-        items = cursor.fetchall()
+        version, changed = template_registry.save_template(
+            name, data.get('variants'), item_codes=data.get('itemCodes'), models=data.get('models')
+        )
+        return jsonify({'message': 'Template saved successfully', 'name': name, 'version': version,
+                        'changed': changed}), 200
+    except PayloadError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logging.error(f"Save template error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/label/template', methods=['GET'])
+def get_product_template():
+    """Ürüne atanmış şablonu getir (?itemCode=...&model=...); eşleşme yoksa genel yerleşim kullanılır"""
+    try:
+        template = template_registry.resolve(request.args.get('itemCode'), request.args.get('model'))
+        if template is None:
+            return jsonify({'error': 'No template for this product'}), 404
+        return template_response(template)
+    except Exception as e:
+        logging.error(f"Get product template error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+def template_response(template: CompiledTemplate) -> Response:
+    response = Response(template.body, mimetype='application/json')
+    response.set_etag(template.etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+@app.route('/api/assets', methods=['POST'])
+def upload_asset():
+    """İkonu depoya yükle ve içerik özetini döndür"""
+    try:
+        data = request.get_json(silent=True)
+        if data and data.get('base64String'):
+            raw = base64.b64decode(data['base64String'])
+        else:
+            raw = request.get_data()
+        if not raw:
+            return jsonify({'error': 'Invalid asset data'}), 400
         
-        result = []
-        for item in items:
-            result.append({
-                'id': item[0],
-                'text': item[1],
-                'x': item[4],
-                'y': item[5],
-                'fontSize': item[2],
-                'fontFamily': item[3]
-            })
+        asset_hash = icon_store.store(raw)
+        return jsonify({'assetHash': asset_hash, 'url': f"/api/assets/{asset_hash}"}), 200
+    except Exception as e:
+        logging.error(f"Upload asset error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/assets/<asset_hash>', methods=['GET'])
+def get_asset(asset_hash):
+    """İçerik özetiyle ikon getir (değişmez, uzun süreli önbelleklenebilir)"""
+    try:
+        asset = icon_store.get(asset_hash)
+        if asset is None:
+            return jsonify({'error': 'Asset not found'}), 404
         
+        data, mime_type = asset
+        response = Response(data, mimetype=mime_type)
+        response.set_etag(asset_hash)
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+        return response.make_conditional(request)
+    except Exception as e:
+        logging.error(f"Get asset error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/label/input-items', methods=['GET'])
+def get_input_items():
+    """Veritabanından input item'ları getir"""
+    try:
+        result = layout_repository.get_layout().payload['textEntries']
         logging.info(f"Retrieved {len(result)} input items from database")
-        conn.close()
         return jsonify(result), 200
     except Exception as e:
         logging.error(f"Get input items error: {e}")
@@ -194,25 +443,8 @@ def get_input_items():
 def get_icon_items():
     """Veritabanından icon item'ları getir"""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT Id, Base64String, XCoordinate, YCoordinate, Width, Height FROM IconInfo")
-        items = cursor.fetchall()
-        
-        result = []
-        for item in items:
-            result.append({
-                'id': item[0],
-                'x': item[2],
-                'y': item[3],
-                'width': item[4],
-                'height': item[5],
-                'base64String': item[1]
-            })
-        
+        result = layout_repository.get_layout().payload['iconEntries']
         logging.info(f"Retrieved {len(result)} icon items from database")
-        conn.close()
         return jsonify(result), 200
     except Exception as e:
         logging.error(f"Get icon items error: {e}")
@@ -222,30 +454,8 @@ def get_icon_items():
 def get_barcode_items():
     """Veritabanından barcode item'ları getir"""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT Id, XCoordinate, YCoordinate, Width, Height, BarcodeSequence, BarcodeFormat, TextAlignment, TextFontSize, TextFontFamily FROM BarcodeInfo")
-        items = cursor.fetchall()
-        
-        result = []
-        for item in items:
-            result.append({
-                'id': item[0],
-                'x': item[1],
-                'y': item[2],
-                'width': item[3],
-                'height': item[4],
-                'barcodeData': f"Barcode_{item[0]}",  # Örnek data
-                'barcodeSequence': item[5],
-                'barcodeFormat': item[6],
-                'textAlignment': item[7],
-                'textFontSize': item[8],
-                'textFontFamily': item[9]
-            })
-        
+        result = layout_repository.get_layout().payload['barcodeEntries']
         logging.info(f"Retrieved {len(result)} barcode items from database")
-        conn.close()
         return jsonify(result), 200
     except Exception as e:
         logging.error(f"Get barcode items error: {e}")
@@ -255,27 +465,7 @@ def get_barcode_items():
 def get_label_settings():
     """Veritabanından label ayarlarını getir"""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT Id, Width, Height, DPI FROM LabelSetting LIMIT 1")
-        settings = cursor.fetchone()
-        
-        if settings:
-            result = {
-                'id': settings[0],
-                'width': float(settings[1]),
-                'height': float(settings[2]),
-                'dpi': int(settings[3])
-            }
-        else:
-            result = {
-                'width': 100,
-                'height': 100,
-                'dpi': 300
-            }
-        
-        conn.close()
+        result = layout_repository.get_layout().payload['labelSettings']
         return jsonify(result), 200
     except Exception as e:
         logging.error(f"Get label settings error: {e}")
@@ -289,57 +479,20 @@ def create_bitmap():
         if not data or 'textEntries' not in data:
             return jsonify({'error': 'Invalid input data'}), 400
         
-        text_entries = data['textEntries']
-        icon_entries = data.get('iconEntries', [])
-        barcode_entries = data.get('barcodeEntries', [])
+        # İstek tek geçişte doğrulanır ve çizim elemanlarına çevrilir
+        elements = LabelElements.from_payload(data, require_texts=True)
         
         # Geçici dosya oluştur
         with tempfile.NamedTemporaryFile(suffix='.bmp', delete=False) as temp_file:
             temp_path = temp_file.name
         
         try:
-            # Text entries'i dönüştür
-            texts = []
-            for entry in text_entries:
-                texts.append({
-                    'content': entry['text'],
-                    'font_family': entry['fontFamily'],
-                    'font_size': entry['fontSize'],
-                    'x_coordinate': entry['x'],
-                    'y_coordinate': entry['y']
-                })
-            
-            # Icon entries'i dönüştür
-            icons = []
-            for entry in icon_entries:
-                icons.append({
-                    'base64_string': entry.get('base64String', ''),
-                    'x_coordinate': entry['x'],
-                    'y_coordinate': entry['y'],
-                    'width': entry['width'],
-                    'height': entry['height']
-                })
-            
-            # Barcode entries'i dönüştür
-            barcodes = []
-            for entry in barcode_entries:
-                barcodes.append({
-                    'data': entry.get('barcodeData', ''),
-                    'x_coordinate': entry['x'],
-                    'y_coordinate': entry['y'],
-                    'width': entry['width'],
-                    'height': entry['height'],
-                    'format': entry.get('barcodeFormat', 'CODE_39'),
-                    'text_alignment': entry.get('textAlignment', 'none'),
-                    'text_font_size': entry.get('textFontSize', 8),
-                    'text_font_family': entry.get('textFontFamily', 'Arial')
-                })
-            
-            # Bitmap oluştur
-            success = label_generator.generate_label(
-                temp_path, texts, icons, barcodes, 
+            # Bitmap oluştur (önizleme istenen printer DPI'sında çizilebilir)
+            success = get_label_generator().generate_label(
+                temp_path, elements.texts, elements.icons, elements.barcodes, 
                 is_bluetooth_label=False, 
-                settings=Config.PRINTER_SETTINGS
+                settings=Config.PRINTER_SETTINGS,
+                dpi=data.get('dpi')
             )
             
             if not success:
@@ -360,6 +513,8 @@ def create_bitmap():
             if os.path.exists(temp_path):
                 os.unlink(temp_path)
                 
+    except PayloadError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         logging.error(f"Create bitmap error: {e}")
         return jsonify({'error': str(e)}), 500
@@ -372,89 +527,15 @@ def save_settings():
         if not data:
             return jsonify({'error': 'Invalid settings data'}), 400
         
-        conn = get_db_connection()
-        cursor = conn.cursor()
+        result = layout_repository.save_layout(data)
         
-        try:
-            # Input items'ları kaydet
-            if 'textEntries' in data:
-                for entry in data['textEntries']:
-                    if 'id' in entry and entry['id']:
-                        # Update existing
-                        cursor.execute("""
-                            UPDATE InputInfo 
-                            SET Text = ?, FontSize = ?, FontFamily = ?, XCoordinate = ?, YCoordinate = ?
-                            WHERE Id = ?
-                        """, (entry['text'], entry['fontSize'], entry['fontFamily'], entry['x'], entry['y'], entry['id']))
-                    else:
-                        # Create new
-                        import uuid
-                        new_id = str(uuid.uuid4())
-                        cursor.execute("""
-                            INSERT INTO InputInfo (Id, Text, FontSize, FontFamily, XCoordinate, YCoordinate)
-                            VALUES (?, ?, ?, ?, ?, ?)
-                        """, (new_id, entry['text'], entry['fontSize'], entry['fontFamily'], entry['x'], entry['y']))
-            
-            # Icon items'ları kaydet
-            if 'iconEntries' in data:
-                for entry in data['iconEntries']:
-                    if 'id' in entry and entry['id']:
-                        # Update existing
-                        cursor.execute("""
-                            UPDATE IconInfo 
-                            SET Base64String = ?, XCoordinate = ?, YCoordinate = ?, Width = ?, Height = ?
-                            WHERE Id = ?
-                        """, (entry.get('base64String', ''), entry['x'], entry['y'], entry['width'], entry['height'], entry['id']))
-                    else:
-                        # Create new
-                        import uuid
-                        new_id = str(uuid.uuid4())
-                        cursor.execute("""
-                            INSERT INTO IconInfo (Id, Base64String, XCoordinate, YCoordinate, Width, Height)
-                            VALUES (?, ?, ?, ?, ?, ?)
-                        """, (new_id, entry.get('base64String', ''), entry['x'], entry['y'], entry['width'], entry['height']))
-            
-            # Barcode items'ları kaydet
-            if 'barcodeEntries' in data:
-                for entry in data['barcodeEntries']:
-                    if 'id' in entry and entry['id']:
-                        # Update existing
-                        cursor.execute("""
-                            UPDATE BarcodeInfo 
-                            SET XCoordinate = ?, YCoordinate = ?, Width = ?, Height = ?, 
-                                BarcodeSequence = ?, BarcodeFormat = ?, TextAlignment = ?, 
-                                TextFontSize = ?, TextFontFamily = ?
-                            WHERE Id = ?
-                        """, (entry['x'], entry['y'], entry['width'], entry['height'], 
-                              entry.get('barcodeSequence', 1), entry.get('barcodeFormat', 'CODE_39'),
-                              entry.get('textAlignment', 'none'), entry.get('textFontSize', 8),
-                              entry.get('textFontFamily', 'Arial'), entry['id']))
-                    else:
-                        # Create new
-                        import uuid
-                        new_id = str(uuid.uuid4())
-                        cursor.execute("""
-                            INSERT INTO BarcodeInfo (Id, XCoordinate, YCoordinate, Width, Height, 
-                                                   BarcodeSequence, BarcodeFormat, TextAlignment, 
-                                                   TextFontSize, TextFontFamily)
-                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                        """, (new_id, entry['x'], entry['y'], entry['width'], entry['height'],
-                              entry.get('barcodeSequence', 1), entry.get('barcodeFormat', 'CODE_39'),
-                              entry.get('textAlignment', 'none'), entry.get('textFontSize', 8),
-                              entry.get('textFontFamily', 'Arial')))
-            
-            conn.commit()
-            
-            return jsonify({
-                'message': 'Settings saved successfully',
-                'saved_entries': len(data.get('textEntries', [])) + len(data.get('iconEntries', [])) + len(data.get('barcodeEntries', []))
-            }), 200
-            
-        except Exception as e:
-            conn.rollback()
-            raise e
-        finally:
-            conn.close()
+        return jsonify({
+            'message': 'Settings saved successfully',
+            'layout_version': result.version,
+            'saved_entries': result.written,
+            'deleted_entries': result.deleted,
+            'unchanged_entries': result.unchanged
+        }), 200
         
     except Exception as e:
         logging.error(f"Save settings error: {e}")
@@ -469,171 +550,449 @@ def print_label():
         if not data:
             return jsonify({'error': 'Invalid input data'}), 400
         
-        # UserInputModel oluştur
-        user_input = UserInputModel(
-            input_value_pairs=data.get('textEntries', []),
-            barcode_data_list=data.get('barcodeEntries', []),
-            icon_info_list=data.get('iconEntries', [])
-        )
+        # İstek bir kez doğrulanıp çevrilir, iki etiket varyantı aynı elemanları kullanır
+        elements = LabelElements.from_payload(data)
+        record_id = data.get('recordId')
         
-        # Geçici dosya oluştur
-        with tempfile.NamedTemporaryFile(suffix='.bmp', delete=False) as temp_file:
-            temp_path = temp_file.name
+        # Anahtarlı istek tekrar gelirse (ör. zaman aşımından sonra) etiket ikinci kez basılmaz
+        idempotency_key = data.get('idempotencyKey') or request.headers.get('Idempotency-Key')
+        if idempotency_key and print_journal is not None:
+            job, created = print_journal.open_job(
+                'label', label_job_payload(elements), record_id=record_id, idempotency_key=idempotency_key
+            )
+            if not created:
+                conflict = journal_conflict(job)
+                if conflict is not None:
+                    return conflict
+            # Anahtarlı işler birleştirilmez: her istek günlükte tek bir işe karşılık gelir
+            success, error = print_label_copies(elements, record_id, job.copies, job=job)
+        else:
+            success, error = print_label_elements(elements, record_id=record_id)
+        if not success:
+            return jsonify({'error': error}), 500
+        
+        return jsonify({'message': 'Labels printed successfully'}), 200
+                
+    except PayloadError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logging.error(f"Print request error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+def journal_conflict(job: JournalJob) -> Optional[Tuple[Response, int]]:
+    """Aynı anahtarla kayıtlı işin yanıtı; başarısız iş basılmamış adımlarından devam ettirilebiliyorsa None"""
+    if job.state == JOB_PRINTED:
+        return jsonify({'message': 'Labels already printed', 'jobId': job.job_id, 'duplicate': True}), 200
+    if job.state == JOB_FAILED and print_journal.reclaim(job):
+        return None
+    return jsonify({'error': f'Job with this idempotency key is {job.state}', 'jobId': job.job_id}), 409
+
+def print_label_elements(elements: Union[LabelElements, LabelVariants],
+                         record_id: Optional[str] = None) -> Tuple[bool, Optional[str]]:
+    """Bluetooth ve karton etiketlerini yazdır; aynı etiket basılırken gelen aynı etiketler kopya olarak birleştirilir"""
+    if print_coalescer is None:
+        return print_label_copies(elements, record_id, 1)
+    # Her gönderen birleştirilmiş işin sonucunu alır
+    return print_coalescer.submit(
+        (elements.content_key(), record_id),
+        lambda copies: print_label_copies(elements, record_id, copies)
+    )
+
+def print_label_copies(elements: Union[LabelElements, LabelVariants], record_id: Optional[str], copies: int,
+                       job: Optional[JournalJob] = None) -> Tuple[bool, Optional[str]]:
+    """Bluetooth ve karton etiketlerini bir kez çiz ve istenen kopya sayısıyla yazdır, (başarı, hata mesajı) döndür"""
+    if job is None and print_journal is not None:
+        job, _ = print_journal.open_job('label', label_job_payload(elements), copies, record_id)
+    
+    with job_context(record_id, job.job_id if job else None) as trace:
+        # Devam ettirilen işte basılmış (veya basılıp basılmadığı belirsiz) rol tekrar gönderilmez
+        variants = [is_bluetooth_label for is_bluetooth_label in (True, False)
+                    if job is None or job.pending(role_for(is_bluetooth_label))]
+        # Bluetooth ve karton etiketlerini aynı anda çiz (ayrı geçici dosyalara); çizim kayıtları da iş kimliğini taşır
+        renders = [render_executor.submit(contextvars.copy_context().run, render_label,
+                                          elements.for_role(role_for(is_bluetooth_label)), is_bluetooth_label,
+                                          record_id) for is_bluetooth_label in variants]
+        rendered = [render.result() for render in renders]
         
         try:
-            # Bluetooth etiketi oluştur ve yazdır
-            success = generate_and_print_bluetooth_label(user_input, temp_path)
-            if not success:
-                return jsonify({'error': 'Bluetooth label generation failed'}), 500
-            
-            # Karton etiketi oluştur ve yazdır
-            success = generate_and_print_carton_label(user_input, temp_path)
-            if not success:
-                return jsonify({'error': 'Carton label generation failed'}), 500
+            for is_bluetooth_label, targets in zip(variants, rendered):
+                role = role_for(is_bluetooth_label)
+                if targets and print_journaled(job, role, targets, is_bluetooth_label, copies):
+                    continue
+                label_type = 'Bluetooth' if is_bluetooth_label else 'Carton'
+                if job is not None and job.steps.get(role) == STEP_UNCERTAIN:
+                    error = f"{label_type} label may have printed; check the printer and resolve job {job.job_id}"
+                else:
+                    error = f"{label_type} label generation failed"
+                logging.warning(f"Label job failed: {trace.summary()}")
+                if job is not None:
+                    print_journal.finish_job(job, False, error)
+                return False, error
             
-            return jsonify({'message': 'Labels printed successfully'}), 200
+            if job is not None:
+                print_journal.finish_job(job, True)
+            logging.info(f"Label job printed ({copies} copies): {trace.summary()}", extra=PER_LABEL)
+            return True, None
             
         finally:
-            # Geçici dosyayı temizle
-            if os.path.exists(temp_path):
-                os.unlink(temp_path)
-                
+            # Geçici dosyaları temizle
+            cleanup_rendered(tuple(rendered))
+
+def label_job_payload(elements: Union[LabelElements, LabelVariants]) -> Dict[str, Any]:
+    """Günlüğe yazılan iş gövdesi; elemanlar şablondan doldurulduysa şablon adı ve versiyonu da saklanır"""
+    payload = {'elements': elements.to_payload()}
+    variant = elements.for_role(BLUETOOTH_ROLE).variant
+    if variant is not None:
+        payload['template'] = {'name': variant.template_name, 'version': variant.version}
+    return payload
+
+def label_job_elements(job: JournalJob) -> Union[LabelElements, LabelVariants]:
+    """Günlükteki işin elemanlarını geri oku; şablondan doldurulduysa aynı şablon versiyonunun varyantları bağlanır"""
+    elements = parse_label_payload(job.payload['elements'])
+    reference = job.payload.get('template')
+    if reference is None:
+        return elements
+    template = template_registry.get(reference['name'], reference['version'])
+    if template is None:
+        raise RuntimeError(f"Template {reference['name']} version {reference['version']} not found")
+    if isinstance(elements, LabelVariants):
+        return LabelVariants({role: replace(role_elements, variant=template.variant(role))
+                              for role, role_elements in elements.roles.items()})
+    # Tek eleman kümesi yalnızca iki rol aynı varyantı kullanıyorsa oluşur
+    return replace(elements, variant=template.variant(BLUETOOTH_ROLE))
+
+def print_journaled(job: Optional[JournalJob], step: str, targets: Dict[int, Any], is_bluetooth_label: bool,
+                    copies: int = 1) -> bool:
+    """Adımı printer'a göndermeden önce günlüğe yaz, sonucunu kaydet"""
+    if job is not None:
+        print_journal.step_started(job, step)
+    try:
+        success = print_rendered_label(targets, is_bluetooth_label, copies)
+    except PrintUncertain as e:
+        # Basılmış olabilecek adım otomatik tekrar basılmaz; iş operatör kontrolüne kadar belirsiz kalır
+        logging.error(f"Print result uncertain: {e}")
+        if job is not None:
+            print_journal.step_uncertain(job, step, printer=e.printer_name, error=str(e))
+        return False
+    if job is not None:
+        trace = current_job()
+        print_journal.step_finished(job, step, success, printer=trace.printer if trace is not None else None)
+    return success
+
+def render_label(elements: LabelElements, is_bluetooth_label: bool,
+                 record_id: Optional[str] = None) -> Optional[Dict[int, BitmapFile]]:
+    """Etiketi roldeki her printer DPI'sı için kendi geçici dosyasına çiz, DPI -> dosya döndür"""
+    label_type = 'Bluetooth' if is_bluetooth_label else 'Carton'
+    role = role_for(is_bluetooth_label)
+    targets: Dict[int, BitmapFile] = {}
+    label_size = elements.variant.label_size if elements.variant is not None else None
+    started = time.monotonic()
+    
+    try:
+        for dpi in printer_pool.dpis(role):
+            image = get_label_generator().generate_image(
+                elements.texts, elements.icons, elements.barcodes,
+                is_bluetooth_label=is_bluetooth_label,
+                dpi=dpi,
+                **render_options(elements, is_bluetooth_label)
+            )
+            if image is None:
+                break
+            with tempfile.NamedTemporaryFile(suffix='.bmp', delete=False) as temp_file:
+                targets[dpi] = BitmapFile(temp_file.name, label_size)
+            image.save(targets[dpi].file_path, 'BMP')
+            spool_label(image, role, dpi, record_id, label_size)
+        else:
+            elapsed = time.monotonic() - started
+            render_latency.record(elapsed)
+            trace = current_job()
+            if trace is not None:
+                trace.add_stage(f'render.{role}', elapsed)
+            return targets
     except Exception as e:
-        logging.error(f"Print request error: {e}")
-        return jsonify({'error': str(e)}), 500
+        logging.error(f"{label_type} label generation error: {e}")
+    
+    cleanup_rendered((targets,))
+    return None
 
-def generate_and_print_bluetooth_label(user_input: UserInputModel, temp_path: str):
-    """Bluetooth etiketi oluştur ve yazdır"""
-    try:
-        # Metin elemanlarını hazırla
-        texts = []
-        if user_input.input_value_pairs:
-            for pair in user_input.input_value_pairs:
-                texts.append({
-                    'content': pair.get('text', ''),
-                    'font_family': pair.get('fontFamily', 'Arial'),
-                    'font_size': pair.get('fontSize', 8),
-                    'x_coordinate': pair.get('x', 0),
-                    'y_coordinate': pair.get('y', 0)
-                })
-        
-        # Barkod elemanlarını hazırla
-        barcodes = []
-        if user_input.barcode_data_list:
-            for barcode_data in user_input.barcode_data_list:
-                barcodes.append({
-                    'data': barcode_data.get('barcodeData', ''),
-                    'x_coordinate': barcode_data.get('x', 10),
-                    'y_coordinate': barcode_data.get('y', 10),
-                    'width': barcode_data.get('width', 50),
-                    'height': barcode_data.get('height', 20),
-                    'format': barcode_data.get('barcodeFormat', 'CODE_39'),
-                    'text_alignment': barcode_data.get('textAlignment', 'none'),
-                    'text_font_size': barcode_data.get('textFontSize', 8),
-                    'text_font_family': barcode_data.get('textFontFamily', 'Arial')
-                })
-        
-        # İkon elemanlarını hazırla
-        icons = []
-        if user_input.icon_info_list:
-            for icon_info in user_input.icon_info_list:
-                icons.append({
-                    'base64_string': icon_info.get('base64String', ''),
-                    'x_coordinate': icon_info.get('x', 0),
-                    'y_coordinate': icon_info.get('y', 0),
-                    'width': icon_info.get('width', 50),
-                    'height': icon_info.get('height', 50)
-                })
-        
-        # Bitmap oluştur
-        success = label_generator.generate_label(
-            temp_path, texts, icons, barcodes, 
-            is_bluetooth_label=True, 
-            settings=Config.PRINTER_SETTINGS
-        )
+def render_options(elements: LabelElements, is_bluetooth_label: bool) -> Dict[str, Any]:
+    """Çizim ayarları; şablondan gelen elemanlarda varyantın etiket boyutu ve şablonla saklanan derlenmiş planlar"""
+    variant = elements.variant
+    if variant is None:
+        return {'settings': Config.PRINTER_SETTINGS}
+    return {
+        'settings': variant.settings(Config.PRINTER_SETTINGS, is_bluetooth_label),
+        'layout_key': variant.layout_key,
+        'plans': variant.plans
+    }
+
+def spool_label(image, role: str, dpi: int, record_id: Optional[str] = None,
+                label_size: Optional[Tuple[float, float]] = None) -> Optional[SpoolEntry]:
+    """Monokrom görüntüyü paketlenmiş 1-bit raster olarak spool'a ekle"""
+    if label_spool is None:
+        return None
+    try:
+        # Paketlenmiş raster ve '1' modundaki görüntü satır başına bayta hizalı, MSB önce paketlenir (TSPL BITMAP düzeni)
+        return label_spool.append(image.tobytes(), image.width, image.height, role, dpi, record_id, label_size)
+    except Exception as e:
+        logging.warning(f"Label spool error: {e}")
+        return None
+
+def print_rendered_label(targets: Dict[int, Any], is_bluetooth_label: bool, copies: int = 1) -> bool:
+    """Çizilmiş etiketi yazdır (geliştirme modunda yazdırma atlanır)"""
+    if Config.PRINTER_SETTINGS['is_app_development_mode']:
+        return True
+    
+    try:
+        role = role_for(is_bluetooth_label)
+        started = time.monotonic()
+        success = printer_pool.dispatch(role, targets, copies)
+        elapsed = time.monotonic() - started
+        print_latency.record(elapsed)
+        trace = current_job()
+        if trace is not None:
+            trace.add_stage(f'print.{role}', elapsed)
+        return success
+    except PrintUncertain:
+        raise
+    except Exception as e:
+        label_type = 'Bluetooth' if is_bluetooth_label else 'Carton'
+        logging.error(f"{label_type} label print error: {e}")
+        return False
+
+@app.route('/api/label/reprint', methods=['POST'])
+def reprint_label():
+    """Spool'daki etiketi yeniden çizmeden tekrar yazdır"""
+    try:
+        data = request.get_json()
+        if not data or not (data.get('recordId') or data.get('contentHash')):
+            return jsonify({'error': 'Invalid input data'}), 400
+        if label_spool is None:
+            return jsonify({'error': 'Label spool is disabled'}), 503
         
-        if not success:
-            return False
+        # Rol verilmezse kayda ait iki etiket de basılır; her rol için printer DPI'larına göre kayıtlar
+        roles = [data['role']] if data.get('role') else [BLUETOOTH_ROLE, CARTON_ROLE]
+        role_targets = {}
+        for role in roles:
+            entries = {dpi: label_spool.get(role, dpi, record_id=data.get('recordId'),
+                                            content_hash=data.get('contentHash'))
+                       for dpi in printer_pool.dpis(role)}
+            role_targets[role] = {dpi: entry for dpi, entry in entries.items() if entry is not None}
+            if not role_targets[role]:
+                return jsonify({'error': 'Label not found in spool'}), 404
         
-        # Yazdır (geliştirme modunda değilse)
-        is_app_development_mode = Config.PRINTER_SETTINGS['is_app_development_mode']
-        if not Config.PRINTER_SETTINGS['is_app_development_mode']:
-            success = tsc_printer_service.print_label(
-                temp_path, Config.PRINTER_SETTINGS, is_bluetooth_label=True
-            )
-            return success
+        with job_context(data.get('recordId')) as trace:
+            for role, targets in role_targets.items():
+                if Config.PRINTER_SETTINGS['is_app_development_mode']:
+                    continue
+                started = time.monotonic()
+                success = printer_pool.dispatch(role, targets)
+                elapsed = time.monotonic() - started
+                print_latency.record(elapsed)
+                trace.add_stage(f'print.{role}', elapsed)
+                if not success:
+                    logging.warning(f"Reprint job failed: {trace.summary()}")
+                    return jsonify({'error': f'{role} label reprint failed'}), 500
+            logging.info(f"Reprint job printed: {trace.summary()}", extra=PER_LABEL)
         
-        return True
+        return jsonify({
+            'message': 'Labels reprinted successfully',
+            'contentHashes': {role: {dpi: entry.content_hash for dpi, entry in targets.items()}
+                              for role, targets in role_targets.items()}
+        }), 200
+    except Exception as e:
+        logging.error(f"Reprint request error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/label/spool', methods=['POST'])
+def prerender_labels():
+    """Kayıtların etiketlerini yazdırmadan çizip spool'a ekle (vardiya öncesi hazırlık)"""
+    try:
+        data = request.get_json()
+        if not data or not isinstance(data.get('records'), list):
+            return jsonify({'error': 'Invalid input data'}), 400
+        if label_spool is None:
+            return jsonify({'error': 'Label spool is disabled'}), 503
         
+        results = list(render_executor.map(spool_record, data['records']))
+        return jsonify({'spooled': results}), 200
     except Exception as e:
-        logging.error(f"Bluetooth label generation error: {e}")
-        return False
+        logging.error(f"Spool request error: {e}")
+        return jsonify({'error': str(e)}), 500
 
-def generate_and_print_carton_label(user_input: UserInputModel, temp_path: str):
-    """Karton etiketi oluştur ve yazdır"""
-    try:
-        # Metin elemanlarını hazırla
-        texts = []
-        if user_input.input_value_pairs:
-            for pair in user_input.input_value_pairs:
-                texts.append({
-                    'content': pair.get('text', ''),
-                    'font_family': pair.get('fontFamily', 'Arial'),
-                    'font_size': pair.get('fontSize', 8),
-                    'x_coordinate': pair.get('x', 0),
-                    'y_coordinate': pair.get('y', 0)
-                })
-        
-        # Barkod elemanlarını hazırla
-        barcodes = []
-        if user_input.barcode_data_list:
-            for barcode_data in user_input.barcode_data_list:
-                barcodes.append({
-                    'data': barcode_data.get('barcodeData', ''),
-                    'x_coordinate': barcode_data.get('x', 10),
-                    'y_coordinate': barcode_data.get('y', 10),
-                    'width': barcode_data.get('width', 50),
-                    'height': barcode_data.get('height', 20),
-                    'format': barcode_data.get('barcodeFormat', 'CODE_39'),
-                    'text_alignment': barcode_data.get('textAlignment', 'none'),
-                    'text_font_size': barcode_data.get('textFontSize', 8),
-                    'text_font_family': barcode_data.get('textFontFamily', 'Arial')
-                })
-        
-        # İkon elemanlarını hazırla
-        icons = []
-        if user_input.icon_info_list:
-            for icon_info in user_input.icon_info_list:
-                icons.append({
-                    'base64_string': icon_info.get('base64String', ''),
-                    'x_coordinate': icon_info.get('x', 0),
-                    'y_coordinate': icon_info.get('y', 0),
-                    'width': icon_info.get('width', 50),
-                    'height': icon_info.get('height', 50)
-                })
-        
-        # Bitmap oluştur
-        success = label_generator.generate_label(
-            temp_path, texts, icons, barcodes, 
-            is_bluetooth_label=False, 
-            settings=Config.PRINTER_SETTINGS
-        )
+def spool_record(record: Dict) -> Dict[str, Any]:
+    """Kaydın etiket varyantlarını her printer DPI'sı için çiz ve spool'a ekle, içerik özetlerini döndür"""
+    elements = elements_from_record(record)
+    record_id = record.get('SerialNumber') or None
+    result = {'recordId': record_id}
+    for is_bluetooth_label in (True, False):
+        role = role_for(is_bluetooth_label)
+        role_elements = elements.for_role(role)
+        result[role] = {}
+        for dpi in printer_pool.dpis(role):
+            image = get_label_generator().generate_image(
+                role_elements.texts, role_elements.icons, role_elements.barcodes,
+                is_bluetooth_label=is_bluetooth_label,
+                dpi=dpi,
+                **render_options(role_elements, is_bluetooth_label)
+            )
+            label_size = role_elements.variant.label_size if role_elements.variant is not None else None
+            entry = spool_label(image, role, dpi, record_id, label_size) if image is not None else None
+            result[role][dpi] = entry.content_hash if entry else None
+    return result
+
+@app.route('/api/label/sequential-run', methods=['POST'])
+def print_sequential_run():
+    """Ardışık seri numaralarını printer sayaçlarıyla tek işte yazdır (her N etiket için bir PRINT N)"""
+    job = None
+    try:
+        data = request.get_json()
+        record = data.get('record') if data else None
+        count = int(data.get('count', 0)) if data else 0
+        if not isinstance(record, dict) or not record.get('SerialNumber') or count < 1:
+            return jsonify({'error': 'Invalid input data'}), 400
         
-        if not success:
-            return False
+        first_serial = str(record['SerialNumber'])
+        try:
+            last_serial = increment_serial(first_serial, count - 1)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        # Yazdır (geliştirme modunda değilse)
-        if not Config.PRINTER_SETTINGS['is_app_development_mode']:
-            success = tsc_printer_service.print_label(
-                temp_path, Config.PRINTER_SETTINGS, is_bluetooth_label=False
+        roles = [data['role']] if data.get('role') else [BLUETOOTH_ROLE, CARTON_ROLE]
+        
+        if print_journal is not None:
+            # Parça boyutu günlüğe yazılır; devam ettirilen iş aynı parçaları (ve seri numaralarını) kullanır
+            job, created = print_journal.open_job(
+                'sequential',
+                {'record': record, 'count': count, 'roles': roles,
+                 'chunk': Config.PRINTER_SETTINGS['sequential_run_max_labels']},
+                record_id=first_serial,
+                idempotency_key=data.get('idempotencyKey') or request.headers.get('Idempotency-Key')
             )
-            return success
+            if not created:
+                conflict = journal_conflict(job)
+                if conflict is not None:
+                    return conflict
         
-        return True
+        failure = run_sequential_job(record, count, roles, job)
+        if failure is not None:
+            return jsonify(failure), 500
         
+        return jsonify({
+            'message': 'Sequential run printed successfully',
+            'count': count,
+            'firstSerial': first_serial,
+            'lastSerial': last_serial
+        }), 200
+    except ValueError as e:
+        close_failed_job(job, e)
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
-        logging.error(f"Carton label generation error: {e}")
-        return False
+        close_failed_job(job, e)
+        logging.error(f"Sequential run error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+def close_failed_job(job: Optional[JournalJob], error: Exception):
+    """Hata ile yarıda kalan işi başarısız olarak kapat (açık kalırsa sonraki başlangıçta kurtarılırdı)"""
+    if job is not None and job.state == JOB_OPEN:
+        print_journal.finish_job(job, False, str(error))
+
+def run_sequential_job(record: Dict, count: int, roles: List[str],
+                       job: Optional[JournalJob] = None) -> Optional[Dict[str, Any]]:
+    """Seri aralığını rol başına parçalar halinde yazdır; başarısızlıkta yanıt gövdesini döndür"""
+    first_serial = str(record['SerialNumber'])
+    max_labels = job.payload['chunk'] if job is not None else Config.PRINTER_SETTINGS['sequential_run_max_labels']
+    
+    with job_context(first_serial, job.job_id if job else None) as trace:
+        for role in roles:
+            is_bluetooth_label = role == BLUETOOTH_ROLE
+            # Uzun aralıklar parçalara bölünür; bir printer hatası yalnızca bir parçayı tekrarlatır
+            printed = 0
+            while printed < count:
+                chunk = min(max_labels, count - printed)
+                step = f'{role}:{printed}'
+                # Devam ettirilen işte basılmış parçaların seri numaraları tekrar basılmaz
+                if job is not None and not job.pending(step):
+                    printed += chunk
+                    continue
+                chunk_record = dict(record, SerialNumber=increment_serial(first_serial, printed))
+                with trace.stage(f'render.{role}'):
+                    runs = render_sequential_run(chunk_record, chunk, is_bluetooth_label)
+                try:
+                    if not print_journaled(job, step, runs, is_bluetooth_label):
+                        logging.warning(f"Sequential run failed after {printed} labels: {trace.summary()}")
+                        if job is not None:
+                            print_journal.finish_job(job, False, f'{role} sequential run failed')
+                        return {
+                            'error': f'{role} sequential run failed',
+                            'printed': {role: printed},
+                            'nextSerial': chunk_record['SerialNumber'],
+                            'jobId': job.job_id if job else None
+                        }
+                finally:
+                    cleanup_rendered((runs,))
+                printed += chunk
+        if job is not None:
+            print_journal.finish_job(job, True)
+        logging.info(f"Sequential run printed ({count} labels): {trace.summary()}")
+    return None
+
+def render_sequential_run(record: Dict, count: int, is_bluetooth_label: bool) -> Dict[int, SequentialRun]:
+    """Seri alanları boş bırakılmış arka planı her DPI için çiz, seri alanlarını sayaç komutlarına çevir"""
+    role = role_for(is_bluetooth_label)
+    layout, variant = record_layout(record, role)
+    elements = fill_layout(layout, record, variant)
+    first_serial = str(record['SerialNumber'])
+    
+    # {SerialNumber} ile biten metinler ve seri numarası alanına bağlı barkodlar printer sayacıyla basılır
+    fields = []
+    for index, entry in enumerate(layout['textEntries']):
+        if '{SerialNumber}' in entry['text']:
+            content = elements.texts[index].content
+            if not content.endswith(first_serial):
+                raise ValueError(f"Text '{entry['text']}' must end with the serial number")
+            fields.append(CounterField('text', index, content))
+    barcode_fields = Config.SERIAL_PORT_SETTINGS['barcode_fields']
+    for index, entry in enumerate(layout['barcodeEntries']):
+        sequence = entry['barcodeSequence'] - 1
+        if 0 <= sequence < len(barcode_fields) and barcode_fields[sequence] == 'SerialNumber':
+            fields.append(CounterField('barcode', index, first_serial))
+    if not fields:
+        raise ValueError('Layout has no serial number field')
+    
+    counter_texts = {field.index for field in fields if field.kind == 'text'}
+    counter_barcodes = {field.index for field in fields if field.kind == 'barcode'}
+    text_values = ['' if index in counter_texts else text.content for index, text in enumerate(elements.texts)]
+    barcode_values = [None if index in counter_barcodes else barcode.data
+                      for index, barcode in enumerate(elements.barcodes)]
+    
+    generator = get_label_generator()
+    runs: Dict[int, SequentialRun] = {}
+    try:
+        for dpi in printer_pool.dpis(role):
+            plan = generator.compiler.compile(
+                elements.texts, elements.icons, elements.barcodes,
+                is_bluetooth_label, dpi=dpi, **render_options(elements, is_bluetooth_label)
+            )
+            image = generator.render_image(plan, text_values, barcode_values)
+            if image is None:
+                raise RuntimeError(f'Sequential run background could not be rendered at {dpi} dpi')
+            commands = tuple(counter_commands(plan, fields))
+            with tempfile.NamedTemporaryFile(suffix='.bmp', delete=False) as temp_file:
+                file_path = temp_file.name
+            runs[dpi] = SequentialRun(
+                file_path=file_path,
+                commands=commands,
+                count=count,
+                first_serial=first_serial,
+                last_serial=increment_serial(first_serial, count - 1),
+                label_size=variant.label_size if variant is not None else None
+            )
+            image.save(file_path, 'BMP')
+    except Exception:
+        cleanup_rendered((runs,))
+        raise
+    return runs
 
 @app.route('/api/label/settings', methods=['GET'])
 def get_printer_settings():
@@ -662,19 +1021,459 @@ def update_printer_settings():
         logging.error(f"Update settings error: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/data/serial-numbers', methods=['GET'])
+def get_serial_numbers():
+    """Service Layer'dan seri numarası kayıtlarını getir, istenirse sonrakini önceden getir"""
+    try:
+        client = get_service_layer_client()
+        records = client.fetch_serial_numbers(request.args.get('filter'))
+        
+        next_filter = request.args.get('prefetch')
+        if next_filter:
+            client.prefetch_serial_numbers(next_filter)
+        
+        return jsonify(records), 200
+    except Exception as e:
+        logging.error(f"Get serial numbers error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/data/items/<item_code>', methods=['GET'])
+def get_item_data(item_code):
+    """Ürün ana verisini (EAN/model/güç) önbellekten veya Service Layer'dan getir"""
+    try:
+        return jsonify(get_service_layer_client().get_item(item_code)), 200
+    except Exception as e:
+        logging.error(f"Get item data error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+class _RecordFields(dict):
+    """Kayıtta olmayan yer tutucuları olduğu gibi bırakır"""
+    def __missing__(self, key):
+        return '{' + key + '}'
+
+def record_template(record: Dict) -> Optional[CompiledTemplate]:
+    """Kaydın ürününe atanmış şablon (önce ItemCode, sonra U_Model); eşleşme yoksa None"""
+    return template_registry.resolve(record.get('ItemCode'), record.get('U_Model'))
+
+def record_layout(record: Dict, role: str) -> Tuple[Dict, Optional[TemplateVariant]]:
+    """Kaydın şablonundaki rol varyantının yerleşimi; şablon yoksa kayıtlı genel yerleşim"""
+    template = record_template(record)
+    if template is None:
+        return layout_repository.get_layout().payload, None
+    variant = template.variant(role)
+    return variant.layout, variant
+
+def elements_from_record(record: Dict) -> Union[LabelElements, LabelVariants]:
+    """Kaydın şablonunu (yoksa kayıtlı genel yerleşimi) seri numarası kaydıyla doldur"""
+    template = record_template(record)
+    if template is None:
+        return fill_layout(layout_repository.get_layout().payload, record)
+    variants = {role: template.variant(role) for role in (BLUETOOTH_ROLE, CARTON_ROLE)}
+    if variants[BLUETOOTH_ROLE] is variants[CARTON_ROLE]:
+        return fill_layout(variants[BLUETOOTH_ROLE].layout, record, variants[BLUETOOTH_ROLE])
+    return LabelVariants({role: fill_layout(variant.layout, record, variant) for role, variant in variants.items()})
+
+def fill_layout(layout: Dict, record: Dict, variant: Optional[TemplateVariant] = None) -> LabelElements:
+    """Yerleşimi bir seri numarası kaydıyla doldur"""
+    fields = _RecordFields({key: '' if value is None else value for key, value in record.items()})
+    barcode_fields = Config.SERIAL_PORT_SETTINGS['barcode_fields']
+    
+    # Metinlerdeki {SerialNumber} gibi yer tutucular kayıttaki alanlarla değiştirilir
+    text_entries = [dict(entry, text=entry['text'].format_map(fields)) for entry in layout['textEntries']]
+    
+    # Barkod verisi, barkod sırasına karşılık gelen kayıt alanından gelir
+    barcode_entries = []
+    for entry in layout['barcodeEntries']:
+        index = entry['barcodeSequence'] - 1
+        field = barcode_fields[index] if 0 <= index < len(barcode_fields) else None
+        barcode_entries.append(dict(entry, barcodeData=str(record.get(field) or '') if field else ''))
+    
+    elements = LabelElements.from_payload({
+        'textEntries': text_entries,
+        'barcodeEntries': barcode_entries,
+        'iconEntries': layout['iconEntries']
+    })
+    return replace(elements, variant=variant) if variant is not None else elements
+
+def handle_scan(code: str):
+    """Okutulan seri numarasının kaydını bul ve etiketlerini doğrudan yazdır"""
+    record = None
+    try:
+        record = get_service_layer_client().find_serial(code)
+    except Exception as e:
+        logging.warning(f"Serial lookup failed for {code}: {e}")
+    if record is None:
+        record = {'SerialNumber': code}
+    
+    success, error = print_label_elements(elements_from_record(record), record_id=code)
+    if not success:
+        raise RuntimeError(error)
+
+def render_record(record: Dict) -> Optional[Dict[str, Dict[int, BitmapFile]]]:
+    """Kayıt için iki etiket varyantını çiz, rol -> (DPI -> dosya) eşlemesini döndür"""
+    elements = elements_from_record(record)
+    record_id = record.get('SerialNumber') or None
+    rendered = {role: render_label(elements.for_role(role), role == BLUETOOTH_ROLE, record_id)
+                for role in (BLUETOOTH_ROLE, CARTON_ROLE)}
+    if all(rendered.values()):
+        return rendered
+    cleanup_rendered(rendered.values())
+    return None
+
+def print_rendered_role(role: str, targets: Dict[int, BitmapFile]) -> bool:
+    """Çizilmiş etiketi rolün printer'larına yazdır"""
+    return print_rendered_label(targets, is_bluetooth_label=role == BLUETOOTH_ROLE)
+
+def cleanup_rendered(rendered: Iterable[Optional[Dict[int, Any]]]):
+    """Çizilmiş etiketlerin (BitmapFile, SequentialRun) geçici dosyalarını sil"""
+    for targets in rendered:
+        for target in (targets or {}).values():
+            if os.path.exists(target.file_path):
+                os.unlink(target.file_path)
+
+def create_bulk_runner(max_in_flight: int = 4) -> BulkLabelRunner:
+    """Toplu yazdırma hattını uygulamanın çizim ve yazdırma yoluna bağla"""
+    return BulkLabelRunner(
+        render=render_record,
+        print_rendered=print_rendered_role,
+        cleanup=lambda rendered: cleanup_rendered(rendered.values()),
+        max_in_flight=max_in_flight,
+        render_workers=Config.RENDER_WORKERS,
+        journal=print_journal
+    )
+
+# Arka planda çalışan toplu yazdırma işleri
+bulk_jobs: Dict[str, BulkLabelRunner] = {}
+
+# Toplu yazdırma yalnızca bu dizindeki dosyaları okur (checkpoint da kaynağın yanına yazılır)
+BULK_DIR = 'bulk'
+
+def bulk_source_path(path: str) -> str:
+    """Kaynak dosya yolunu bulk dizinine göre çöz; dizinin dışına çıkan yol PayloadError"""
+    root = os.path.realpath(BULK_DIR)
+    source_path = os.path.realpath(os.path.join(root, path))
+    try:
+        inside = os.path.commonpath([root, source_path]) == root
+    except ValueError:
+        # Windows'ta farklı sürücüdeki yol
+        inside = False
+    if not inside or source_path == root:
+        raise PayloadError(f"'path' must be a file inside the {BULK_DIR} directory")
+    return source_path
+
+def bulk_job_id(source_path: str) -> str:
+    """İstemciye dönen iş kimliği: bulk dizinine göreli yol (sunucunun dizin yapısı açığa çıkmaz);
+    bulk_source_path ile tekrar aynı dosyaya çözülür"""
+    return os.path.relpath(source_path, os.path.realpath(BULK_DIR)).replace(os.sep, '/')
+
+@app.route('/api/label/bulk-print', methods=['POST'])
+def start_bulk_print():
+    """CSV/JSONL dosyasından toplu yazdırmayı arka planda başlat"""
+    try:
+        if 'file' in request.files:
+            # Yüklenen dosya diske akıtılır, belleğe alınmaz
+            upload = request.files['file']
+            os.makedirs(BULK_DIR, exist_ok=True)
+            source_path = bulk_source_path(secure_filename(upload.filename or '') or 'records.csv')
+            upload.save(source_path)
+            max_in_flight = int(request.form.get('maxInFlight', 4))
+        else:
+            data = request.get_json()
+            if not data or not isinstance(data.get('path'), str) or not data['path']:
+                return jsonify({'error': 'Invalid input data'}), 400
+            source_path = bulk_source_path(data['path'])
+            max_in_flight = int(data.get('maxInFlight', 4))
+        
+        if not os.path.isfile(source_path):
+            return jsonify({'error': f'File not found: {bulk_job_id(source_path)}'}), 404
+        
+        job_id = bulk_job_id(source_path)
+        existing = bulk_jobs.get(job_id)
+        if existing is not None and existing.running:
+            return jsonify({'error': 'Bulk job already running', 'job_id': job_id}), 409
+        
+        runner = create_bulk_runner(max_in_flight=max_in_flight)
+        bulk_jobs[job_id] = runner
+        threading.Thread(target=runner.run, args=(source_path,), name='bulk-job', daemon=True).start()
+        
+        return jsonify({'message': 'Bulk print started', 'job_id': job_id}), 202
+    except PayloadError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logging.error(f"Bulk print error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/label/bulk-print', methods=['GET'])
+def get_bulk_print_progress():
+    """Toplu yazdırma işlerinin ilerlemesini getir"""
+    return jsonify({job_id: runner.progress() for job_id, runner in bulk_jobs.items()}), 200
+
+scanner_service: Optional['SerialScannerService'] = None
+
+def start_scanner_service():
+    """Ayarlarda etkinse seri port barkod okuyucusunu başlat"""
+    global scanner_service
+    if not Config.SERIAL_PORT_SETTINGS['scanner_enabled'] or scanner_service is not None:
+        return
+    from serial_scanner_service import SerialScannerService
+    scanner_service = SerialScannerService(
+        Config.SERIAL_PORT_SETTINGS,
+        on_scan=handle_scan,
+        debounce_seconds=Config.SERIAL_PORT_SETTINGS['debounce_seconds']
+    )
+    scanner_service.start()
+
+@app.route('/api/scanner', methods=['GET'])
+def get_scanner_status():
+    """Barkod okuyucu durumunu getir"""
+    if scanner_service is None:
+        return jsonify({'running': False}), 200
+    return jsonify(scanner_service.stats()), 200
+
+def start_printer_monitor():
+    """Printer durum izlemeyi başlat (geliştirme modunda printer olmadığı için başlatılmaz)"""
+    if printer_monitor is None or Config.PRINTER_SETTINGS['is_app_development_mode']:
+        return
+    printer_monitor.start()
+
+def start_journal_recovery():
+    """Sahibi ölmüş veya kirası dolmuş yarım işleri arka planda devam ettir; çalışan worker çökerse
+    işleri kirası dolunca alınır"""
+    if print_journal is None or not Config.PRINT_JOURNAL_SETTINGS['recover_on_startup']:
+        return
+    resumers = {
+        'label': lambda job: print_label_copies(label_job_elements(job), job.record_id, job.copies, job=job),
+        'sequential': lambda job: run_sequential_job(
+            job.payload['record'], job.payload['count'], job.payload['roles'], job
+        )
+    }
+
+    def recover_loop():
+        while True:
+            try:
+                print_journal.recover(resumers)
+            except Exception as e:
+                logging.error(f"Journal recovery error: {e}")
+            time.sleep(print_journal.lease_seconds)
+
+    threading.Thread(target=recover_loop, name='journal-recovery', daemon=True).start()
+
+@app.route('/api/print-jobs', methods=['GET'])
+def get_print_jobs():
+    """Yazdırma günlüğündeki son işler (?state=uncertain ile kontrol bekleyenler)"""
+    if print_journal is None:
+        return jsonify({'error': 'Print journal is disabled'}), 503
+    try:
+        jobs = print_journal.jobs(request.args.get('state'), limit=request.args.get('limit', 100, type=int))
+        return jsonify([job.to_dict() for job in jobs]), 200
+    except Exception as e:
+        logging.error(f"Get print jobs error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/print-jobs/<job_id>', methods=['GET'])
+def get_print_job(job_id):
+    """Yazdırma işinin ve adımlarının durumu"""
+    if print_journal is None:
+        return jsonify({'error': 'Print journal is disabled'}), 503
+    job = print_journal.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict()), 200
+
+@app.route('/api/print-jobs/<job_id>/resolve', methods=['POST'])
+def resolve_print_job(job_id):
+    """Basılıp basılmadığı belirsiz adımları operatörün kontrolüne göre işaretle (printed: true/false)"""
+    if print_journal is None:
+        return jsonify({'error': 'Print journal is disabled'}), 503
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data.get('printed'), bool):
+        return jsonify({'error': "'printed' must be true or false"}), 400
+    job = print_journal.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    print_journal.resolve(job, data['printed'])
+    return jsonify(job.to_dict()), 200
+
+@app.route('/api/printers', methods=['GET'])
+def get_printers():
+    """Printer havuzundaki printer'ların yük, sağlık ve donanım durumunu getir"""
+    try:
+        return jsonify(printer_stats()), 200
+    except Exception as e:
+        logging.error(f"Get printers error: {e}")
+        return jsonify({'error': str(e)}), 500
+
+# Isınma durumu - /ready tarafından raporlanır
+readiness: Dict[str, Any] = {
+    'ready': False,
+    'started_at': None,
+    'duration': None,
+    'steps': {},
+    'error': None
+}
+_warmup_thread: Optional[threading.Thread] = None
+_warmup_lock = threading.Lock()
+
+def warm_up():
+    """Ağır modülleri ve printer kütüphanesini yükle, kayıtlı yerleşimi her DPI için önceden çiz"""
+    started = time.monotonic()
+    readiness['started_at'] = datetime.now().isoformat()
+    try:
+        _warmup_step('label_generator', get_label_generator)
+        if not Config.PRINTER_SETTINGS['is_app_development_mode']:
+            _warmup_step('printer_library', tsc_printer_service.load_library)
+            if printer_io_workers is not None:
+                _warmup_step('printer_workers', lambda: printer_io_workers.start(
+                    Config.PRINTER_SETTINGS['bluetooth_printer_names'] + Config.PRINTER_SETTINGS['carton_printer_names']
+                ))
+        _warmup_step('layout', warm_up_layout)
+        _warmup_step('templates', warm_up_templates)
+        readiness['ready'] = True
+        logging.info(f"Warm-up completed in {time.monotonic() - started:.2f}s")
+    except Exception as e:
+        readiness['error'] = str(e)
+        logging.error(f"Warm-up failed: {e}")
+    finally:
+        readiness['duration'] = round(time.monotonic() - started, 3)
+
+def _warmup_step(name: str, step):
+    started = time.monotonic()
+    if step() is False:
+        raise RuntimeError(f'{name} could not be loaded')
+    readiness['steps'][name] = round(time.monotonic() - started, 3)
+
+def warm_up_layout():
+    """Fontları yükle, yerleşimi derle ve sabit metinlerle QR kodlayıcıyı önceden çiz"""
+    layout = layout_repository.get_layout().payload
+    elements = LabelElements.from_payload(layout)
+    generator = get_label_generator()
+    for is_bluetooth_label in (True, False):
+        for dpi in printer_pool.dpis(role_for(is_bluetooth_label)):
+            image = generator.generate_image(
+                elements.texts, elements.icons, elements.barcodes,
+                is_bluetooth_label=is_bluetooth_label,
+                settings=Config.PRINTER_SETTINGS,
+                dpi=dpi
+            )
+            if image is None:
+                raise RuntimeError(f'Layout could not be rendered at {dpi} dpi')
+
+def warm_up_templates():
+    """Ürünlere atanmış şablonları önbelleğe al ve her rol ve DPI için derle (ürün değişimi önbellekten karşılanır)"""
+    generator = get_label_generator()
+    for template in template_registry.preload():
+        for is_bluetooth_label in (True, False):
+            role = role_for(is_bluetooth_label)
+            variant = template.variant(role)
+            elements = replace(LabelElements.from_payload(variant.layout), variant=variant)
+            for dpi in printer_pool.dpis(role):
+                generator.compiler.compile(elements.texts, elements.icons, elements.barcodes, is_bluetooth_label,
+                                           dpi=dpi, **render_options(elements, is_bluetooth_label))
+
+def start_warmup():
+    """Isınmayı başlat; hızlı başlangıç modunda arka planda, değilse sunucu açılmadan önce"""
+    global _warmup_thread
+    with _warmup_lock:
+        if _warmup_thread is not None:
+            return
+        _warmup_thread = threading.Thread(target=warm_up, name='warmup', daemon=True)
+        _warmup_thread.start()
+    if not Config.LAZY_STARTUP:
+        _warmup_thread.join()
+
+def start_background_services(primary: bool = True):
+    """Tüm giriş noktalarının (app.py, run.py, serve.py) ortak başlangıcı: ısınma ve printer durum izleme;
+    birincil süreçte barkod okuyucu ve yarım kalan işlerin kurtarılması da başlatılır"""
+    start_warmup()
+    start_printer_monitor()
+    # Seri port tek bir süreç tarafından açılabilir; kurtarma da tek süreçten yürütülür
+    if primary:
+        start_scanner_service()
+        start_journal_recovery()
+
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    """Hazır olma kontrolü - ısınma bitene kadar 503 döner"""
+    # Sunucu ısınma başlatılmadan (ör. harici WSGI sunucusuyla) açıldıysa burada başlat
+    start_warmup()
+    return jsonify(readiness), 200 if readiness['ready'] else 503
+
 @app.route('/health', methods=['GET'])
 def health_check():
-    """Sağlık kontrolü"""
+    """Sağlık kontrolü - printer, kuyruk, gecikme ve önbellek durumu (her saniye sorgulanabilir)"""
+    printers = printer_stats()
+    database_ok = check_database()
+    library_state = tsc_printer_service.library_state
+    roles_ok = all(any(printer['healthy'] for printer in printers if printer['role'] == role)
+                   for role in (BLUETOOTH_ROLE, CARTON_ROLE))
+    library_ok = library_state != 'failed' or Config.PRINTER_SETTINGS['is_app_development_mode']
+    job_ages = [printer['oldest_job_age'] for printer in printers if printer['oldest_job_age'] is not None]
+    
     return jsonify({
-        'status': 'healthy',
+        'status': 'healthy' if database_ok and roles_ok and library_ok else 'degraded',
         'timestamp': datetime.now().isoformat(),
-        'version': '1.0.0'
+        'version': '1.0.0',
+        'ready': readiness['ready'],
+        'database': database_ok,
+        'printer_library': library_state,
+        'printers': printers,
+        'queue_depth': sum(printer['queue_depth'] for printer in printers),
+        'oldest_job_age': max(job_ages) if job_ages else None,
+        'latency_ms': {
+            'render': render_latency.percentiles(),
+            'print': print_latency.percentiles()
+        },
+        'caches': cache_stats(),
+        'coalescing': print_coalescer.stats() if print_coalescer is not None else None,
+        'logging': logging_stats(),
+        'journal': print_journal.stats() if print_journal is not None else None,
+        'printer_workers': printer_io_workers.stats() if printer_io_workers is not None else None,
+        'process': process_stats()
     }), 200
 
+def printer_stats() -> List[Dict[str, Any]]:
+    """Havuz istatistiklerine printer'ın son sorgulanan durumunu ekle"""
+    printers = printer_pool.stats()
+    statuses = printer_monitor.stats() if printer_monitor is not None else {}
+    for printer in printers:
+        printer['status'] = statuses.get(printer['name'])
+    return printers
+
+def check_database() -> bool:
+    try:
+        conn = get_db_connection()
+        try:
+            conn.execute('SELECT 1')
+        finally:
+            conn.close()
+        return True
+    except Exception:
+        return False
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    """Önbelleklerin boyut ve isabet oranları (henüz oluşturulmamış önbellekler atlanır)"""
+    caches = {
+        'layout': layout_repository.stats(),
+        'templates': template_registry.stats(),
+        'icons': icon_store.stats()
+    }
+    if _label_generator is not None:
+        caches['plans'] = _label_generator.compiler.stats()
+        caches['text_sprites'] = _label_generator.text_sprites.stats()
+    if _service_layer_client is not None:
+        caches['items'] = _service_layer_client.stats()
+    for stats in caches.values():
+        stats['hit_rate'] = hit_rate(stats['hits'], stats['misses'])
+    return caches
+
 if __name__ == '__main__':
     # Logs dizinini oluştur
     os.makedirs('logs', exist_ok=True)
     
+    # Isınma, printer durum izleme, barkod okuyucu (etkinse) ve yarım kalan işlerin kurtarılması - reloader'ın izleyici sürecinde başlatılmaz
+    if not Config.DEBUG or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_services()
+    
     # Uygulamayı başlat
     app.run(
         host='0.0.0.0',
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Toplu etiket üretimi
+CSV veya JSONL dosyasındaki kayıtları akış halinde çizer ve yazdırır.
+Bellekte en fazla max_in_flight kadar çizilmiş etiket tutulur; ilerleme
+checkpoint dosyasına yazılır ve yarıda kalan iş kaldığı yerden devam eder.
+Yazdırma günlüğü verilirse her kayıt günlüğe de yazılır; checkpoint'ten sonra
+basılmış kayıtlar yeniden çalıştırmada tekrar basılmaz.
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from print_journal import JOB_PRINTED, JournalJob, PrintJournal
+from printer_pool import PrintUncertain
+
+
+def iter_records(file_path: str) -> Iterator[Tuple[int, Dict]]:
+    """Dosyadaki kayıtları (sıra numarası, kayıt) olarak tek tek oku"""
+    if file_path.lower().endswith('.csv'):
+        with open(file_path, newline='', encoding='utf-8-sig') as f:
+            for index, record in enumerate(csv.DictReader(f)):
+                yield index, record
+    else:
+        with open(file_path, encoding='utf-8') as f:
+            index = 0
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                yield index, json.loads(line)
+                index += 1
+
+
+class BulkCheckpoint:
+    """Son yazdırılan kaydın sıra numarasını dosyada saklar"""
+
+    def __init__(self, checkpoint_path: str, source_path: str):
+        self.checkpoint_path = checkpoint_path
+        self.source_path = os.path.abspath(source_path)
+        self.last_printed = -1
+        if os.path.exists(checkpoint_path):
+            with open(checkpoint_path, encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get('source') == self.source_path:
+                self.last_printed = state.get('last_printed', -1)
+
+    def save(self, last_printed: int):
+        self.last_printed = last_printed
+        temp_path = f"{self.checkpoint_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                'source': self.source_path,
+                'last_printed': last_printed,
+                'updated_at': time.strftime('%Y-%m-%dT%H:%M:%S')
+            }, f)
+        # Yarım yazılmış checkpoint bırakmamak için atomik değiştir
+        os.replace(temp_path, self.checkpoint_path)
+
+
+class BulkLabelRunner:
+    """Kayıtları okuma -> çizim -> yazdırma hattından sınırlı tamponlarla geçirir
+
+    render kaydı rol -> çizilmiş etiket eşlemesine çevirir, print_rendered(rol, etiket) tek rolü yazdırır.
+    """
+
+    def __init__(self, render: Callable[[Dict], Optional[Dict[str, Any]]], print_rendered: Callable[[str, Any], bool],
+                 cleanup: Optional[Callable[[Any], None]] = None,
+                 max_in_flight: int = 4, render_workers: int = 2, checkpoint_every: int = 10,
+                 journal: Optional[PrintJournal] = None):
+        self.logger = logging.getLogger(__name__)
+        self.render = render
+        self.print_rendered = print_rendered
+        self.cleanup = cleanup
+        self.max_in_flight = max_in_flight
+        self.render_workers = render_workers
+        self.checkpoint_every = checkpoint_every
+        self.journal = journal
+
+        self.printed = 0
+        self.skipped = 0
+        self.failed_index: Optional[int] = None
+        self.error: Optional[str] = None
+        self.running = False
+        self._cancel_event = threading.Event()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def run(self, source_path: str, checkpoint_path: Optional[str] = None) -> bool:
+        """Dosyadaki tüm kayıtları yazdır; başarısız olursa checkpoint'ten devam edilebilir"""
+        checkpoint = BulkCheckpoint(checkpoint_path or f"{source_path}.checkpoint.json", source_path)
+        # Yazıcı tarafı yetişemezse kuyruk dolar ve çizim durur (backpressure)
+        pending: 'queue.Queue[Optional[Tuple[int, Optional[Future]]]]' = queue.Queue(maxsize=self.max_in_flight)
+        self.running = True
+        self._cancel_event.clear()
+
+        printer_thread = threading.Thread(
+            target=self._print_loop, args=(pending, checkpoint), name='bulk-printer', daemon=True
+        )
+        printer_thread.start()
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.render_workers, thread_name_prefix='bulk-render') as executor:
+                for index, record in iter_records(source_path):
+                    if index <= checkpoint.last_printed:
+                        self.skipped += 1
+                        continue
+                    if self._stopped():
+                        break
+                    if self._already_printed(checkpoint, index):
+                        # Günlükte basılmış kayıt çizilmez; sıra numarası checkpoint için yine de kuyruğa girer
+                        if not self._enqueue(pending, (index, None)):
+                            break
+                        continue
+                    future = executor.submit(self.render, record)
+                    if not self._enqueue(pending, (index, future)):
+                        self._discard(future)
+                        break
+        finally:
+            pending.put(None)
+            printer_thread.join()
+            self.running = False
+
+        if self.failed_index is not None:
+            self.logger.error(f"Toplu yazdırma {self.failed_index}. kayıtta durdu: {self.error}")
+            return False
+        self.logger.info(f"Toplu yazdırma tamamlandı: {self.printed} yazdırıldı, {self.skipped} atlandı")
+        return not self._cancel_event.is_set()
+
+    def _stopped(self) -> bool:
+        return self._cancel_event.is_set() or self.failed_index is not None
+
+    def _already_printed(self, checkpoint: BulkCheckpoint, index: int) -> bool:
+        """Kayıt checkpoint'ten sonra basılmış mı (önceki çalıştırma checkpoint yazamadan durdu)"""
+        if self.journal is None:
+            return False
+        job = self.journal.find(self._idempotency_key(checkpoint, index))
+        return job is not None and job.state == JOB_PRINTED
+
+    def _enqueue(self, pending: 'queue.Queue', item: Tuple[int, Optional[Future]]) -> bool:
+        """Kuyrukta yer açılana kadar bekle; iş durdurulursa vazgeç"""
+        while not self._stopped():
+            try:
+                pending.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _discard(self, future: Optional[Future]):
+        if future is None:
+            return
+        try:
+            rendered = future.result()
+            if self.cleanup and rendered is not None:
+                self.cleanup(rendered)
+        except Exception:
+            pass
+
+    def _print_loop(self, pending: 'queue.Queue', checkpoint: BulkCheckpoint):
+        since_checkpoint = 0
+        last_printed = checkpoint.last_printed
+        while True:
+            item = pending.get()
+            if item is None:
+                break
+            index, future = item
+            if self._stopped():
+                self._discard(future)
+                continue
+            if future is None:
+                self.skipped += 1
+                last_printed = index
+                continue
+
+            rendered = None
+            try:
+                rendered = future.result()
+                job = None
+                if self.journal is not None:
+                    job = self._open_journal_job(checkpoint, index)
+                    if job is None:
+                        # Çizim sırasında başka bir süreç basmış olabilir
+                        self.skipped += 1
+                        last_printed = index
+                        continue
+                if rendered is None or not self._print(job, rendered):
+                    raise RuntimeError('Etiket çizilemedi veya yazdırılamadı')
+                self.printed += 1
+                last_printed = index
+                since_checkpoint += 1
+                if since_checkpoint >= self.checkpoint_every:
+                    checkpoint.save(last_printed)
+                    since_checkpoint = 0
+            except Exception as e:
+                self.failed_index = index
+                self.error = str(e)
+            finally:
+                if self.cleanup and rendered is not None:
+                    self.cleanup(rendered)
+
+        if last_printed != checkpoint.last_printed:
+            checkpoint.save(last_printed)
+
+    def _open_journal_job(self, checkpoint: BulkCheckpoint, index: int) -> Optional[JournalJob]:
+        """Kaydın günlük işini aç; daha önce basılmışsa None, basılıp basılmadığı belirsizse hata"""
+        job, created = self.journal.open_job(
+            'bulk', {'source': checkpoint.source_path, 'index': index},
+            idempotency_key=self._idempotency_key(checkpoint, index)
+        )
+        if created:
+            return job
+        if job.state == JOB_PRINTED:
+            return None
+        # Açık iş yalnızca sahibi olan süreç öldüyse veya kirası dolduysa devralınır
+        if not self.journal.reclaim(job):
+            raise RuntimeError(f'Kayıt başka bir süreçte yazdırılıyor veya basılıp basılmadığı belirsiz '
+                               f'(iş {job.job_id}), kontrol edilmeli')
+        return job
+
+    @staticmethod
+    def _idempotency_key(checkpoint: BulkCheckpoint, index: int) -> str:
+        return f'bulk:{checkpoint.source_path}:{index}'
+
+    def _print(self, job: Optional[JournalJob], rendered: Dict[str, Any]) -> bool:
+        """Çizilmiş kaydın rollerini sırayla yazdır; günlük varsa her rol ayrı adımdır ve
+        önceki çalıştırmada basılmış roller tekrar gönderilmez"""
+        for role, targets in rendered.items():
+            if job is None:
+                if not self.print_rendered(role, targets):
+                    return False
+                continue
+            if not job.pending(role):
+                continue
+            self.journal.step_started(job, role)
+            try:
+                success = self.print_rendered(role, targets)
+            except PrintUncertain as e:
+                # Gönderilmiş olabilecek etiket tekrar basılmaz; kayıt operatör kontrolüne kadar belirsiz kalır
+                self.journal.step_uncertain(job, role, printer=e.printer_name, error=str(e))
+                self.journal.finish_job(job, False, str(e))
+                raise
+            self.journal.step_finished(job, role, success)
+            if not success:
+                self.journal.finish_job(job, False, f'{role} yazdırılamadı')
+                return False
+        if job is not None:
+            self.journal.finish_job(job, True)
+        return True
+
+    def progress(self) -> Dict[str, Any]:
+        return {
+            'running': self.running,
+            'printed': self.printed,
+            'skipped': self.skipped,
+            'failed_index': self.failed_index,
+            'error': self.error
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CSV/JSONL dosyasından toplu etiket yazdırma')
+    parser.add_argument('source', help='Kayıt dosyası (.csv veya .jsonl)')
+    parser.add_argument('--checkpoint', help='Checkpoint dosyası (varsayılan: <source>.checkpoint.json)')
+    parser.add_argument('--max-in-flight', type=int, default=4, help='Bellekte tutulacak en fazla çizilmiş etiket')
+    args = parser.parse_args()
+
+    import app
+    runner = app.create_bulk_runner(max_in_flight=args.max_in_flight)
+    success = runner.run(args.source, args.checkpoint)
+    print(json.dumps(runner.progress(), ensure_ascii=False))
+    raise SystemExit(0 if success else 1)
+
+
+if __name__ == '__main__':
+    main()
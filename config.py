@@ -11,6 +11,41 @@ class Config:
     # Database ayarları - Aynı dizindeki labelPrint.db dosyasını kullan
     DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///labelPrint.db')
     
+    # Hızlı başlangıç - ağır modüller ve TSCLIB.dll ilk kullanımda yüklenir, ısınma arka planda yapılır
+    LAZY_STARTUP = os.getenv('LAZY_STARTUP', 'True').lower() == 'true'
+    
+    # Yerleşim önbelleği - diğer süreçlerin kaydettiği versiyonu kontrol etme aralığı (saniye)
+    LAYOUT_CACHE_CHECK_INTERVAL = float(os.getenv('LAYOUT_CACHE_CHECK_INTERVAL', '1.0'))
+    
+    # Bellekte derlenmiş halde tutulan en fazla şablon versiyonu sayısı (ürün şablonları)
+    TEMPLATE_CACHE_SIZE = int(os.getenv('TEMPLATE_CACHE_SIZE', '32'))
+    
+    # Etiket çizimi için paralel iş parçacığı sayısı
+    RENDER_WORKERS = int(os.getenv('RENDER_WORKERS', '4'))
+    
+    # /health gecikme yüzdelikleri için son ölçüm sayısı
+    LATENCY_WINDOW_SIZE = int(os.getenv('LATENCY_WINDOW_SIZE', '1000'))
+    
+    # Çizilmiş metin parçası (sprite) önbelleğinin en fazla kayıt sayısı
+    TEXT_SPRITE_CACHE_SIZE = int(os.getenv('TEXT_SPRITE_CACHE_SIZE', '2048'))
+    
+    # Etiketi NumPy ile paketlenmiş 1-bit raster olarak birleştir (NumPy yüklü değilse Pillow kullanılır)
+    PACKED_RASTER = os.getenv('PACKED_RASTER', 'True').lower() == 'true'
+    
+    # Log ayarları - kayıtlar kuyruğa atılır, dosya ve konsola tek arka plan iş parçacığı yazar
+    LOG_SETTINGS = {
+        'log_dir': os.getenv('LOG_DIR', 'logs'),
+        'file_name': os.getenv('LOG_FILE_NAME', 'app.log'),
+        'level': os.getenv('LOG_LEVEL', 'INFO'),
+        'console': os.getenv('LOG_CONSOLE', 'True').lower() == 'true',
+        'max_bytes': int(os.getenv('LOG_MAX_BYTES', str(10 * 1024 * 1024))),
+        'backup_count': int(os.getenv('LOG_BACKUP_COUNT', '5')),
+        # Kuyruk dolarsa yeni kayıtlar beklemeden düşürülür
+        'queue_size': int(os.getenv('LOG_QUEUE_SIZE', '10000')),
+        # Etiket başına INFO kayıtlarının saniyedeki üst sınırı; 0 = örnekleme kapalı
+        'per_label_rate': int(os.getenv('LOG_PER_LABEL_RATE', '20'))
+    }
+    
     # Printer ayarları
     PRINTER_SETTINGS = {
         'bluetooth_printer_name': os.getenv('BLUETOOTH_PRINTER_NAME', 'TSC TE310-btpincode'),
@@ -20,6 +55,8 @@ class Config:
         'carton_label_width': float(os.getenv('CARTON_LABEL_WIDTH', '100')),
         'carton_label_height': float(os.getenv('CARTON_LABEL_HEIGHT', '67')),
         'dpi': int(os.getenv('DPI', '300')),
+        # Türkçe karakterleri ASCII'ye indir (Unicode destekli font kurulduysa False yapılabilir)
+        'ascii_text_only': os.getenv('ASCII_TEXT_ONLY', 'True').lower() == 'true',
         'orientation': os.getenv('ORIENTATION', 'portrait'),
         'density': int(os.getenv('DENSITY', '12')),
         'speed': int(os.getenv('SPEED', '4')),
@@ -28,7 +65,74 @@ class Config:
         'tear_off': os.getenv('TEAR_OFF', 'True').lower() == 'true',
         'left_shift': float(os.getenv('LEFT_SHIFT', '2.032')),
         'right_shift': float(os.getenv('RIGHT_SHIFT', '2.032')),
-        'is_app_development_mode': os.getenv('IS_APP_DEVELOPMENT_MODE', 'False').lower() == 'true'
+        'is_app_development_mode': os.getenv('IS_APP_DEVELOPMENT_MODE', 'False').lower() == 'true',
+        # TSCLIB.dll yerine yazdırma süresini taklit eden sahte printer (yük testi için)
+        'mock_printer': os.getenv('MOCK_PRINTER', 'False').lower() == 'true',
+        'mock_printer_time_scale': float(os.getenv('MOCK_PRINTER_TIME_SCALE', '1.0')),
+        # Sahte printer başına rulo kapasitesi (etiket); 0 = sınırsız
+        'mock_printer_media_capacity': int(os.getenv('MOCK_PRINTER_MEDIA_CAPACITY', '0')),
+        'printer_lock_dir': os.getenv('PRINTER_LOCK_DIR', 'locks'),
+        'printer_lock_timeout': float(os.getenv('PRINTER_LOCK_TIMEOUT', '30')),
+        # Printer havuzu - aynı roldeki printer'lar virgülle ayrılır
+        'bluetooth_printer_names': [name.strip() for name in os.getenv(
+            'BLUETOOTH_PRINTER_NAMES', os.getenv('BLUETOOTH_PRINTER_NAME', 'TSC TE310-btpincode')).split(',') if name.strip()],
+        'carton_printer_names': [name.strip() for name in os.getenv(
+            'CARTON_PRINTER_NAMES', os.getenv('CARTON_PRINTER_NAME', 'TSC TE310-packaging')).split(',') if name.strip()],
+        # Aynı etiket basılırken gelen aynı etiketler, o iş bitince tek işte kopya olarak basılır (PRINT 1,n)
+        'print_coalesce': os.getenv('PRINT_COALESCE', 'True').lower() == 'true',
+        'print_coalesce_max_copies': int(os.getenv('PRINT_COALESCE_MAX_COPIES', '100')),
+        # Seri etiket işinde tek seferde printer'a gönderilecek en fazla etiket (PRINT N)
+        'sequential_run_max_labels': int(os.getenv('SEQUENTIAL_RUN_MAX_LABELS', '500')),
+        'printer_failure_cooldown': float(os.getenv('PRINTER_FAILURE_COOLDOWN', '30')),
+        # Printer çağrıları printer başına ayrı süreçte; takılan çağrı zaman aşımında süreçle birlikte sonlandırılır
+        'printer_io_workers': os.getenv('PRINTER_IO_WORKERS', 'True').lower() == 'true',
+        # Tek TSCLIB çağrısı için süre (saniye); PRINT komutuna etiket başına, veri aktarımına hıza göre süre eklenir
+        'printer_io_timeout': float(os.getenv('PRINTER_IO_TIMEOUT', '10')),
+        'printer_io_timeout_per_label': float(os.getenv('PRINTER_IO_TIMEOUT_PER_LABEL', '5')),
+        'printer_io_transfer_rate': float(os.getenv('PRINTER_IO_TRANSFER_RATE', str(64 * 1024))),
+        'printer_io_start_timeout': float(os.getenv('PRINTER_IO_START_TIMEOUT', '15')),
+        # Printer durum sorgusu (kağıt/ribbon bitti, kapak açık); 0 = kapalı
+        'status_poll_interval': float(os.getenv('PRINTER_STATUS_POLL_INTERVAL', '2.0')),
+        # Rolün tüm printer'ları hata bildiriyorsa işin düşürülmeden bekletileceği süre
+        'printer_hold_timeout': float(os.getenv('PRINTER_HOLD_TIMEOUT', '60')),
+        # Printer başına DPI profili ("printer adı=dpi" virgülle ayrılır); olmayanlar 'dpi' kullanır
+        'printer_dpi': {
+            name.strip(): int(dpi) for name, _, dpi in (
+                profile.rpartition('=') for profile in os.getenv('PRINTER_DPI_PROFILES', '').split(',')
+            ) if name.strip() and dpi.strip()
+        }
+    }
+    
+    # Spool ayarları - çizilmiş etiketler yeniden basım için 1-bit raster olarak saklanır
+    SPOOL_SETTINGS = {
+        'enabled': os.getenv('SPOOL_ENABLED', 'True').lower() == 'true',
+        'spool_dir': os.getenv('SPOOL_DIR', 'spool'),
+        'max_segment_size': int(os.getenv('SPOOL_MAX_SEGMENT_SIZE', str(64 * 1024 * 1024))),
+        'max_segments': int(os.getenv('SPOOL_MAX_SEGMENTS', '8'))
+    }
+    
+    # Yazdırma günlüğü - işlerin yaşam döngüsü WAL modundaki ayrı SQLite dosyasına grup commit'le yazılır
+    PRINT_JOURNAL_SETTINGS = {
+        'enabled': os.getenv('PRINT_JOURNAL_ENABLED', 'True').lower() == 'true',
+        'db_path': os.getenv('PRINT_JOURNAL_DB', 'printJournal.db'),
+        # NORMAL: süreç çökmesine karşı güvenli; FULL: elektrik kesintisine karşı da (her commit'te fsync)
+        'synchronous': os.getenv('PRINT_JOURNAL_SYNCHRONOUS', 'NORMAL').upper(),
+        'retention_days': float(os.getenv('PRINT_JOURNAL_RETENTION_DAYS', '30')),
+        # Açık işin sahibi süreç bu süre boyunca kirasını yenilemezse iş kurtarılabilir sayılır
+        'lease_seconds': float(os.getenv('PRINT_JOURNAL_LEASE_SECONDS', '30')),
+        # Başlangıçta yarım kalan işlerin basılmamış adımlarını devam ettir
+        'recover_on_startup': os.getenv('PRINT_JOURNAL_RECOVER', 'True').lower() == 'true'
+    }
+    
+    # Production sunucu ayarları (serve.py)
+    SERVER_SETTINGS = {
+        'host': os.getenv('SERVER_HOST', '0.0.0.0'),
+        'port': int(os.getenv('SERVER_PORT', '6003')),
+        'processes': int(os.getenv('SERVER_PROCESSES', '1')),
+        'threads': int(os.getenv('SERVER_THREADS', '8')),
+        'connection_limit': int(os.getenv('SERVER_CONNECTION_LIMIT', '100')),
+        'backlog': int(os.getenv('SERVER_BACKLOG', '64')),
+        'channel_timeout': int(os.getenv('SERVER_CHANNEL_TIMEOUT', '120'))
     }
     
     # API ayarları
@@ -40,7 +144,12 @@ class Config:
         'select_serial_number_columns': os.getenv('SELECT_SERIAL_NUMBER_COLUMNS', 
             'DocEntry,ItemCode,ItemDescription,MfrSerialNo,SerialNumber,U_4GImei,U_BluetoothMAC,U_BLE_A_P,U_EthernetMAC,U_CPID,U_MRFID,U_KRFID,U_KRFID1'),
         'select_ean_columns': os.getenv('SELECT_EAN_COLUMNS', 
-            'ItemCode,ItemName,ForeignName,BarCode,U_Model,U_System,U_RaletedVoltage,U_RaletedPower,U_BodyColor')
+            'ItemCode,ItemName,ForeignName,BarCode,U_Model,U_System,U_RaletedVoltage,U_RaletedPower,U_BodyColor'),
+        'page_size': int(os.getenv('API_PAGE_SIZE', '500')),
+        'item_cache_ttl': float(os.getenv('API_ITEM_CACHE_TTL', '600')),
+        'pool_size': int(os.getenv('API_POOL_SIZE', '8')),
+        'timeout': float(os.getenv('API_TIMEOUT', '30')),
+        'verify_ssl': os.getenv('API_VERIFY_SSL', 'False').lower() == 'true'
     }
     
     # Serial Port ayarları
@@ -50,5 +159,10 @@ class Config:
         'parity': os.getenv('SERIAL_PARITY', 'None'),
         'data_bits': int(os.getenv('SERIAL_DATA_BITS', '8')),
         'stop_bits': os.getenv('SERIAL_STOP_BITS', 'One'),
-        'is_app_development_mode': os.getenv('SERIAL_IS_APP_DEVELOPMENT_MODE', 'False').lower() == 'true'
+        'is_app_development_mode': os.getenv('SERIAL_IS_APP_DEVELOPMENT_MODE', 'False').lower() == 'true',
+        'scanner_enabled': os.getenv('SERIAL_SCANNER_ENABLED', 'False').lower() == 'true',
+        'debounce_seconds': float(os.getenv('SERIAL_DEBOUNCE_SECONDS', '1.0')),
+        # Barkod sırası (BarcodeSequence) -> seri numarası kaydındaki alan
+        'barcode_fields': [field.strip() for field in os.getenv(
+            'SERIAL_BARCODE_FIELDS', 'SerialNumber,U_BluetoothMAC').split(',') if field.strip()]
     } 
\ No newline at end of file
@@ -1,60 +1,247 @@
-from dataclasses import dataclass
-from typing import List, Optional
-from marshmallow import Schema, fields
+import hashlib
+import json
+import math
+from dataclasses import dataclass, field
+from typing import Any, Dict, Mapping, Optional, Tuple, Union
+
+# Koordinat ve boyutlar mm cinsindendir; bu sınırların dışındaki değerler etiket olamaz
+MAX_COORDINATE_MM = 1000.0
+MAX_FONT_SIZE_MM = 100.0
 
 # Data Transfer Objects
-@dataclass
-class InputValuePair:
-    input: str
-    value: str
-    font_family: str
-    font_size: int
-    x_coordinate: int
-    y_coordinate: int
+class PayloadError(ValueError):
+    """İstek gövdesi geçersiz (400 olarak döndürülür)"""
 
-@dataclass
-class BarcodeData:
-    id: int
-    data: str
+def _text(entry: Mapping, key: str, default: Optional[str], path: str) -> Optional[str]:
+    value = entry.get(key, default)
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    raise PayloadError(f"'{path}.{key}' must be a string")
 
-@dataclass
-class IconInfos:
-    name: str
-    x_coordinate: int
-    y_coordinate: int
-    width: int
-    height: int
+def _number(entry: Mapping, key: str, default: float, path: str, minimum: Optional[float] = -MAX_COORDINATE_MM,
+            maximum: float = MAX_COORDINATE_MM) -> float:
+    value = entry.get(key, default)
+    if isinstance(value, bool):
+        raise PayloadError(f"'{path}.{key}' must be a number")
+    if isinstance(value, str):
+        try:
+            value = float(value)
+        except ValueError:
+            raise PayloadError(f"'{path}.{key}' must be a number") from None
+    elif not isinstance(value, (int, float)):
+        raise PayloadError(f"'{path}.{key}' must be a number")
+    # 'nan', 'inf' ve JSON NaN/Infinity float() ile okunur; NaN her karşılaştırmada False döner
+    if isinstance(value, float) and not math.isfinite(value):
+        raise PayloadError(f"'{path}.{key}' must be a finite number")
+    if minimum is not None and value < minimum:
+        raise PayloadError(f"'{path}.{key}' must be at least {minimum:g}")
+    if value > maximum:
+        raise PayloadError(f"'{path}.{key}' must be at most {maximum:g}")
+    return value
 
-@dataclass
-class UserInputModel:
-    input_value_pairs: Optional[List[InputValuePair]] = None
-    barcode_data_list: Optional[List[BarcodeData]] = None
-    icon_info_list: Optional[List[IconInfos]] = None
-
-# Marshmallow Schemas for serialization
-class InputValuePairSchema(Schema):
-    input = fields.Str(required=True)
-    value = fields.Str(required=True)
-    font_family = fields.Str(required=True)
-    font_size = fields.Int(required=True)
-    x_coordinate = fields.Int(required=True)
-    y_coordinate = fields.Int(required=True)
-
-class BarcodeDataSchema(Schema):
-    id = fields.Int(required=True)
-    data = fields.Str(required=True)
-
-class IconInfosSchema(Schema):
-    name = fields.Str(required=True)
-    x_coordinate = fields.Int(required=True)
-    y_coordinate = fields.Int(required=True)
-    width = fields.Int(required=True)
-    height = fields.Int(required=True)
-
-class UserInputModelSchema(Schema):
-    input_value_pairs = fields.List(fields.Nested(InputValuePairSchema), required=False)
-    barcode_data_list = fields.List(fields.Nested(BarcodeDataSchema), required=False)
-    icon_info_list = fields.List(fields.Nested(IconInfosSchema), required=False)
+class _Element:
+    """Çizim elemanlarının ortak davranışı (alanlar __slots__ ile tanımlanır)"""
+
+    __slots__ = ()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __eq__(self, other) -> bool:
+        return type(self) is type(other) and self.to_dict() == other.to_dict()
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__)
+        return f'{type(self).__name__}({fields})'
+
+class TextElement(_Element):
+    """Etiketteki metin (koordinatlar ve font boyutu mm cinsinden)"""
+
+    __slots__ = ('content', 'font_family', 'font_size', 'x_coordinate', 'y_coordinate')
+
+    def __init__(self, content: str = '', font_family: str = 'Arial', font_size: float = 8,
+                 x_coordinate: float = 0, y_coordinate: float = 0):
+        self.content = content
+        self.font_family = font_family
+        self.font_size = font_size
+        self.x_coordinate = x_coordinate
+        self.y_coordinate = y_coordinate
+
+    @classmethod
+    def from_payload(cls, entry: Mapping, path: str) -> 'TextElement':
+        return cls(
+            content=_text(entry, 'text', '', path) or '',
+            font_family=_text(entry, 'fontFamily', 'Arial', path) or 'Arial',
+            font_size=_number(entry, 'fontSize', 8, path, minimum=0, maximum=MAX_FONT_SIZE_MM),
+            x_coordinate=_number(entry, 'x', 0, path),
+            y_coordinate=_number(entry, 'y', 0, path)
+        )
+
+    def to_payload(self) -> Dict[str, Any]:
+        return {'text': self.content, 'fontFamily': self.font_family, 'fontSize': self.font_size,
+                'x': self.x_coordinate, 'y': self.y_coordinate}
+
+class IconElement(_Element):
+    """Etiketteki ikon (içerik özeti veya Base64 verisi)"""
+
+    __slots__ = ('base64_string', 'asset_hash', 'x_coordinate', 'y_coordinate', 'width', 'height')
+
+    def __init__(self, base64_string: str = '', asset_hash: Optional[str] = None,
+                 x_coordinate: float = 0, y_coordinate: float = 0, width: float = 50, height: float = 50):
+        self.base64_string = base64_string
+        self.asset_hash = asset_hash
+        self.x_coordinate = x_coordinate
+        self.y_coordinate = y_coordinate
+        self.width = width
+        self.height = height
+
+    @classmethod
+    def from_payload(cls, entry: Mapping, path: str) -> Optional['IconElement']:
+        """Görüntüsü henüz yüklenmemiş ikon (assetHash ve base64String boş) çizilmez, None döner"""
+        icon = cls(
+            base64_string=_text(entry, 'base64String', '', path) or '',
+            asset_hash=_text(entry, 'assetHash', None, path) or None,
+            x_coordinate=_number(entry, 'x', 0, path),
+            y_coordinate=_number(entry, 'y', 0, path),
+            width=_number(entry, 'width', 50, path, minimum=0),
+            height=_number(entry, 'height', 50, path, minimum=0)
+        )
+        if not icon.asset_hash and not icon.base64_string:
+            return None
+        return icon
+
+    def to_payload(self) -> Dict[str, Any]:
+        payload = {'x': self.x_coordinate, 'y': self.y_coordinate, 'width': self.width, 'height': self.height}
+        if self.asset_hash:
+            payload['assetHash'] = self.asset_hash
+        else:
+            payload['base64String'] = self.base64_string
+        return payload
+
+class BarcodeElement(_Element):
+    """Etiketteki barkod ve isteğe bağlı altındaki metin"""
+
+    __slots__ = ('data', 'x_coordinate', 'y_coordinate', 'width', 'height', 'format',
+                 'text_alignment', 'text_font_size', 'text_font_family')
+
+    def __init__(self, data: str = '', x_coordinate: float = 10, y_coordinate: float = 10,
+                 width: float = 50, height: float = 20, format: str = 'CODE_39',
+                 text_alignment: str = 'none', text_font_size: float = 8, text_font_family: str = 'Arial'):
+        self.data = data
+        self.x_coordinate = x_coordinate
+        self.y_coordinate = y_coordinate
+        self.width = width
+        self.height = height
+        self.format = format
+        self.text_alignment = text_alignment
+        self.text_font_size = text_font_size
+        self.text_font_family = text_font_family
+
+    @classmethod
+    def from_payload(cls, entry: Mapping, path: str) -> 'BarcodeElement':
+        return cls(
+            data=_text(entry, 'barcodeData', '', path) or '',
+            x_coordinate=_number(entry, 'x', 10, path),
+            y_coordinate=_number(entry, 'y', 10, path),
+            width=_number(entry, 'width', 50, path, minimum=0),
+            height=_number(entry, 'height', 20, path, minimum=0),
+            format=_text(entry, 'barcodeFormat', 'CODE_39', path) or 'CODE_39',
+            text_alignment=_text(entry, 'textAlignment', 'none', path) or 'none',
+            text_font_size=_number(entry, 'textFontSize', 8, path, minimum=0, maximum=MAX_FONT_SIZE_MM),
+            text_font_family=_text(entry, 'textFontFamily', 'Arial', path) or 'Arial'
+        )
+
+    def to_payload(self) -> Dict[str, Any]:
+        return {'barcodeData': self.data, 'x': self.x_coordinate, 'y': self.y_coordinate,
+                'width': self.width, 'height': self.height, 'barcodeFormat': self.format,
+                'textAlignment': self.text_alignment, 'textFontSize': self.text_font_size,
+                'textFontFamily': self.text_font_family}
+
+def _entries(data: Mapping, key: str, element_type, required: bool = False) -> Tuple:
+    entries = data.get(key)
+    if entries is None:
+        if required:
+            raise PayloadError(f"'{key}' is required")
+        return ()
+    if not isinstance(entries, list):
+        raise PayloadError(f"'{key}' must be a list")
+    elements = []
+    for index, entry in enumerate(entries):
+        path = f'{key}[{index}]'
+        if not isinstance(entry, Mapping):
+            raise PayloadError(f"'{path}' must be an object")
+        element = element_type.from_payload(entry, path)
+        # Boş girdiler (ör. görüntüsü yüklenmemiş ikon) atlanır
+        if element is not None:
+            elements.append(element)
+    return tuple(elements)
+
+@dataclass(frozen=True)
+class LabelElements:
+    """Etiket varyantları arasında paylaşılan, değişmez çizim elemanları"""
+    texts: Tuple[TextElement, ...] = ()
+    icons: Tuple[IconElement, ...] = ()
+    barcodes: Tuple[BarcodeElement, ...] = ()
+    # Elemanlar bir şablondan doldurulduysa şablon varyantı (derlenmiş planları taşır); içeriğe dahil değildir
+    variant: Optional[Any] = field(default=None, compare=False, repr=False)
+
+    @classmethod
+    def from_payload(cls, data: Any, require_texts: bool = False) -> 'LabelElements':
+        """İstek gövdesini (textEntries, iconEntries, barcodeEntries) tek geçişte doğrula ve çevir"""
+        if not isinstance(data, Mapping):
+            raise PayloadError('Invalid input data')
+        return cls(
+            texts=_entries(data, 'textEntries', TextElement, required=require_texts),
+            icons=_entries(data, 'iconEntries', IconElement),
+            barcodes=_entries(data, 'barcodeEntries', BarcodeElement)
+        )
+
+    def to_payload(self) -> Dict[str, Any]:
+        """from_payload ile tekrar okunabilen istek gövdesi (ör. yazdırma günlüğünde saklamak için)"""
+        return {
+            'textEntries': [text.to_payload() for text in self.texts],
+            'iconEntries': [icon.to_payload() for icon in self.icons],
+            'barcodeEntries': [barcode.to_payload() for barcode in self.barcodes]
+        }
+
+    def content_key(self) -> str:
+        """Yerleşim ve verinin özeti; aynı etiketi basan işler aynı özeti verir"""
+        content = [[element.to_dict() for element in elements] for elements in (self.texts, self.icons, self.barcodes)]
+        return hashlib.sha1(json.dumps(content, sort_keys=True, separators=(',', ':')).encode('utf-8')).hexdigest()
+
+    def for_role(self, role: str) -> 'LabelElements':
+        """Rolün elemanları (iki rol aynı elemanları kullanır)"""
+        return self
+
+@dataclass(frozen=True)
+class LabelVariants:
+    """Şablonun rol başına (bluetooth/carton) farklı varyantlarından doldurulmuş etiket elemanları"""
+    roles: Mapping[str, LabelElements]
+
+    @classmethod
+    def from_payload(cls, data: Any) -> 'LabelVariants':
+        variants = data.get('variants') if isinstance(data, Mapping) else None
+        if not isinstance(variants, Mapping) or not variants:
+            raise PayloadError("'variants' must be a non-empty object")
+        return cls({role: LabelElements.from_payload(elements) for role, elements in variants.items()})
+
+    def to_payload(self) -> Dict[str, Any]:
+        return {'variants': {role: elements.to_payload() for role, elements in self.roles.items()}}
+
+    def content_key(self) -> str:
+        keys = [f'{role}:{elements.content_key()}' for role, elements in sorted(self.roles.items())]
+        return hashlib.sha1('|'.join(keys).encode('utf-8')).hexdigest()
+
+    def for_role(self, role: str) -> LabelElements:
+        return self.roles[role]
+
+def parse_label_payload(data: Any) -> Union[LabelElements, LabelVariants]:
+    """to_payload ile saklanmış elemanları (tek yerleşim veya rol varyantları) geri oku"""
+    if isinstance(data, Mapping) and 'variants' in data:
+        return LabelVariants.from_payload(data)
+    return LabelElements.from_payload(data)
 
 # Additional DTOs
 @dataclass
@@ -24,21 +24,12 @@ function App() {
 
   const loadDataFromDatabase = async () => {
     try {
-      // Text items'ları yükle
-      const textResponse = await axios.get('/api/label/input-items');
-      setTextEntries(textResponse.data);
-
-      // Icon items'ları yükle
-      const iconResponse = await axios.get('/api/label/icon-items');
-      setIconEntries(iconResponse.data);
-
-      // Barcode items'ları yükle
-      const barcodeResponse = await axios.get('/api/label/barcode-items');
-      setBarcodeEntries(barcodeResponse.data);
-
-      // Label settings'leri yükle
-      const settingsResponse = await axios.get('/api/label/label-settings');
-      setLabelSettings(settingsResponse.data);
+      // Tüm yerleşimi tek istekte yükle
+      const layoutResponse = await axios.get('/api/label/layout');
+      setTextEntries(layoutResponse.data.textEntries);
+      setIconEntries(layoutResponse.data.iconEntries);
+      setBarcodeEntries(layoutResponse.data.barcodeEntries);
+      setLabelSettings(layoutResponse.data.labelSettings);
 
       toast.success('Veriler başarıyla yüklendi!');
     } catch (error) {
@@ -86,7 +77,7 @@ function App() {
       y: 50,
       width: 50,
       height: 50,
-      base64String: ''
+      assetHash: null
     };
     setIconEntries(prev => [...prev, newEntry]);
     toast.success('Yeni ikon alanı eklendi!');
@@ -99,11 +90,18 @@ function App() {
 
   const handleIconFileUpload = (id, file) => {
     const reader = new FileReader();
-    reader.onload = (e) => {
+    reader.onload = async (e) => {
       const base64 = e.target.result.split(',')[1];
-      setIconEntries(prev => prev.map(entry => 
-        entry.id === id ? { ...entry, base64String: base64 } : entry
-      ));
+      try {
+        // İkonu bir kez depoya yükle, sonraki isteklerde sadece özetini gönder
+        const response = await axios.post('/api/assets', { base64String: base64 });
+        setIconEntries(prev => prev.map(entry => 
+          entry.id === id ? { ...entry, assetHash: response.data.assetHash, base64String: '' } : entry
+        ));
+      } catch (error) {
+        console.error('Icon upload error:', error);
+        toast.error('İkon yüklenirken hata oluştu!');
+      }
     };
     reader.readAsDataURL(file);
   };
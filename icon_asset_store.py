@@ -0,0 +1,144 @@
+import base64
+import hashlib
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+
+def _guess_mime_type(data: bytes) -> str:
+    """İkon verisinin başlığından MIME tipini tahmin et"""
+    if data.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'image/png'
+    if data.startswith(b'\xff\xd8'):
+        return 'image/jpeg'
+    if data.startswith(b'GIF8'):
+        return 'image/gif'
+    if data.startswith(b'BM'):
+        return 'image/bmp'
+    return 'application/octet-stream'
+
+
+class IconAssetStore:
+    """İkonları içerik özetiyle (SHA-256) anahtarlanmış BLOB olarak saklar"""
+
+    def __init__(self, connection_factory: Callable[[], sqlite3.Connection], cache_size: int = 128):
+        self.logger = logging.getLogger(__name__)
+        self._connection_factory = connection_factory
+        self._cache_size = cache_size
+        self._cache: 'OrderedDict[str, Tuple[bytes, str]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._schema_ready = False
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def hash_bytes(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    def ensure_schema(self, conn: sqlite3.Connection):
+        """IconAsset tablosunu oluştur, eski Base64String kayıtlarını taşı"""
+        if self._schema_ready:
+            return
+        in_transaction = conn.in_transaction
+        if not in_transaction:
+            # Birden fazla worker süreci aynı anda taşımaya başlayabilir; yazma kilidini baştan al,
+            # kolon ve eski kayıt kontrolleri kilit alındıktan sonra yapılsın
+            conn.execute('BEGIN IMMEDIATE')
+        try:
+            self._migrate(conn)
+        except Exception:
+            if not in_transaction:
+                conn.rollback()
+            raise
+        if not in_transaction:
+            conn.commit()
+        self._schema_ready = True
+
+    def _migrate(self, conn: sqlite3.Connection):
+        """Tabloyu ve kolonu ekle, eski kayıtları taşı (çağıran yazma kilidini tutar)"""
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS "IconAsset" (
+                "Hash" TEXT NOT NULL CONSTRAINT "PK_IconAsset" PRIMARY KEY,
+                "Data" BLOB NOT NULL,
+                "MimeType" TEXT NOT NULL,
+                "Size" INTEGER NOT NULL
+            )
+        """)
+
+        columns = [row[1] for row in conn.execute('PRAGMA table_info("IconInfo")')]
+        if 'AssetHash' not in columns:
+            conn.execute('ALTER TABLE "IconInfo" ADD COLUMN "AssetHash" TEXT NULL')
+
+        # Base64 metin olarak saklanan ikonları BLOB deposuna taşı
+        legacy_rows = conn.execute(
+            "SELECT Id, Base64String FROM IconInfo WHERE Base64String IS NOT NULL AND Base64String != ''"
+        ).fetchall()
+        for icon_id, base64_string in legacy_rows:
+            asset_hash = self.put_base64(conn, base64_string)
+            conn.execute("UPDATE IconInfo SET AssetHash = ?, Base64String = '' WHERE Id = ?",
+                         (asset_hash, icon_id))
+        if legacy_rows:
+            self.logger.info(f"{len(legacy_rows)} ikon Base64String kolonundan IconAsset deposuna taşındı")
+
+    def put(self, conn: sqlite3.Connection, data: bytes) -> str:
+        """İkonu (yoksa) depoya ekle ve içerik özetini döndür"""
+        asset_hash = self.hash_bytes(data)
+        conn.execute(
+            'INSERT OR IGNORE INTO "IconAsset" ("Hash", "Data", "MimeType", "Size") VALUES (?, ?, ?, ?)',
+            (asset_hash, sqlite3.Binary(data), _guess_mime_type(data), len(data))
+        )
+        return asset_hash
+
+    def put_base64(self, conn: sqlite3.Connection, base64_string: str) -> str:
+        return self.put(conn, base64.b64decode(base64_string))
+
+    def store(self, data: bytes) -> str:
+        """Kendi bağlantısıyla ikonu depoya ekle"""
+        conn = self._connection_factory()
+        try:
+            self.ensure_schema(conn)
+            asset_hash = self.put(conn, data)
+            conn.commit()
+            return asset_hash
+        finally:
+            conn.close()
+
+    def get(self, asset_hash: str) -> Optional[Tuple[bytes, str]]:
+        """İkon verisini ve MIME tipini getir (LRU önbellekli)"""
+        with self._lock:
+            cached = self._cache.get(asset_hash)
+            if cached is not None:
+                self._cache.move_to_end(asset_hash)
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        conn = self._connection_factory()
+        try:
+            self.ensure_schema(conn)
+            row = conn.execute('SELECT "Data", "MimeType" FROM "IconAsset" WHERE "Hash" = ?',
+                               (asset_hash,)).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+
+        asset = (bytes(row[0]), row[1])
+        with self._lock:
+            self._cache[asset_hash] = asset
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return asset
+
+    def load_bytes(self, asset_hash: str) -> bytes:
+        """Çizim için ikon verisini getir"""
+        asset = self.get(asset_hash)
+        if asset is None:
+            raise KeyError(f"İkon bulunamadı: {asset_hash}")
+        return asset[0]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'entries': len(self._cache), 'hits': self.hits, 'misses': self.misses}
@@ -0,0 +1,92 @@
+import threading
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Hashable, Optional, TypeVar
+
+T = TypeVar('T')
+
+
+class _Batch:
+    """Aynı anahtarlı işlerin ortak sonucu"""
+
+    __slots__ = ('copies', 'started', 'ready', 'done', 'result', 'error')
+
+    def __init__(self):
+        self.copies = 1
+        # Başlamış işe kopya eklenemez (printer'a gönderilmiş olabilir)
+        self.started = False
+        self.ready = threading.Event()
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class JobCoalescer:
+    """Aynı anahtarlı bir iş yazdırılırken gelen aynı işleri, o iş bitince tek işte (N kopya) birleştirir
+
+    Bekleyen aynı iş yoksa iş hemen çalışır; gecikme yalnızca zaten aynı etiketi basan bir iş varken oluşur.
+    """
+
+    def __init__(self, max_copies: int = 100):
+        self.max_copies = max_copies
+        # Anahtar başına sıradaki işler; ilki yazdırılmakta olan iştir
+        self._queues: Dict[Hashable, Deque[_Batch]] = {}
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.executed = 0
+
+    def submit(self, key: Hashable, execute: Callable[[int], T]) -> T:
+        """İşi gönder; işi başlatan execute(kopya sayısı) çağırır, birleştirilen her gönderen aynı sonucu alır"""
+        with self._lock:
+            self.submitted += 1
+            queue = self._queues.get(key)
+            if queue is None:
+                batch = _Batch()
+                batch.ready.set()
+                self._queues[key] = deque([batch])
+                leader = True
+            elif not queue[-1].started and queue[-1].copies < self.max_copies:
+                batch = queue[-1]
+                batch.copies += 1
+                leader = False
+            else:
+                batch = _Batch()
+                queue.append(batch)
+                leader = True
+
+        if not leader:
+            batch.done.wait()
+            if batch.error is not None:
+                raise batch.error
+            return batch.result
+
+        # Aynı etiketin önceki işi bitene kadar bekle; bu sırada gelenler bu işe kopya olarak eklenir
+        batch.ready.wait()
+        with self._lock:
+            batch.started = True
+            copies = batch.copies
+            self.executed += 1
+
+        try:
+            batch.result = execute(copies)
+            return batch.result
+        except BaseException as e:
+            batch.error = e
+            raise
+        finally:
+            with self._lock:
+                queue = self._queues[key]
+                queue.popleft()
+                if queue:
+                    queue[0].ready.set()
+                else:
+                    del self._queues[key]
+            batch.done.set()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'submitted': self.submitted,
+                'executed': self.executed,
+                'in_flight': len(self._queues),
+                'pending': sum(len(queue) - 1 for queue in self._queues.values())
+            }
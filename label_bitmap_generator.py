@@ -1,230 +1,193 @@
 from PIL import Image, ImageDraw, ImageFont
 import qrcode
-from typing import List, Dict, Any, Tuple
+from typing import TYPE_CHECKING, List, Dict, Any, Tuple, Callable, Optional, Hashable, Sequence
 import logging
 import os
-import sys
+
+import packed_raster
+from logging_setup import PER_LABEL
+from layout_compiler import LayoutCompiler, RenderPlan, TextSlot, BarcodeSlot, TextSpriteCache, sanitize_text
+from packed_raster import PackedRaster
+
+if TYPE_CHECKING:
+    from dto import BarcodeElement, IconElement, TextElement
 
 class LabelBitmapGenerator:
-    def __init__(self):
-        # Logger'ı UTF-8 encoding ile yapılandır
+    def __init__(self, asset_loader: Optional[Callable[[str], bytes]] = None,
+                 text_sprite_cache_size: int = 2048, use_packed_raster: bool = True):
+        # Kayıtlar root logger'daki kuyruk üzerinden yazılır (logging_setup)
         self.logger = logging.getLogger(__name__)
         
-        # Eğer handler yoksa ekle
-        if not self.logger.handlers:
-            handler = logging.StreamHandler(sys.stdout)
-            handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
-            self.logger.addHandler(handler)
-            self.logger.setLevel(logging.INFO)
+        # Yerleşim derleyicisi; ikonlar içerik özetiyle asset_loader üzerinden gelir
+        self.compiler = LayoutCompiler(asset_loader)
         
-        self.mm_to_inches = 0.0393701
+        # Sabit başlıklar ("Model:", "Voltage:") her etikette yeniden çizilmez
+        self.text_sprites = TextSpriteCache(text_sprite_cache_size)
+        
+        # NumPy varsa etiket doğrudan printer'ın paketlenmiş 1-bit düzeninde birleştirilir
+        self.use_packed_raster = use_packed_raster and packed_raster.available()
+        if use_packed_raster and not self.use_packed_raster:
+            self.logger.warning("NumPy yüklü değil; etiketler paketlenmiş raster yerine Pillow ile birleştiriliyor")
     
-    def generate_label(self, file_path: str, texts: List[Dict], icons: List[Dict], 
-                      barcodes: List[Dict], is_bluetooth_label: bool, settings: Dict[str, Any]):
+    def generate_label(self, file_path: str, texts: Sequence['TextElement'], icons: Sequence['IconElement'], 
+                      barcodes: Sequence['BarcodeElement'], is_bluetooth_label: bool, settings: Dict[str, Any],
+                      layout_key: Optional[Hashable] = None, dpi: Optional[int] = None,
+                      plans: Optional[Dict[Hashable, RenderPlan]] = None):
         """Etiket bitmap'ini oluştur"""
+        monochrome_bitmap = self.generate_image(texts, icons, barcodes, is_bluetooth_label, settings,
+                                                layout_key, dpi, plans)
+        return self._save_bitmap(monochrome_bitmap, file_path)
+    
+    def generate_image(self, texts: Sequence['TextElement'], icons: Sequence['IconElement'],
+                       barcodes: Sequence['BarcodeElement'],
+                       is_bluetooth_label: bool, settings: Dict[str, Any],
+                       layout_key: Optional[Hashable] = None,
+                       dpi: Optional[int] = None,
+                       plans: Optional[Dict[Hashable, RenderPlan]] = None) -> Optional[Any]:
+        """Etiketi dosyaya yazmadan monokrom görüntü (PackedRaster veya Pillow '1' görüntüsü) olarak üret"""
+        try:
+            # Yerleşimi derle (aynı yerleşim ve DPI için önbellekten gelir)
+            plan = self.compiler.compile(texts, icons, barcodes, is_bluetooth_label, settings, layout_key, dpi, plans)
+        except Exception as e:
+            self.logger.error(f"Bitmap oluşturma sırasında hata: {e}")
+            return None
+        
+        return self.render_image(
+            plan,
+            text_values=[text.content for text in texts],
+            barcode_values=[barcode.data for barcode in barcodes]
+        )
+    
+    def render_plan(self, file_path: str, plan: RenderPlan,
+                    text_values: Optional[List[str]] = None,
+                    barcode_values: Optional[List[str]] = None):
+        """Derlenmiş plandaki değişken alanları doldurarak etiketi çiz ve BMP olarak kaydet"""
+        return self._save_bitmap(self.render_image(plan, text_values, barcode_values), file_path)
+    
+    def _save_bitmap(self, monochrome_bitmap: Optional[Any], file_path: str):
+        if monochrome_bitmap is None:
+            return False
+        
+        try:
+            monochrome_bitmap.save(file_path, 'BMP')
+            self.logger.info(f"Etiket bitmap'i oluşturuldu: {file_path}", extra=PER_LABEL)
+            return True
+        except Exception as e:
+            self.logger.error(f"Bitmap oluşturma sırasında hata: {e}")
+            return False
+    
+    def render_image(self, plan: RenderPlan,
+                     text_values: Optional[List[str]] = None,
+                     barcode_values: Optional[List[str]] = None) -> Optional[Any]:
+        """Derlenmiş plandaki değişken alanları doldurarak monokrom etiket görüntüsü üret"""
         try:
-            # Label boyutlarını belirle
-            if is_bluetooth_label:
-                label_width = settings['bluetooth_label_width']
-                label_height = settings['bluetooth_label_height']
+            # Bitmap oluştur (NumPy varsa paketlenmiş raster, yoksa Pillow RGB görüntüsü)
+            if self.use_packed_raster:
+                bitmap = PackedRaster(plan.width, plan.height)
             else:
-                label_width = settings['carton_label_width']
-                label_height = settings['carton_label_height']
-            
-            dpi = settings['dpi']
-            
-            # Piksel boyutlarını hesapla
-            width_in_pixels = int(label_width * self.mm_to_inches * dpi)
-            height_in_pixels = int(label_height * self.mm_to_inches * dpi)
-            
-            # Bitmap oluştur
-            bitmap = Image.new('RGB', (width_in_pixels, height_in_pixels), 'white')
-            draw = ImageDraw.Draw(bitmap)
+                bitmap = Image.new('RGB', (plan.width, plan.height), 'white')
             
             # Barkodları çiz
-            for barcode in barcodes:
-                if barcode.get('data'):
-                    self._draw_barcode(draw, barcode, dpi)
+            for index, slot in enumerate(plan.barcode_slots):
+                data = barcode_values[index] if barcode_values is not None else slot.default_data
+                if data:
+                    self._draw_barcode(bitmap, slot, data)
+                    
+                    # Metin ekle (eğer belirtilmişse)
+                    if slot.text_alignment != 'none':
+                        self._draw_barcode_text(bitmap, plan, slot, data)
             
             # İkonları çiz
-            for icon in icons:
-                self._draw_icon(draw, icon, dpi)
+            for layer in plan.icon_layers:
+                self._paste_mask(bitmap, layer.x, layer.y, layer.mask, layer.packed)
             
             # Metinleri çiz
-            for text in texts:
-                self._draw_text(draw, text, dpi)
-            
-            # Monokrom bitmap'e dönüştür ve kaydet
-            monochrome_bitmap = self._convert_to_monochrome(bitmap)
-            monochrome_bitmap.save(file_path, 'BMP')
+            for index, slot in enumerate(plan.text_slots):
+                if text_values is not None:
+                    self._draw_text(bitmap, plan, slot, text_values[index])
+                else:
+                    self._paste_text(bitmap, plan, slot.x, slot.y, slot.default_text, slot.font, slot.font_size)
             
-            self.logger.info(f"Etiket bitmap'i oluşturuldu: {file_path}")
-            return True
+            # Monokrom bitmap'e dönüştür (paketlenmiş raster zaten printer düzenindedir)
+            if isinstance(bitmap, PackedRaster):
+                return bitmap.finish()
+            return self._convert_to_monochrome(bitmap)
             
         except Exception as e:
             self.logger.error(f"Bitmap oluşturma sırasında hata: {e}")
-            return False
+            return None
     
-    def _draw_barcode(self, draw: ImageDraw.Draw, barcode: Dict, dpi: int):
+    def _draw_barcode(self, bitmap: Any, slot: BarcodeSlot, data: str):
         """Barkod çiz"""
         try:
-            # Barkod formatını belirle
-            barcode_format = barcode.get('format', 'CODE_39')
-            
             # QR kod oluştur
             qr = qrcode.QRCode(
                 version=1,
                 error_correction=qrcode.constants.ERROR_CORRECT_L,
-                box_size=10,
+                box_size=1,
                 border=4,
             )
-            qr.add_data(barcode['data'])
+            qr.add_data(data)
             qr.make(fit=True)
             
-            # QR kod bitmap'ini oluştur
-            qr_image = qr.make_image(fill_color="black", back_color="white")
-            
-            # Boyutları hesapla
-            x_coord = int(barcode['x_coordinate'] * self.mm_to_inches * dpi)
-            y_coord = int(barcode['y_coordinate'] * self.mm_to_inches * dpi)
-            width = int(barcode['width'] * self.mm_to_inches * dpi)
-            height = int(barcode['height'] * self.mm_to_inches * dpi)
-            
-            # QR kodu yeniden boyutlandır ve yerleştir
-            qr_image = qr_image.resize((width, height))
-            draw.bitmap((x_coord, y_coord), qr_image)
-            
-            # Metin ekle (eğer belirtilmişse)
-            if barcode.get('text_alignment') != 'none':
-                self._draw_barcode_text(draw, barcode, dpi)
+            # Modül genişliğini printer'ın nokta ızgarasına oturt: her modül tam sayı nokta olur,
+            # ölçeklemede oluşan eşit olmayan modüller okunabilirliği bozmaz
+            modules = qr.modules_count + 2 * qr.border
+            qr.box_size = max(1, min(slot.width, slot.height) // modules)
+            size = modules * qr.box_size
+            x = slot.x + (slot.width - size) // 2
+            y = slot.y + (slot.height - size) // 2
+            
+            # QR kodu alanın ortasına yerleştir
+            if isinstance(bitmap, PackedRaster):
+                bitmap.blit_modules(x, y, qr.get_matrix(), qr.box_size)
+            else:
+                # (draw.bitmap '1' görüntüyü maske olarak kullanıp beyaz boyadığından yapıştırılır)
+                bitmap.paste(qr.make_image(fill_color="black", back_color="white").get_image(), (x, y))
                 
         except Exception as e:
             self.logger.error(f"Barkod çizme sırasında hata: {e}")
     
-    def _draw_barcode_text(self, draw: ImageDraw.Draw, barcode: Dict, dpi: int):
+    def _draw_barcode_text(self, bitmap: Any, plan: RenderPlan, slot: BarcodeSlot, data: str):
         """Barkod metnini çiz"""
         try:
-            font_size = int(barcode.get('text_font_size', 12) * self.mm_to_inches * dpi)
-            font_family = barcode.get('text_font_family', 'Arial')
-            
-            # Font oluştur - Türkçe karakterleri destekleyen font kullan
-            font = None
-            try:
-                font = ImageFont.truetype("arial.ttf", font_size)
-            except:
-                try:
-                    font = ImageFont.truetype("C:/Windows/Fonts/arial.ttf", font_size)
-                except:
-                    try:
-                        font = ImageFont.truetype("C:/Windows/Fonts/calibri.ttf", font_size)
-                    except:
-                        font = ImageFont.load_default()
-            
-            text = barcode['data']
             # Türkçe karakterleri güvenli hale getir
-            safe_text = self._sanitize_text(text)
-            
-            text_bbox = draw.textbbox((0, 0), safe_text, font=font)
-            text_width = text_bbox[2] - text_bbox[0]
-            text_height = text_bbox[3] - text_bbox[1]
-            
-            # Metin pozisyonunu hesapla
-            x_coord = int(barcode['x_coordinate'] * self.mm_to_inches * dpi)
-            y_coord = int(barcode['y_coordinate'] * self.mm_to_inches * dpi)
-            barcode_height = int(barcode['height'] * self.mm_to_inches * dpi)
+            safe_text = sanitize_text(data, plan.ascii_only)
             
             # Metni barkodun altına yerleştir
-            text_x = x_coord
-            text_y = y_coord + barcode_height + 5
-            
-            draw.text((text_x, text_y), safe_text, fill='black', font=font)
+            self._paste_text(bitmap, plan, slot.x, slot.y + slot.height + 5,
+                             safe_text, slot.text_font, slot.text_font_size)
             
         except Exception as e:
             self.logger.error(f"Barkod metni çizme sırasında hata: {e}")
     
-    def _draw_icon(self, draw: ImageDraw.Draw, icon: Dict, dpi: int):
-        """İkon çiz"""
-        try:
-            # Base64 string'den image oluştur
-            import base64
-            from io import BytesIO
-            
-            icon_data = base64.b64decode(icon['base64_string'])
-            icon_image = Image.open(BytesIO(icon_data))
-            
-            # Boyutları hesapla
-            x_coord = int(icon['x_coordinate'] * self.mm_to_inches * dpi)
-            y_coord = int(icon['y_coordinate'] * self.mm_to_inches * dpi)
-            width = int(icon['width'] * self.mm_to_inches * dpi)
-            height = int(icon['height'] * self.mm_to_inches * dpi)
-            
-            # İkonu yeniden boyutlandır ve yerleştir
-            icon_image = icon_image.resize((width, height))
-            draw.bitmap((x_coord, y_coord), icon_image)
-            
-        except Exception as e:
-            self.logger.error(f"İkon çizme sırasında hata: {e}")
-    
-    def _draw_text(self, draw: ImageDraw.Draw, text: Dict, dpi: int):
+    def _draw_text(self, bitmap: Any, plan: RenderPlan, slot: TextSlot, content: str):
         """Metin çiz"""
         try:
-            font_size = int(text.get('font_size', 12) * self.mm_to_inches * dpi)
-            font_family = text.get('font_family', 'Arial')
-            
-            # Font oluştur - Türkçe karakterleri destekleyen font kullan
-            font = None
-            try:
-                # Önce Arial font'unu dene
-                font = ImageFont.truetype("arial.ttf", font_size)
-            except:
-                try:
-                    # DejaVu Sans font'unu dene (Linux'ta yaygın)
-                    font = ImageFont.truetype("DejaVuSans.ttf", font_size)
-                except:
-                    try:
-                        # Windows'ta yaygın olan font'ları dene
-                        font = ImageFont.truetype("C:/Windows/Fonts/arial.ttf", font_size)
-                    except:
-                        try:
-                            font = ImageFont.truetype("C:/Windows/Fonts/calibri.ttf", font_size)
-                        except:
-                            # Hiçbiri bulunamazsa default font kullan
-                            font = ImageFont.load_default()
-            
-            # Pozisyonu hesapla
-            x_coord = int(text['x_coordinate'] * self.mm_to_inches * dpi)
-            y_coord = int(text['y_coordinate'] * self.mm_to_inches * dpi)
-            
             # Türkçe karakterleri güvenli hale getir
-            safe_text = self._sanitize_text(text['content'])
+            safe_text = sanitize_text(content, plan.ascii_only)
             
             # Metni çiz
-            draw.text((x_coord, y_coord), safe_text, fill='black', font=font)
+            self._paste_text(bitmap, plan, slot.x, slot.y, safe_text, slot.font, slot.font_size)
             
         except Exception as e:
             self.logger.error(f"Metin çizme sırasında hata: {e}")
     
-    def _sanitize_text(self, text: str) -> str:
-        """Türkçe karakterleri güvenli hale getir"""
-        try:
-            # Türkçe karakterleri ASCII karşılıklarıyla değiştir
-            turkish_chars = {
-                'ç': 'c', 'Ç': 'C',
-                'ğ': 'g', 'Ğ': 'G',
-                'ı': 'i', 'I': 'I',
-                'ö': 'o', 'Ö': 'O',
-                'ş': 's', 'Ş': 'S',
-                'ü': 'u', 'Ü': 'U'
-            }
-            
-            sanitized_text = text
-            for turkish_char, ascii_char in turkish_chars.items():
-                sanitized_text = sanitized_text.replace(turkish_char, ascii_char)
-            
-            return sanitized_text
-        except Exception as e:
-            self.logger.warning(f"Metin temizleme sırasında hata: {e}")
-            return text
+    def _paste_text(self, bitmap: Any, plan: RenderPlan, x: int, y: int,
+                    text: str, font: Any, font_size: int):
+        """Önbellekteki metin sprite'ını siyah olarak bitmap'e bas"""
+        sprite = self.text_sprites.get(text, font, font_size, plan.dpi)
+        if sprite.mask is None:
+            return
+        self._paste_mask(bitmap, x + sprite.left, y + sprite.top, sprite.mask, sprite.packed)
+    
+    @staticmethod
+    def _paste_mask(bitmap: Any, x: int, y: int, mask: Image.Image, packed: bytes):
+        """1-bit maskenin siyah piksellerini bitmap'e bas"""
+        if isinstance(bitmap, PackedRaster):
+            bitmap.blit(x, y, packed, mask.width)
+        else:
+            bitmap.paste('black', (x, y, x + mask.width, y + mask.height), mask)
     
     def _convert_to_monochrome(self, image: Image.Image) -> Image.Image:
         """RGB bitmap'i monokrom bitmap'e dönüştür"""
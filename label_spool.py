@@ -0,0 +1,241 @@
+import glob
+import hashlib
+import json
+import logging
+import mmap
+import os
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from printer_lock import PrinterLock
+
+
+class SpoolEntry:
+    """Spool'daki tek bir paketlenmiş 1-bit raster (veri mmap üzerinden okunur)"""
+
+    __slots__ = ('record_id', 'content_hash', 'role', 'dpi', 'width', 'height', 'row_bytes', 'segment', 'offset', 'length',
+                 'label_size', 'data')
+
+    def __init__(self, record_id: Optional[str], content_hash: str, role: str, dpi: int, width: int, height: int,
+                 row_bytes: int, segment: int, offset: int, length: int,
+                 label_size: Optional[Sequence[float]] = None):
+        self.record_id = record_id
+        self.content_hash = content_hash
+        self.role = role
+        self.dpi = dpi
+        self.width = width
+        self.height = height
+        self.row_bytes = row_bytes
+        self.segment = segment
+        self.offset = offset
+        self.length = length
+        # Etiket boyutu (mm) şablon varyantından geldiyse; printer'a SIZE olarak gönderilir
+        self.label_size: Optional[Tuple[float, float]] = tuple(label_size) if label_size else None
+        self.data: Optional[memoryview] = None
+
+    def to_index(self) -> Dict:
+        return {
+            'record_id': self.record_id,
+            'content_hash': self.content_hash,
+            'role': self.role,
+            'dpi': self.dpi,
+            'width': self.width,
+            'height': self.height,
+            'row_bytes': self.row_bytes,
+            'offset': self.offset,
+            'length': self.length,
+            'label_size': self.label_size
+        }
+
+    def tspl_header(self, x: int = 0, y: int = 0) -> bytes:
+        """TSPL BITMAP komutunun başlığı; ardından raster verisi olduğu gibi gönderilir"""
+        return f"BITMAP {x},{y},{self.row_bytes},{self.height},0,".encode('ascii')
+
+
+class LabelSpool:
+    """Çizilmiş etiketleri boyuta göre dönen, bellek eşlemeli spool dosyalarında saklar
+
+    Aynı spool dizinini birden çok worker süreci paylaşabilir: eklemeler süreçler arası dosya kilidiyle
+    sıraya girer, başka süreçlerin eklediği kayıtlar bulunamayan etikette index dosyalarından okunur.
+    """
+
+    def __init__(self, spool_dir: str = 'spool', max_segment_size: int = 64 * 1024 * 1024,
+                 max_segments: int = 8, lock_timeout: float = 30.0):
+        self.logger = logging.getLogger(__name__)
+        self.spool_dir = spool_dir
+        self.max_segment_size = max_segment_size
+        self.max_segments = max_segments
+        self._lock = threading.Lock()
+        # Segment sonu ve dönüş kararı tüm süreçlerde aynı olmalı
+        self._file_lock = PrinterLock('spool', lock_dir=spool_dir, timeout=lock_timeout)
+        self._by_record: Dict[Tuple[str, str, int], SpoolEntry] = {}
+        self._by_hash: Dict[Tuple[str, str, int], SpoolEntry] = {}
+        self._maps: Dict[int, Tuple[int, mmap.mmap]] = {}
+        # Segment başına index dosyasının okunmuş kısmı (bayt)
+        self._index_positions: Dict[int, int] = {}
+        self._segments: List[int] = [0]
+        os.makedirs(spool_dir, exist_ok=True)
+        self._refresh()
+
+    def _data_path(self, segment: int) -> str:
+        return os.path.join(self.spool_dir, f"spool_{segment:06d}.bin")
+
+    def _index_path(self, segment: int) -> str:
+        return os.path.join(self.spool_dir, f"spool_{segment:06d}.idx")
+
+    def _refresh(self):
+        """Diskteki segmentlerle eşitle: diğer süreçlerin eklediği index satırlarını oku, silinmiş segmentleri bırak"""
+        on_disk = sorted(
+            int(os.path.basename(path)[len('spool_'):-len('.bin')])
+            for path in glob.glob(os.path.join(self.spool_dir, 'spool_*.bin'))
+        )
+        for segment in self._segments:
+            if segment not in on_disk:
+                self._forget(segment)
+        self._segments = on_disk or [self._segments[-1]]
+        for segment in on_disk:
+            self._load_index(segment)
+
+    def _load_index(self, segment: int):
+        """Segment index'inin henüz okunmamış satırlarını oku; veri dosyasında tamamlanmamış kayıtları yok say"""
+        position = self._index_positions.get(segment, 0)
+        try:
+            with open(self._index_path(segment), 'rb') as f:
+                f.seek(position)
+                chunk = f.read()
+            data_size = os.path.getsize(self._data_path(segment))
+        except FileNotFoundError:
+            return
+        # Başka süreçte yazılmakta olan son satır bir sonraki okumaya kalır
+        end = chunk.rfind(b'\n') + 1
+        self._index_positions[segment] = position + end
+        for line in chunk[:end].splitlines():
+            try:
+                item = json.loads(line)
+            except ValueError:
+                continue
+            if item['offset'] + item['length'] > data_size:
+                continue
+            self._register(SpoolEntry(segment=segment, **item))
+
+    def _register(self, entry: SpoolEntry):
+        if entry.record_id:
+            self._by_record[(entry.record_id, entry.role, entry.dpi)] = entry
+        self._by_hash[(entry.content_hash, entry.role, entry.dpi)] = entry
+
+    def _forget(self, segment: int):
+        """Segmentin eşlemesini ve kayıtlarını bellekten çıkar"""
+        self._maps.pop(segment, None)
+        self._index_positions.pop(segment, None)
+        for key, entry in list(self._by_record.items()):
+            if entry.segment == segment:
+                del self._by_record[key]
+        for key, entry in list(self._by_hash.items()):
+            if entry.segment == segment:
+                del self._by_hash[key]
+
+    def _rotate(self):
+        """Yeni segmente geç, en eski segmentleri sil"""
+        self._segments.append(self._segments[-1] + 1)
+        while len(self._segments) > self.max_segments:
+            oldest = self._segments.pop(0)
+            self._forget(oldest)
+            for path in (self._data_path(oldest), self._index_path(oldest)):
+                try:
+                    if os.path.exists(path):
+                        os.unlink(path)
+                except OSError as e:
+                    # Windows'ta hâlâ eşlenmiş dosya silinemez; bir sonraki dönüşte tekrar denenmez
+                    self.logger.warning(f"Spool dosyası silinemedi ({path}): {e}")
+            self.logger.info(f"Spool segmenti silindi: {oldest}")
+
+    def append(self, raster: bytes, width: int, height: int, role: str, dpi: int,
+               record_id: Optional[str] = None, label_size: Optional[Tuple[float, float]] = None) -> SpoolEntry:
+        """Paketlenmiş 1-bit raster'ı spool'a ekle (aynı içerik zaten varsa tekrar yazma)"""
+        content_hash = hashlib.sha1(raster).hexdigest()
+        row_bytes = (width + 7) // 8
+
+        with self._file_lock, self._lock:
+            # Diğer süreçlerin eklemeleri ve segment dönüşleri görülmeden dosya sonu bilinemez
+            self._refresh()
+            existing = self._by_hash.get((content_hash, role, dpi))
+            if existing is not None:
+                if record_id and existing.record_id != record_id or existing.label_size != label_size:
+                    alias = SpoolEntry(record_id, content_hash, role, dpi, width, height, row_bytes,
+                                       existing.segment, existing.offset, existing.length, label_size)
+                    self._write_index(alias)
+                    self._register(alias)
+                    return alias
+                return existing
+
+            segment = self._segments[-1]
+            data_path = self._data_path(segment)
+            offset = os.path.getsize(data_path) if os.path.exists(data_path) else 0
+            if offset and offset + len(raster) > self.max_segment_size:
+                self._rotate()
+                segment = self._segments[-1]
+                data_path = self._data_path(segment)
+                offset = 0
+
+            with open(data_path, 'ab') as f:
+                f.write(raster)
+
+            entry = SpoolEntry(record_id, content_hash, role, dpi, width, height, row_bytes,
+                               segment, offset, len(raster), label_size)
+            # Index satırı veriden sonra yazılır; yarım kalan ekleme okunurken yok sayılır
+            self._write_index(entry)
+            self._register(entry)
+            return entry
+
+    def _write_index(self, entry: SpoolEntry):
+        with open(self._index_path(entry.segment), 'ab') as f:
+            # Çökmüş bir eklemenin yarım satırına eklenmez
+            separator = b'\n' if f.tell() > self._index_positions.get(entry.segment, 0) else b''
+            f.write(separator + json.dumps(entry.to_index()).encode('utf-8') + b'\n')
+            # Kendi satırımız tekrar okunmaz (kilit altında dosya sonu bizim yazdığımız yerdir)
+            self._index_positions[entry.segment] = f.tell()
+
+    def _map_segment(self, segment: int, min_size: int) -> mmap.mmap:
+        """Segmenti bellek eşle; dosya büyüdüyse eşlemeyi yenile"""
+        cached = self._maps.get(segment)
+        if cached is not None and cached[0] >= min_size:
+            return cached[1]
+        # Eski eşleme üzerinde hâlâ görünümler olabilir; referansı bırakmak yeterli
+        with open(self._data_path(segment), 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            # ACCESS_COPY: ctypes tamponu olarak kopyalamadan verilebilir, dosyaya yazılmaz
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        self._maps[segment] = (size, mapped)
+        return mapped
+
+    def get(self, role: str, dpi: int, record_id: Optional[str] = None,
+            content_hash: Optional[str] = None) -> Optional[SpoolEntry]:
+        """Kayıt numarası veya içerik özetiyle raster'ı getir; veri mmap üzerinde bir görünümdür"""
+        with self._lock:
+            entry = self._find(role, dpi, record_id, content_hash)
+            if entry is None:
+                # Etiket başka bir worker sürecinde çizilmiş olabilir
+                self._refresh()
+                entry = self._find(role, dpi, record_id, content_hash)
+                if entry is None:
+                    return None
+            try:
+                mapped = self._map_segment(entry.segment, entry.offset + entry.length)
+            except FileNotFoundError:
+                # Segment başka bir süreçte döndürülüp silinmiş
+                self._forget(entry.segment)
+                return None
+            result = SpoolEntry(entry.record_id, entry.content_hash, entry.role, entry.dpi, entry.width, entry.height,
+                                entry.row_bytes, entry.segment, entry.offset, entry.length, entry.label_size)
+            result.data = memoryview(mapped)[entry.offset:entry.offset + entry.length]
+            return result
+
+    def _find(self, role: str, dpi: int, record_id: Optional[str],
+              content_hash: Optional[str]) -> Optional[SpoolEntry]:
+        if record_id:
+            return self._by_record.get((record_id, role, dpi))
+        return self._by_hash.get((content_hash, role, dpi))
+
+    def close(self):
+        with self._lock:
+            self._maps.clear()
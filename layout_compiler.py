@@ -0,0 +1,325 @@
+import base64
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from io import BytesIO
+from typing import TYPE_CHECKING, Any, Callable, Dict, Hashable, Optional, Sequence, Tuple
+
+from PIL import Image, ImageChops, ImageDraw, ImageFont
+
+if TYPE_CHECKING:
+    from dto import BarcodeElement, IconElement, TextElement
+
+MM_TO_INCHES = 0.0393701
+
+# Türkçe karakterlerin ASCII karşılıkları
+TURKISH_CHARS = {
+    'ç': 'c', 'Ç': 'C',
+    'ğ': 'g', 'Ğ': 'G',
+    'ı': 'i', 'I': 'I',
+    'ö': 'o', 'Ö': 'O',
+    'ş': 's', 'Ş': 'S',
+    'ü': 'u', 'Ü': 'U'
+}
+
+# Tek geçişte çeviri için önceden derlenmiş tablo
+TURKISH_TRANSLATION = str.maketrans(TURKISH_CHARS)
+
+
+def sanitize_text(text: str, ascii_only: bool = True) -> str:
+    """Türkçe karakterleri güvenli hale getir (Unicode font varsa olduğu gibi bırakılabilir)"""
+    if not ascii_only:
+        return text
+    return text.translate(TURKISH_TRANSLATION)
+
+
+@lru_cache(maxsize=64)
+def load_font(font_size: int) -> ImageFont.ImageFont:
+    """Türkçe karakterleri destekleyen ilk bulunan fontu yükle (boyut başına bir kez)"""
+    for font_path in ("arial.ttf",                       # Önce Arial
+                      "DejaVuSans.ttf",                  # Linux'ta yaygın
+                      "C:/Windows/Fonts/arial.ttf",      # Windows'ta yaygın olanlar
+                      "C:/Windows/Fonts/calibri.ttf"):
+        try:
+            return ImageFont.truetype(font_path, font_size)
+        except Exception:
+            continue
+    # Hiçbiri bulunamazsa default font kullan
+    return ImageFont.load_default()
+
+
+@dataclass(frozen=True)
+class TextSlot:
+    x: int
+    y: int
+    font: Any
+    font_size: int
+    default_text: str
+
+
+@dataclass(frozen=True)
+class BarcodeSlot:
+    x: int
+    y: int
+    width: int
+    height: int
+    barcode_format: str
+    text_alignment: str
+    text_font: Any
+    text_font_size: int
+    default_data: str
+
+
+@dataclass(frozen=True)
+class IconLayer:
+    x: int
+    y: int
+    image: Any
+    # Siyah basılacak pikseller (koyu ve opak) ve paketlenmiş hali
+    mask: Any
+    packed: bytes
+
+
+@dataclass(frozen=True)
+class RenderPlan:
+    """Bir yerleşimin belirli bir etiket boyutu ve DPI için derlenmiş hali"""
+    key: Hashable
+    dpi: int
+    width: int
+    height: int
+    ascii_only: bool
+    text_slots: Tuple[TextSlot, ...]
+    barcode_slots: Tuple[BarcodeSlot, ...]
+    icon_layers: Tuple[IconLayer, ...]
+    # Derlenemeyen ikon sayısı; eksik plan önbelleğe alınmaz, ikon bir sonraki etikette tekrar denenir
+    failed_icons: int = 0
+
+
+@dataclass(frozen=True)
+class TextSprite:
+    """Bir metin parçasının 1-bit glyph bitmap'i ve ölçüleri"""
+    mask: Any
+    left: int
+    top: int
+    width: int
+    height: int
+    # Maskenin paketlenmiş 1-bit hali (MSB önce, satır başına bayta hizalı)
+    packed: Optional[bytes] = None
+
+
+class TextSpriteCache:
+    """Çizilmiş metin parçalarını (metin, font, boyut, DPI) anahtarıyla saklar"""
+
+    def __init__(self, max_entries: int = 2048):
+        self._max_entries = max_entries
+        self._cache: 'OrderedDict[Hashable, TextSprite]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, text: str, font: Any, font_size: int, dpi: int) -> TextSprite:
+        """Metnin sprite'ını getir; yoksa bir kez çizip sakla"""
+        key = (text, getattr(font, 'path', None), font_size, dpi)
+        with self._lock:
+            sprite = self._cache.get(key)
+            if sprite is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return sprite
+            self.misses += 1
+
+        sprite = self._rasterize(text, font)
+
+        with self._lock:
+            self._cache[key] = sprite
+            while len(self._cache) > self._max_entries:
+                self._cache.popitem(last=False)
+        return sprite
+
+    @staticmethod
+    def _rasterize(text: str, font: Any) -> TextSprite:
+        """Metni kendi kutusunda çiz ve tam kapanan pikselleri 1-bit maskeye çevir"""
+        left, top, right, bottom = ImageDraw.Draw(Image.new('L', (1, 1))).textbbox((0, 0), text, font=font)
+        width, height = right - left, bottom - top
+        if width <= 0 or height <= 0:
+            return TextSprite(mask=None, left=left, top=top, width=0, height=0)
+
+        coverage = Image.new('L', (width, height), 0)
+        ImageDraw.Draw(coverage).text((-left, -top), text, fill=255, font=font)
+        # Monokroma çevrimde yalnızca tamamen siyah pikseller kalır; kısmi kaplamalar beyaza döner
+        mask = coverage.point(lambda value: 255 if value == 255 else 0, '1')
+        return TextSprite(mask=mask, left=left, top=top, width=width, height=height, packed=mask.tobytes())
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'entries': len(self._cache), 'hits': self.hits, 'misses': self.misses}
+
+
+class LayoutCompiler:
+    """Yerleşimleri piksel kutuları, çözülmüş fontlar ve hazır ikonlardan oluşan planlara derler"""
+
+    def __init__(self, asset_loader: Optional[Callable[[str], bytes]] = None, cache_size: int = 32):
+        self.logger = logging.getLogger(__name__)
+        self.asset_loader = asset_loader
+        self._cache_size = cache_size
+        self._cache: 'OrderedDict[Hashable, RenderPlan]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def label_size(settings: Dict[str, Any], is_bluetooth_label: bool) -> Tuple[float, float]:
+        """Etiket boyutlarını (mm) belirle"""
+        if is_bluetooth_label:
+            return settings['bluetooth_label_width'], settings['bluetooth_label_height']
+        return settings['carton_label_width'], settings['carton_label_height']
+
+    @staticmethod
+    def geometry_key(texts: Sequence['TextElement'], icons: Sequence['IconElement'],
+                     barcodes: Sequence['BarcodeElement']) -> str:
+        """Değişken içerik hariç yerleşim geometrisinin özeti"""
+        geometry = {
+            'texts': [(t.font_size, t.font_family, t.x_coordinate, t.y_coordinate) for t in texts],
+            'icons': [(i.asset_hash or hashlib.sha1(i.base64_string.encode('ascii')).hexdigest(),
+                       i.x_coordinate, i.y_coordinate, i.width, i.height) for i in icons],
+            'barcodes': [(b.format, b.text_alignment, b.text_font_size,
+                          b.x_coordinate, b.y_coordinate, b.width, b.height) for b in barcodes]
+        }
+        return hashlib.sha1(json.dumps(geometry, separators=(',', ':')).encode('utf-8')).hexdigest()
+
+    def compile(self, texts: Sequence['TextElement'], icons: Sequence['IconElement'],
+                barcodes: Sequence['BarcodeElement'],
+                is_bluetooth_label: bool, settings: Dict[str, Any],
+                layout_key: Optional[Hashable] = None, dpi: Optional[int] = None,
+                plans: Optional[Dict[Hashable, RenderPlan]] = None) -> RenderPlan:
+        """Yerleşimi derle; aynı yerleşim versiyonu ve DPI için önbellekten döndür (plans verilirse planlar orada tutulur)"""
+        label_width, label_height = self.label_size(settings, is_bluetooth_label)
+        # Hedef printer'ın DPI'sı verilmezse varsayılan DPI kullanılır
+        dpi = dpi or settings['dpi']
+        ascii_only = settings.get('ascii_text_only', True)
+        if layout_key is None:
+            layout_key = self.geometry_key(texts, icons, barcodes)
+        key = (layout_key, dpi, label_width, label_height, ascii_only)
+        cache = self._cache if plans is None else plans
+
+        with self._lock:
+            plan = cache.get(key)
+            if plan is not None:
+                if plans is None:
+                    self._cache.move_to_end(key)
+                self.hits += 1
+                return plan
+            self.misses += 1
+
+        plan = self._build_plan(key, texts, icons, barcodes, label_width, label_height, dpi, ascii_only)
+        if plan.failed_icons:
+            return plan
+
+        with self._lock:
+            if plans is not None:
+                # Şablon planları şablonla birlikte önbellekten çıkar; paylaşılan LRU'yu doldurmaz
+                plans[key] = plan
+                return plan
+            self._cache[key] = plan
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return plan
+
+    def _build_plan(self, key: Hashable, texts: Sequence['TextElement'], icons: Sequence['IconElement'],
+                    barcodes: Sequence['BarcodeElement'],
+                    label_width: float, label_height: float, dpi: int, ascii_only: bool) -> RenderPlan:
+        scale = MM_TO_INCHES * dpi
+
+        text_slots = []
+        for text in texts:
+            font_size = int(text.font_size * scale)
+            text_slots.append(TextSlot(
+                x=int(text.x_coordinate * scale),
+                y=int(text.y_coordinate * scale),
+                font=load_font(font_size),
+                font_size=font_size,
+                default_text=sanitize_text(text.content, ascii_only)
+            ))
+
+        barcode_slots = []
+        for barcode in barcodes:
+            text_font_size = int(barcode.text_font_size * scale)
+            barcode_slots.append(BarcodeSlot(
+                x=int(barcode.x_coordinate * scale),
+                y=int(barcode.y_coordinate * scale),
+                width=int(barcode.width * scale),
+                height=int(barcode.height * scale),
+                barcode_format=barcode.format,
+                text_alignment=barcode.text_alignment,
+                text_font=load_font(text_font_size),
+                text_font_size=text_font_size,
+                default_data=barcode.data
+            ))
+
+        icon_layers = []
+        failed_icons = 0
+        for icon in icons:
+            try:
+                icon_layers.append(self._compile_icon(icon, scale))
+            except Exception as e:
+                failed_icons += 1
+                self.logger.error(f"İkon derleme sırasında hata: {e}")
+
+        self.logger.info(f"Yerleşim derlendi: {len(text_slots)} metin, {len(barcode_slots)} barkod, "
+                         f"{len(icon_layers)} ikon ({dpi} dpi)"
+                         + (f", {failed_icons} ikon derlenemedi, plan önbelleğe alınmadı" if failed_icons else ''))
+        return RenderPlan(
+            key=key,
+            dpi=dpi,
+            width=int(label_width * scale),
+            height=int(label_height * scale),
+            ascii_only=ascii_only,
+            text_slots=tuple(text_slots),
+            barcode_slots=tuple(barcode_slots),
+            icon_layers=tuple(icon_layers),
+            failed_icons=failed_icons
+        )
+
+    def _compile_icon(self, icon: 'IconElement', scale: float) -> IconLayer:
+        """İkonu çöz ve hedef boyuta bir kez ölçekle"""
+        if icon.asset_hash and self.asset_loader:
+            icon_data = self.asset_loader(icon.asset_hash)
+        else:
+            icon_data = base64.b64decode(icon.base64_string)
+        icon_image = Image.open(BytesIO(icon_data))
+
+        width = int(icon.width * scale)
+        height = int(icon.height * scale)
+        icon_image = icon_image.resize((width, height))
+        icon_image.load()
+
+        # Monokrom etikette koyu ve opak pikseller siyah basılır
+        rgba = icon_image.convert('RGBA')
+        dark = rgba.convert('L').point(lambda value: 255 if value < 128 else 0, '1')
+        opaque = rgba.getchannel('A').point(lambda value: 255 if value >= 128 else 0, '1')
+        mask = ImageChops.logical_and(dark, opaque)
+
+        return IconLayer(
+            x=int(icon.x_coordinate * scale),
+            y=int(icon.y_coordinate * scale),
+            image=icon_image,
+            mask=mask,
+            packed=mask.tobytes()
+        )
+
+    def clear(self):
+        """Derlenmiş plan önbelleğini temizle"""
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'entries': len(self._cache), 'hits': self.hits, 'misses': self.misses}
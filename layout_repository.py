@@ -0,0 +1,282 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from icon_asset_store import IconAssetStore
+
+
+class LayoutSnapshot:
+    """Tek bir okuma işleminde alınmış, değişmez etiket yerleşimi"""
+
+    __slots__ = ('version', 'payload', 'body', 'etag')
+
+    def __init__(self, version: int, payload: Dict[str, Any]):
+        self.version = version
+        self.payload = payload
+        # JSON gövdesi bir kez serileştirilir, her istekte tekrar kullanılır
+        self.body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        self.etag = hashlib.sha1(self.body).hexdigest()
+
+
+class SaveResult:
+    """Yerleşim kaydetme işleminin özeti"""
+
+    __slots__ = ('version', 'written', 'deleted', 'unchanged')
+
+    def __init__(self, version: int, written: int, deleted: int, unchanged: int):
+        self.version = version
+        self.written = written
+        self.deleted = deleted
+        self.unchanged = unchanged
+
+
+# Tablo adı, istek anahtarı, kolonlar ve istek girdisini kolon değerlerine çeviren fonksiyon
+_TABLE_SPECS: List[Tuple[str, str, Tuple[str, ...], Callable[[Dict], Tuple]]] = [
+    ('InputInfo', 'textEntries',
+     ('Text', 'FontSize', 'FontFamily', 'XCoordinate', 'YCoordinate'),
+     lambda entry: (entry['text'], entry['fontSize'], entry['fontFamily'], entry['x'], entry['y'])),
+    ('IconInfo', 'iconEntries',
+     ('Base64String', 'AssetHash', 'XCoordinate', 'YCoordinate', 'Width', 'Height'),
+     lambda entry: ('', entry.get('assetHash'), entry['x'], entry['y'], entry['width'], entry['height'])),
+    ('BarcodeInfo', 'barcodeEntries',
+     ('XCoordinate', 'YCoordinate', 'Width', 'Height', 'BarcodeSequence', 'BarcodeFormat',
+      'TextAlignment', 'TextFontSize', 'TextFontFamily'),
+     lambda entry: (entry['x'], entry['y'], entry['width'], entry['height'],
+                    entry.get('barcodeSequence', 1), entry.get('barcodeFormat', 'CODE_39'),
+                    entry.get('textAlignment', 'none'), entry.get('textFontSize', 8),
+                    entry.get('textFontFamily', 'Arial'))),
+]
+
+
+class LayoutRepository:
+    """Etiket yerleşimini veritabanından okur ve süreç içinde önbellekler"""
+
+    DEFAULT_LABEL_SETTINGS = {
+        'width': 100,
+        'height': 100,
+        'dpi': 300
+    }
+
+    def __init__(self, connection_factory: Callable[[], sqlite3.Connection],
+                 icon_store: IconAssetStore, version_check_interval: float = 1.0):
+        self.logger = logging.getLogger(__name__)
+        self._connection_factory = connection_factory
+        self._icon_store = icon_store
+        self._version_check_interval = version_check_interval
+        self._lock = threading.Lock()
+        self._snapshot: Optional[LayoutSnapshot] = None
+        self._last_version_check = 0.0
+        self._schema_ready = False
+        self.hits = 0
+        self.reloads = 0
+
+    def _ensure_schema(self, conn: sqlite3.Connection):
+        """Yerleşim versiyon tablosunu gerekiyorsa oluştur"""
+        if self._schema_ready:
+            return
+        in_transaction = conn.in_transaction
+        self._icon_store.ensure_schema(conn)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS "LayoutVersion" (
+                "Id" INTEGER NOT NULL CONSTRAINT "PK_LayoutVersion" PRIMARY KEY,
+                "Version" INTEGER NOT NULL
+            )
+        """)
+        conn.execute('INSERT OR IGNORE INTO "LayoutVersion" ("Id", "Version") VALUES (1, 1)')
+        # Çağıranın açık işlemi varsa commit kararını ona bırak
+        if not in_transaction:
+            conn.commit()
+        self._schema_ready = True
+
+    def _read_version(self, conn: sqlite3.Connection) -> int:
+        row = conn.execute('SELECT "Version" FROM "LayoutVersion" WHERE "Id" = 1').fetchone()
+        return int(row[0]) if row else 1
+
+    def _load_snapshot(self, conn: sqlite3.Connection) -> LayoutSnapshot:
+        """Tüm yerleşimi tek bir okuma işleminde yükle"""
+        cursor = conn.cursor()
+        cursor.execute('BEGIN')
+        try:
+            version = self._read_version(conn)
+
+            cursor.execute("SELECT Id, Text, FontSize, FontFamily, XCoordinate, YCoordinate FROM InputInfo")
+            text_entries = [{
+                'id': item[0],
+                'text': item[1],
+                'x': item[4],
+                'y': item[5],
+                'fontSize': item[2],
+                'fontFamily': item[3]
+            } for item in cursor.fetchall()]
+
+            # İkon verisi yerleşimde taşınmaz, /api/assets/<hash> üzerinden ayrıca alınır
+            cursor.execute("SELECT Id, AssetHash, XCoordinate, YCoordinate, Width, Height FROM IconInfo")
+            icon_entries = [{
+                'id': item[0],
+                'x': item[2],
+                'y': item[3],
+                'width': item[4],
+                'height': item[5],
+                'assetHash': item[1]
+            } for item in cursor.fetchall()]
+
+            cursor.execute("SELECT Id, XCoordinate, YCoordinate, Width, Height, BarcodeSequence, BarcodeFormat, TextAlignment, TextFontSize, TextFontFamily FROM BarcodeInfo")
+            barcode_entries = [{
+                'id': item[0],
+                'x': item[1],
+                'y': item[2],
+                'width': item[3],
+                'height': item[4],
+                'barcodeData': f"Barcode_{item[0]}",  # Örnek data
+                'barcodeSequence': item[5],
+                'barcodeFormat': item[6],
+                'textAlignment': item[7],
+                'textFontSize': item[8],
+                'textFontFamily': item[9]
+            } for item in cursor.fetchall()]
+
+            cursor.execute("SELECT Id, Width, Height, DPI FROM LabelSetting LIMIT 1")
+            settings = cursor.fetchone()
+            if settings:
+                label_settings = {
+                    'id': settings[0],
+                    'width': float(settings[1]),
+                    'height': float(settings[2]),
+                    'dpi': int(settings[3])
+                }
+            else:
+                label_settings = dict(self.DEFAULT_LABEL_SETTINGS)
+        finally:
+            conn.commit()
+
+        return LayoutSnapshot(version, {
+            'version': version,
+            'textEntries': text_entries,
+            'iconEntries': icon_entries,
+            'barcodeEntries': barcode_entries,
+            'labelSettings': label_settings
+        })
+
+    def get_layout(self) -> LayoutSnapshot:
+        """Önbellekteki yerleşimi döndür, versiyon değiştiyse yeniden yükle"""
+        now = time.monotonic()
+        snapshot = self._snapshot
+        if snapshot is not None and now - self._last_version_check < self._version_check_interval:
+            self.hits += 1
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and now - self._last_version_check < self._version_check_interval:
+                self.hits += 1
+                return snapshot
+
+            conn = self._connection_factory()
+            try:
+                self._ensure_schema(conn)
+                # Başka bir süreç kaydetmiş olabilir; sadece versiyon satırını kontrol et
+                if snapshot is not None and self._read_version(conn) == snapshot.version:
+                    self._last_version_check = now
+                    self.hits += 1
+                    return snapshot
+
+                snapshot = self._load_snapshot(conn)
+                self.reloads += 1
+                self._snapshot = snapshot
+                self._last_version_check = now
+                self.logger.info(f"Layout loaded from database (version {snapshot.version})")
+                return snapshot
+            finally:
+                conn.close()
+
+    def save_layout(self, data: Dict[str, Any]) -> SaveResult:
+        """Yerleşimi kayıtlı hali ile karşılaştırıp sadece değişen satırları yaz"""
+        conn = self._connection_factory()
+        try:
+            self._ensure_schema(conn)
+            # Yazma kilidini baştan al; okuma-karşılaştırma-yazma aynı işlemde kalsın
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                # Yeni yüklenen ikonları depoya al, girdide sadece özet kalsın
+                for entry in data.get('iconEntries', []):
+                    if entry.get('base64String'):
+                        entry['assetHash'] = self._icon_store.put_base64(conn, entry['base64String'])
+
+                written = deleted = unchanged = 0
+                for table, key, columns, to_row in _TABLE_SPECS:
+                    if key not in data:
+                        continue
+
+                    column_list = ', '.join(columns)
+                    stored = {row[0]: tuple(row[1:]) for row in
+                              conn.execute(f"SELECT Id, {column_list} FROM {table}")}
+
+                    upserts = []
+                    keep_ids = set()
+                    for entry in data[key]:
+                        entry_id = str(entry['id']) if entry.get('id') else str(uuid.uuid4())
+                        keep_ids.add(entry_id)
+                        values = to_row(entry)
+                        if stored.get(entry_id) == values:
+                            unchanged += 1
+                            continue
+                        upserts.append((entry_id,) + values)
+
+                    removed = [(stored_id,) for stored_id in stored if stored_id not in keep_ids]
+
+                    if upserts:
+                        placeholders = ', '.join('?' * (len(columns) + 1))
+                        assignments = ', '.join(f"{column} = excluded.{column}" for column in columns)
+                        conn.executemany(
+                            f"INSERT INTO {table} (Id, {column_list}) VALUES ({placeholders}) "
+                            f"ON CONFLICT(Id) DO UPDATE SET {assignments}",
+                            upserts
+                        )
+                    if removed:
+                        conn.executemany(f"DELETE FROM {table} WHERE Id = ?", removed)
+
+                    written += len(upserts)
+                    deleted += len(removed)
+
+                # Hiçbir şey değişmediyse versiyon aynı kalır, önbellek geçerliliğini korur
+                if written or deleted:
+                    version = self.bump_version(conn)
+                else:
+                    version = self._read_version(conn)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        finally:
+            conn.close()
+
+        if written or deleted:
+            self.invalidate()
+        self.logger.info(f"Layout saved (version {version}, written {written}, "
+                         f"deleted {deleted}, unchanged {unchanged})")
+        return SaveResult(version, written, deleted, unchanged)
+
+    def bump_version(self, conn: sqlite3.Connection) -> int:
+        """Yerleşim versiyonunu artır (çağıranın işlemi içinde)"""
+        self._ensure_schema(conn)
+        conn.execute('UPDATE "LayoutVersion" SET "Version" = "Version" + 1 WHERE "Id" = 1')
+        return self._read_version(conn)
+
+    def invalidate(self):
+        """Süreç içi önbelleği geçersiz kıl"""
+        with self._lock:
+            self._snapshot = None
+            self._last_version_check = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        return {
+            'version': snapshot.version if snapshot is not None else None,
+            'hits': self.hits,
+            'misses': self.reloads
+        }
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Yük testi
+Çalışan sunucunun yazdırma, önizleme ve yerleşim endpoint'lerine ayarlanabilir
+eşzamanlılıkla istek gönderir; verim, gecikme yüzdelikleri, hata oranı ve
+sunucunun CPU/bellek kullanımını raporlar. Gerçek printer yerine sunucu
+MOCK_PRINTER=True ile (sahte printer) çalıştırılmalıdır.
+"""
+
+import argparse
+import io
+import json
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import LatencyWindow
+
+# Türkçe karakterli gerçekçi etiket metinleri
+SAMPLE_TEXTS = [
+    'Hera Charge Elektronik A.Ş.', 'Şarj İstasyonu', 'Made in Türkiye', 'Gövde Rengi: Gümüş Gri',
+    'Nominal Gerilim: 230V', 'Nominal Güç: 22 kW', 'Üretim Tarihi: 19.10.2026', 'Çıkış Akımı: 32A'
+]
+
+
+def _sample_icon_png() -> bytes:
+    """Yük testi yerleşimi için küçük bir PNG ikon üret"""
+    from PIL import Image, ImageDraw
+    image = Image.new('RGB', (64, 64), 'white')
+    ImageDraw.Draw(image).ellipse((8, 8, 56, 56), outline='black', width=6)
+    buffer = io.BytesIO()
+    image.save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class LoadTestPayloads:
+    """Sunucudaki yerleşimden (boşsa örnek yerleşimden) istek gövdeleri üretir"""
+
+    def __init__(self, session: requests.Session, base_url: str):
+        layout = session.get(f"{base_url}/api/label/layout", timeout=30).json()
+        self.text_entries = layout.get('textEntries') or [
+            {'id': f'text-{index}', 'text': text, 'x': 5, 'y': 4 + index * 6, 'fontSize': 3, 'fontFamily': 'Arial'}
+            for index, text in enumerate(SAMPLE_TEXTS)
+        ]
+        self.barcode_entries = layout.get('barcodeEntries') or [
+            {'id': f'barcode-{index}', 'x': 60 + index * 20, 'y': 5, 'width': 18, 'height': 18,
+             'barcodeSequence': index + 1, 'barcodeFormat': 'QR', 'textAlignment': 'below', 'textFontSize': 2}
+            for index in range(2)
+        ]
+        self.icon_entries = layout.get('iconEntries')
+        if not self.icon_entries:
+            response = session.post(f"{base_url}/api/assets", data=_sample_icon_png(),
+                                    headers={'Content-Type': 'image/png'}, timeout=30)
+            asset_hash = response.json()['assetHash']
+            self.icon_entries = [
+                {'id': f'icon-{index}', 'assetHash': asset_hash, 'x': 60 + index * 12, 'y': 40,
+                 'width': 10, 'height': 10}
+                for index in range(3)
+            ]
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    def next(self) -> Dict[str, Any]:
+        """Her istek için farklı seri numarası ve Türkçe metinlerle dolu gövde"""
+        with self._lock:
+            self._counter += 1
+            serial = f"LT{self._counter:08d}"
+        texts = [dict(entry, text=f"{SAMPLE_TEXTS[index % len(SAMPLE_TEXTS)]} {serial}")
+                 for index, entry in enumerate(self.text_entries)]
+        barcodes = [dict(entry, barcodeData=f"{serial}-{entry.get('barcodeSequence', 1)}")
+                    for entry in self.barcode_entries]
+        return {
+            'textEntries': texts,
+            'barcodeEntries': barcodes,
+            'iconEntries': self.icon_entries,
+            'recordId': serial
+        }
+
+
+class LoadTest:
+    """Kapalı döngü (sabit eşzamanlılık) veya açık döngü (sabit hız) yük üretir"""
+
+    def __init__(self, base_url: str, mix: Dict[str, float], concurrency: int = 4,
+                 duration: float = 30.0, rate: Optional[float] = None, timeout: float = 60.0):
+        self.base_url = base_url.rstrip('/')
+        self.concurrency = concurrency
+        self.duration = duration
+        self.rate = rate
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self.payloads = LoadTestPayloads(self.session, self.base_url)
+        self.operations: Dict[str, Callable[[], requests.Response]] = {
+            'print': lambda: self.session.post(f"{self.base_url}/api/label/print",
+                                               json=self.payloads.next(), timeout=self.timeout),
+            'preview': lambda: self.session.post(f"{self.base_url}/api/label/create-bitmap",
+                                                 json=self.payloads.next(), timeout=self.timeout),
+            'layout': lambda: self.session.get(f"{self.base_url}/api/label/layout", timeout=self.timeout)
+        }
+        unknown = set(mix) - set(self.operations)
+        if unknown:
+            raise ValueError(f"Bilinmeyen endpoint: {', '.join(sorted(unknown))}")
+        self._names = list(mix)
+        self._weights = [mix[name] for name in self._names]
+
+        self.latencies = {name: LatencyWindow(10_000_000) for name in self._names}
+        self.statuses: Dict[str, Counter] = {name: Counter() for name in self._names}
+        self._lock = threading.Lock()
+
+    def _request(self, scheduled_at: float):
+        """Bir istek gönder; gecikme planlanan andan ölçülür (açık döngüde kuyrukta bekleme dahil)"""
+        name = random.choices(self._names, self._weights)[0]
+        try:
+            status = self.operations[name]().status_code
+        except requests.RequestException as e:
+            status = type(e).__name__
+        self.latencies[name].record(time.perf_counter() - scheduled_at)
+        with self._lock:
+            self.statuses[name][status] += 1
+
+    def _closed_loop_worker(self, deadline: float):
+        while time.perf_counter() < deadline:
+            self._request(time.perf_counter())
+
+    def run(self) -> Dict[str, Any]:
+        before = self.server_stats()
+        started = time.perf_counter()
+        deadline = started + self.duration
+
+        if self.rate:
+            # Açık döngü: istekler sunucu yetişse de yetişmese de sabit aralıklarla planlanır
+            interval = 1.0 / self.rate
+            with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='load') as executor:
+                next_at = started
+                while next_at < deadline:
+                    delay = next_at - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                    executor.submit(self._request, next_at)
+                    next_at += interval
+        else:
+            workers = [threading.Thread(target=self._closed_loop_worker, args=(deadline,), daemon=True)
+                       for _ in range(self.concurrency)]
+            for worker in workers:
+                worker.start()
+            for worker in workers:
+                worker.join()
+
+        elapsed = time.perf_counter() - started
+        after = self.server_stats()
+        return self.report(elapsed, before, after)
+
+    def server_stats(self) -> Optional[Dict[str, Any]]:
+        try:
+            health = self.session.get(f"{self.base_url}/health", timeout=self.timeout).json()
+            return dict(health.get('process') or {}, wall=time.perf_counter())
+        except (requests.RequestException, ValueError):
+            return None
+
+    def report(self, elapsed: float, before: Optional[Dict], after: Optional[Dict]) -> Dict[str, Any]:
+        endpoints = {}
+        total = errors = 0
+        for name in self._names:
+            statuses = self.statuses[name]
+            count = sum(statuses.values())
+            failed = sum(value for status, value in statuses.items() if status != 200 and status != 304)
+            total += count
+            errors += failed
+            endpoints[name] = {
+                'requests': count,
+                'throughput': round(count / elapsed, 2),
+                'error_rate': round(failed / count, 4) if count else None,
+                'latency_ms': self.latencies[name].percentiles((50, 95, 99, 100)),
+                'statuses': {str(status): value for status, value in statuses.items()}
+            }
+
+        server = None
+        if before and after and before.get('pid') == after.get('pid'):
+            server = {
+                'pid': after['pid'],
+                'cpu_percent': round(100 * (after['cpu_seconds'] - before['cpu_seconds'])
+                                     / (after['wall'] - before['wall']), 1),
+                'rss_mb': after.get('rss_mb')
+            }
+
+        return {
+            'mode': f"open ({self.rate}/s)" if self.rate else f"closed ({self.concurrency} clients)",
+            'duration': round(elapsed, 2),
+            'requests': total,
+            'throughput': round(total / elapsed, 2),
+            'error_rate': round(errors / total, 4) if total else None,
+            'endpoints': endpoints,
+            'server': server
+        }
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """'print=1,layout=4' biçimindeki ağırlıkları oku"""
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        if name.strip():
+            mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Yazdırma/önizleme/yerleşim endpoint\'leri için yük testi')
+    parser.add_argument('--url', default='http://localhost:6003', help='Sunucu adresi')
+    parser.add_argument('--mix', default='print=1', help="Endpoint ağırlıkları (print, preview, layout), ör. 'print=1,layout=4'")
+    parser.add_argument('--concurrency', type=int, default=4, help='Eşzamanlı istemci sayısı')
+    parser.add_argument('--duration', type=float, default=30.0, help='Test süresi (saniye)')
+    parser.add_argument('--rate', type=float, help='Açık döngü için saniyedeki istek sayısı (verilmezse kapalı döngü)')
+    args = parser.parse_args()
+
+    load_test = LoadTest(args.url, parse_mix(args.mix), concurrency=args.concurrency,
+                         duration=args.duration, rate=args.rate)
+    print(json.dumps(load_test.run(), ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
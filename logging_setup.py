@@ -0,0 +1,204 @@
+import atexit
+import contextvars
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Any, Dict, Iterator, List, Optional
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - [job=%(job_id)s printer=%(printer)s] %(message)s'
+
+# Etiket başına atılan INFO kayıtlarını işaretler (yük altında örneklenir): logger.info(..., extra=PER_LABEL)
+PER_LABEL = {'per_label': True}
+
+_current_job: contextvars.ContextVar[Optional['JobTrace']] = contextvars.ContextVar('current_job', default=None)
+
+
+class JobTrace:
+    """Bir yazdırma işinin kimliği, kullandığı printer'lar ve aşama süreleri"""
+
+    __slots__ = ('job_id', 'record_id', 'printer', 'printers', 'stages', 'started', '_lock')
+
+    def __init__(self, record_id: Optional[str] = None, job_id: Optional[str] = None):
+        self.job_id = job_id or uuid.uuid4().hex[:12]
+        self.record_id = record_id
+        self.printer: Optional[str] = None
+        self.printers: List[str] = []
+        self.stages: Dict[str, float] = {}
+        self.started = time.monotonic()
+        # Varyantlar ayrı iş parçacıklarında çizilir
+        self._lock = threading.Lock()
+
+    def use_printer(self, printer_name: str):
+        with self._lock:
+            self.printer = printer_name
+            if printer_name not in self.printers:
+                self.printers.append(printer_name)
+
+    def add_stage(self, name: str, seconds: float):
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Bloğun süresini aşamaya ekle (aynı aşama tekrarlanırsa süreler toplanır)"""
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self.add_stage(name, time.monotonic() - started)
+
+    def summary(self) -> str:
+        """İşin alanlarını 'anahtar=değer' biçiminde tek satır olarak döndür"""
+        with self._lock:
+            fields = [f'record={self.record_id or "-"}', f'printers={",".join(self.printers) or "-"}']
+            fields += [f'{name}={seconds * 1000:.1f}ms' for name, seconds in self.stages.items()]
+        fields.append(f'total={(time.monotonic() - self.started) * 1000:.1f}ms')
+        return ' '.join(fields)
+
+
+def current_job() -> Optional[JobTrace]:
+    return _current_job.get()
+
+
+@contextmanager
+def job_context(record_id: Optional[str] = None, job_id: Optional[str] = None) -> Iterator[JobTrace]:
+    """Blok içindeki kayıtlara iş kimliği ekle (devam ettirilen işte günlükteki kimlik); iş zaten varsa aynı işi kullan"""
+    trace = _current_job.get()
+    if trace is not None:
+        yield trace
+        return
+    trace = JobTrace(record_id, job_id)
+    token = _current_job.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_job.reset(token)
+
+
+class JobContextFilter(logging.Filter):
+    """Kayda o anki işin kimliğini ve printer'ını ekle (kaydı atan iş parçacığında çalışır)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        trace = _current_job.get()
+        record.job_id = trace.job_id if trace is not None else '-'
+        record.printer = (trace.printer if trace is not None else None) or '-'
+        return True
+
+
+class PerLabelSampler(logging.Filter):
+    """Etiket başına INFO kayıtlarını saniyede en fazla 'per_second' ile sınırla; atlananları sonraki kayda yaz"""
+
+    def __init__(self, per_second: int):
+        super().__init__()
+        self.per_second = per_second
+        self._window = 0
+        self._count = 0
+        self._skipped = 0
+        self.suppressed = 0
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.per_second <= 0 or record.levelno > logging.INFO or not getattr(record, 'per_label', False):
+            return True
+        window = int(time.monotonic())
+        with self._lock:
+            if window != self._window:
+                self._window = window
+                self._count = 0
+            if self._count >= self.per_second:
+                self._skipped += 1
+                self.suppressed += 1
+                return False
+            self._count += 1
+            skipped, self._skipped = self._skipped, 0
+        if skipped:
+            record.msg = f"{record.msg} (+{skipped} benzer kayıt örneklendi)"
+        return True
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Kuyruk doluysa kaydı bekletmeden düşür; disk veya konsol takılsa da yazdırma gecikmez"""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_state: Dict[str, Any] = {}
+
+
+def setup_logging(settings: Dict[str, Any]) -> QueueListener:
+    """Root logger'ı kuyruğa bağla; dosya (döner) ve konsol yazımı tek arka plan iş parçacığında yapılır"""
+    if 'listener' in _state:
+        return _state['listener']
+
+    log_dir = settings['log_dir']
+    os.makedirs(log_dir, exist_ok=True)
+    level = getattr(logging, str(settings['level']).upper(), logging.INFO)
+    formatter = logging.Formatter(LOG_FORMAT)
+
+    # UTF-8 dosya; Türkçe karakterler korunur
+    file_handler = RotatingFileHandler(
+        os.path.join(log_dir, settings['file_name']),
+        maxBytes=settings['max_bytes'],
+        backupCount=settings['backup_count'],
+        encoding='utf-8'
+    )
+    file_handler.setFormatter(formatter)
+    handlers: List[logging.Handler] = [file_handler]
+    if settings['console']:
+        stream_handler = logging.StreamHandler(sys.stdout)
+        stream_handler.setFormatter(formatter)
+        handlers.append(stream_handler)
+
+    queue_handler = NonBlockingQueueHandler(queue.Queue(maxsize=settings['queue_size']))
+    # Filtreler kaydı atan iş parçacığında çalışır (iş bağlamı yalnızca orada görünür)
+    queue_handler.addFilter(JobContextFilter())
+    sampler = PerLabelSampler(settings['per_label_rate'])
+    queue_handler.addFilter(sampler)
+
+    root_logger = logging.getLogger()
+    root_logger.setLevel(level)
+    for handler in list(root_logger.handlers):
+        root_logger.removeHandler(handler)
+    root_logger.addHandler(queue_handler)
+
+    listener = QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+    listener.start()
+    # Çıkışta kuyrukta kalan kayıtlar yazılır
+    atexit.register(stop_logging)
+
+    _state.update(listener=listener, queue_handler=queue_handler, sampler=sampler)
+    return listener
+
+
+def stop_logging():
+    """Kuyruktaki kayıtları yaz ve arka plan iş parçacığını durdur (birden çok kez çağrılabilir)"""
+    listener = _state.get('listener')
+    if listener is not None and listener._thread is not None:
+        listener.stop()
+
+
+def logging_stats() -> Dict[str, Any]:
+    """Kuyruk doluluğu, düşürülen ve örneklenen kayıt sayıları (/health)"""
+    if 'listener' not in _state:
+        return {'enabled': False}
+    queue_handler = _state['queue_handler']
+    return {
+        'enabled': True,
+        'queued': queue_handler.queue.qsize(),
+        'dropped': queue_handler.dropped,
+        'sampled_out': _state['sampler'].suppressed
+    }
@@ -0,0 +1,60 @@
+import os
+import sys
+import threading
+from collections import deque
+from typing import Any, Dict, Iterable, Optional
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def hit_rate(hits: int, misses: int) -> Optional[float]:
+    """Önbellek isabet oranı (henüz istek yoksa None)"""
+    total = hits + misses
+    return round(hits / total, 3) if total else None
+
+
+def process_stats() -> Dict[str, Any]:
+    """Sürecin toplam CPU süresi ve bellek kullanımı (psutil yoksa en yüksek RSS)"""
+    times = os.times()
+    stats = {'pid': os.getpid(), 'cpu_seconds': round(times.user + times.system, 3), 'rss_mb': None}
+    if psutil is not None:
+        stats['rss_mb'] = round(psutil.Process().memory_info().rss / (1024 * 1024), 1)
+    elif sys.platform != 'win32':
+        import resource
+        # Linux'ta KB, macOS'ta bayt cinsindendir
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        stats['rss_mb'] = round(max_rss / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+    return stats
+
+
+class LatencyWindow:
+    """Son ölçümlerin kayan penceresi; yüzdelikler yalnızca istendiğinde hesaplanır"""
+
+    def __init__(self, size: int = 1000):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def average(self) -> Optional[float]:
+        with self._lock:
+            if not self._samples:
+                return None
+            return sum(self._samples) / len(self._samples)
+
+    def percentiles(self, points: Iterable[int] = (50, 95, 99)) -> Dict[str, Optional[float]]:
+        """Pencere üzerindeki yüzdelikler (milisaniye)"""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return {f'p{point}': None for point in points}
+        last = len(samples) - 1
+        return {f'p{point}': round(samples[round(point / 100 * last)] * 1000, 1) for point in points}
@@ -0,0 +1,138 @@
+import logging
+import os
+import re
+import threading
+import time
+from typing import Dict, Optional
+
+# TSC TE310 için varsayılan boşluk (mm) ve USB aktarım hızı (bayt/sn)
+DEFAULT_GAP_MM = 3.0
+TRANSFER_BYTES_PER_SECOND = 1024 * 1024
+
+
+class MockPrinterState:
+    """Sahte printer'ın kalıcı durumu (printer adı başına)"""
+
+    def __init__(self, media_capacity: Optional[int] = None):
+        self.speed = 4.0
+        self.label_height_mm = 30.0
+        self.gap_mm = DEFAULT_GAP_MM
+        self.media_capacity = media_capacity
+        self.media_remaining = media_capacity
+        # Rulo bittiğinde printer bunu ancak bir sonraki etiketi çekmeye çalışınca fark eder
+        self.out_of_paper = False
+        self.head_open = False
+        self.paused = False
+        # Başka bir istemcinin işini basıyor (testlerde meşgul biti için)
+        self.printing = False
+        self.labels_printed = 0
+        self.labels_lost = 0
+        self.bytes_received = 0
+
+    @property
+    def status_code(self) -> int:
+        """TSPL <ESC>!? durum baytı"""
+        code = 0
+        if self.head_open:
+            code |= 0x01
+        if self.out_of_paper:
+            code |= 0x04
+        if self.paused:
+            code |= 0x10
+        if self.printing:
+            code |= 0x20
+        return code
+
+    def refill(self):
+        """Yeni rulo tak"""
+        self.media_remaining = self.media_capacity
+        self.out_of_paper = False
+
+
+class MockTSCLib:
+    """TSCLIB.dll ile aynı fonksiyonları sunan sahte printer; yazdırma süresini SPEED ve SIZE komutlarına göre taklit eder"""
+
+    def __init__(self, time_scale: float = 1.0, media_capacity: Optional[int] = None):
+        self.logger = logging.getLogger(__name__)
+        self.time_scale = time_scale
+        self.media_capacity = media_capacity
+        self._lock = threading.Lock()
+        self._port: Optional[str] = None
+        self.printers: Dict[str, MockPrinterState] = {}
+
+    def printer(self, printer_name: str) -> MockPrinterState:
+        """Printer'ın sahte durumunu getir (testlerde hata oluşturmak için de kullanılır)"""
+        with self._lock:
+            state = self.printers.get(printer_name)
+            if state is None:
+                state = self.printers[printer_name] = MockPrinterState(self.media_capacity)
+            return state
+
+    def _current(self) -> MockPrinterState:
+        if self._port is None:
+            raise RuntimeError("Port açık değil")
+        return self.printer(self._port)
+
+    def _delay(self, seconds: float):
+        if self.time_scale > 0:
+            time.sleep(seconds * self.time_scale)
+
+    def openport(self, printer_name: bytes):
+        name = printer_name.decode('utf-8')
+        self.printer(name)
+        with self._lock:
+            if self._port is not None:
+                raise RuntimeError(f"Port zaten açık: {self._port}")
+            self._port = name
+
+    def closeport(self):
+        with self._lock:
+            self._port = None
+
+    def clearbuffer(self):
+        pass
+
+    def sendcommand(self, command: bytes):
+        state = self._current()
+        text = command.decode('utf-8', errors='replace').strip()
+        if text.startswith('SPEED '):
+            state.speed = float(text.split()[1])
+        elif text.startswith('SIZE '):
+            sizes = re.findall(r'[\d.]+', text)
+            if len(sizes) >= 2:
+                state.label_height_mm = float(sizes[1])
+        elif text.startswith('GAP '):
+            sizes = re.findall(r'[\d.]+', text)
+            if sizes:
+                state.gap_mm = float(sizes[0])
+        elif text.startswith('PRINT '):
+            # PRINT m[,n]: m takım, her takımda n kopya
+            counts = [int(value) for value in re.findall(r'\d+', text)] or [1]
+            copies = counts[0] * (counts[1] if len(counts) > 1 else 1)
+            if state.status_code & 0x15:
+                # Gerçek printer gibi komutu sessizce kabul eder ama basmaz
+                state.labels_lost += copies
+                return
+            if state.media_remaining is not None:
+                printed = min(copies, state.media_remaining)
+                if printed < copies:
+                    state.out_of_paper = True
+                    state.labels_lost += copies - printed
+                state.media_remaining -= printed
+                copies = printed
+            inches = copies * (state.label_height_mm + state.gap_mm) / 25.4
+            self._delay(inches / state.speed)
+            state.labels_printed += copies
+
+    def downloadbmp(self, file_path: bytes, image_name: bytes):
+        size = os.path.getsize(file_path.decode('utf-8'))
+        self._current().bytes_received += size
+        self._delay(size / TRANSFER_BYTES_PER_SECOND)
+
+    def sendBinaryData(self, buffer, length: int) -> int:
+        self._current().bytes_received += length
+        self._delay(length / TRANSFER_BYTES_PER_SECOND)
+        return length
+
+    def usbportqueryprinter(self) -> int:
+        return self._current().status_code
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, LargeBinary
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
 
@@ -24,6 +24,7 @@ class IconInfo(BaseModel):
     __tablename__ = "IconInfo"
     
     base64_string = Column('Base64String', Text, nullable=True)
+    asset_hash = Column('AssetHash', String, nullable=True)
     x_coordinate = Column('XCoordinate', Integer, nullable=False)
     y_coordinate = Column('YCoordinate', Integer, nullable=False)
     width = Column('Width', Integer, nullable=False)
@@ -47,4 +48,47 @@ class LabelSetting(BaseModel):
     
     width = Column('Width', Float, nullable=False)
     height = Column('Height', Float, nullable=False)
-    dpi = Column('DPI', Integer, nullable=False) 
\ No newline at end of file
+    dpi = Column('DPI', Integer, nullable=False) 
+
+class IconAsset(Base):
+    __tablename__ = "IconAsset"
+    
+    hash = Column('Hash', String, primary_key=True)
+    data = Column('Data', LargeBinary, nullable=False)
+    mime_type = Column('MimeType', String, nullable=False)
+    size = Column('Size', Integer, nullable=False)
+
+class LayoutVersion(Base):
+    __tablename__ = "LayoutVersion"
+    
+    id = Column('Id', Integer, primary_key=True)
+    version = Column('Version', Integer, nullable=False)
+
+class LabelTemplate(Base):
+    __tablename__ = "LabelTemplate"
+    
+    id = Column('Id', String, primary_key=True)
+    name = Column('Name', String, nullable=False, unique=True)
+    version = Column('Version', Integer, nullable=False)
+    updated_at = Column('UpdatedAt', String, nullable=False)
+
+class LabelTemplateVariant(Base):
+    __tablename__ = "LabelTemplateVariant"
+    
+    template_id = Column('TemplateId', String, primary_key=True)
+    version = Column('Version', Integer, primary_key=True)
+    variant = Column('Variant', String, primary_key=True)
+    layout = Column('Layout', Text, nullable=False)
+
+class LabelTemplateMatch(Base):
+    __tablename__ = "LabelTemplateMatch"
+    
+    match_type = Column('MatchType', String, primary_key=True)
+    match_value = Column('MatchValue', String, primary_key=True)
+    template_id = Column('TemplateId', String, nullable=False, index=True)
+
+class LabelTemplateRevision(Base):
+    __tablename__ = "LabelTemplateRevision"
+    
+    id = Column('Id', Integer, primary_key=True)
+    revision = Column('Revision', Integer, nullable=False)
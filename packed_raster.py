@@ -0,0 +1,105 @@
+import struct
+from typing import Any, List
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# BMP başlıkları: dosya (14) + bilgi (40) + 2 renkli palet (8)
+BMP_HEADER_SIZE = 14 + 40 + 8
+# 1 = beyaz (TSPL BITMAP ve Pillow '1' düzeni)
+BMP_PALETTE = b'\x00\x00\x00\x00\xff\xff\xff\xff'
+# Pillow'un BMP'ye yazdığı varsayılan çözünürlük (96 dpi)
+BMP_PIXELS_PER_METER = 3780
+
+
+def available() -> bool:
+    return np is not None
+
+
+class PackedRaster:
+    """Etiketin printer'ın satır düzeninde (MSB önce, satır başına bayta hizalı) paketlenmiş 1-bit görüntüsü"""
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.row_bytes = (width + 7) // 8
+        # Çizim sırasında 1 = siyah nokta; finish() TSPL düzenine (1 = beyaz) çevirir
+        self.bits = np.zeros((height, self.row_bytes), dtype=np.uint8)
+        self._finished = False
+
+    def blit(self, x: int, y: int, packed: Any, width: int):
+        """Paketlenmiş 1-bit maskeyi (1 = siyah) bit düzeyinde OR ile bas"""
+        source = np.frombuffer(packed, dtype=np.uint8).reshape(-1, (width + 7) // 8)
+        self._blit_bits(x, y, source, width)
+
+    def blit_modules(self, x: int, y: int, matrix: List[List[bool]], scale: int):
+        """Barkod modül matrisini (True = siyah) scale noktalık karelerle bas"""
+        modules = np.asarray(matrix, dtype=bool)
+        if scale > 1:
+            modules = modules.repeat(scale, axis=0).repeat(scale, axis=1)
+        self._blit_bits(x, y, np.packbits(modules, axis=1), modules.shape[1])
+
+    def _blit_bits(self, x: int, y: int, source: 'np.ndarray', width: int):
+        # Tuvalin dışında kalan satırları kırp
+        top, bottom = max(0, -y), min(source.shape[0], self.height - y)
+        if top >= bottom or x >= self.width or x + width <= 0:
+            return
+        source = source[top:bottom]
+        y += top
+
+        if x < 0:
+            # Sola taşan kısım nadirdir: bitleri açıp kırp ve yeniden paketle
+            source = np.packbits(np.unpackbits(source, axis=1, count=width)[:, -x:], axis=1)
+            width += x
+            x = 0
+
+        byte_x, shift = divmod(x, 8)
+        if shift:
+            # Bayta hizalı olmayan konum: her bayt iki hedef bayta bölünür
+            row_bytes = source.shape[1]
+            shifted = np.zeros((source.shape[0], row_bytes + 1), dtype=np.uint8)
+            shifted[:, :row_bytes] = source >> shift
+            shifted[:, 1:] |= source << (8 - shift)
+            source = shifted
+
+        # Sağa taşan baytları kırp (son bayttaki taşan bitler finish() ile temizlenir)
+        columns = min(source.shape[1], self.row_bytes - byte_x)
+        self.bits[y:y + source.shape[0], byte_x:byte_x + columns] |= source[:, :columns]
+
+    def finish(self) -> 'PackedRaster':
+        """Bitleri yerinde TSPL düzenine çevir (1 = beyaz); satır sonundaki dolgu bitleri beyaz kalır"""
+        if not self._finished:
+            padding = self.row_bytes * 8 - self.width
+            if padding:
+                self.bits[:, -1] &= (0xFF << padding) & 0xFF
+            np.invert(self.bits, out=self.bits)
+            self._finished = True
+        return self
+
+    def tobytes(self) -> memoryview:
+        """TSPL BITMAP verisi olarak doğrudan gönderilebilen tampon (kopyalanmaz)"""
+        return self.finish().bits.reshape(-1).data
+
+    def save(self, file_path: str, format: str = 'BMP'):
+        """1-bit BMP olarak kaydet; satırlar tampondan doğrudan (alttan üste) yazılır"""
+        if format.upper() != 'BMP':
+            raise ValueError(f"Desteklenmeyen format: {format}")
+        self.finish()
+        stride = (self.row_bytes + 3) // 4 * 4
+        padding = b'\x00' * (stride - self.row_bytes)
+        image_size = stride * self.height
+        with open(file_path, 'wb') as f:
+            f.write(b'BM' + struct.pack('<IHHI', BMP_HEADER_SIZE + image_size, 0, 0, BMP_HEADER_SIZE))
+            f.write(struct.pack('<IiiHHIIiiII', 40, self.width, self.height, 1, 1, 0, image_size,
+                                BMP_PIXELS_PER_METER, BMP_PIXELS_PER_METER, 2, 2))
+            f.write(BMP_PALETTE)
+            for row in self.bits[::-1]:
+                f.write(row.data)
+                f.write(padding)
+
+    def to_image(self):
+        """Pillow '1' görüntüsü olarak döndür (önizleme vb. için; veri kopyalanır)"""
+        from PIL import Image
+        return Image.frombytes('1', (self.width, self.height), bytes(self.tobytes()))
@@ -0,0 +1,475 @@
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# İş durumları
+JOB_OPEN = 'open'
+JOB_PRINTED = 'printed'
+JOB_FAILED = 'failed'
+# Yazdırılıp yazdırılmadığı bilinmiyor (komut gönderilirken süreç durdu); otomatik tekrar basılmaz
+JOB_UNCERTAIN = 'uncertain'
+
+# Adım (rol veya seri parçası) durumları
+STEP_PRINTING = 'printing'
+STEP_PRINTED = 'printed'
+STEP_FAILED = 'failed'
+STEP_UNCERTAIN = 'uncertain'
+
+
+def _boot_id() -> str:
+    """Makinenin bu açılışının kimliği (Linux dışında boş); yeniden başlatılmışsa önceki süreçler ölüdür"""
+    try:
+        with open('/proc/sys/kernel/random/boot_id', encoding='ascii') as f:
+            return f.read().strip()
+    except OSError:
+        return ''
+
+
+def _process_alive(pid: int) -> Optional[bool]:
+    """Süreç yaşıyor mu; bilinemiyorsa (Windows) None"""
+    if os.name == 'nt':
+        # Windows'ta os.kill süreci sonlandırır; yalnızca kiraya güvenilir
+        return None
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JournalJob:
+    """Günlükteki bir yazdırma işi ve adımlarının son durumu"""
+
+    __slots__ = ('job_id', 'idempotency_key', 'kind', 'record_id', 'payload', 'copies', 'state', 'error',
+                 'created_at', 'updated_at', 'steps', 'owner', 'lease_until')
+
+    def __init__(self, job_id: str, kind: str, payload: Dict[str, Any], copies: int = 1,
+                 record_id: Optional[str] = None, idempotency_key: Optional[str] = None, state: str = JOB_OPEN,
+                 error: Optional[str] = None, created_at: Optional[float] = None, updated_at: Optional[float] = None,
+                 steps: Optional[Dict[str, str]] = None, owner: Optional[str] = None,
+                 lease_until: Optional[float] = None):
+        self.job_id = job_id
+        self.idempotency_key = idempotency_key
+        self.kind = kind
+        self.record_id = record_id
+        self.payload = payload
+        self.copies = copies
+        self.state = state
+        self.error = error
+        self.created_at = created_at if created_at is not None else time.time()
+        self.updated_at = updated_at if updated_at is not None else self.created_at
+        self.steps = steps if steps is not None else {}
+        # İşi yürüten süreç (açılış kimliği:pid:rastgele) ve kirasının bitiş zamanı
+        self.owner = owner
+        self.lease_until = lease_until
+
+    def pending(self, step: str) -> bool:
+        """Adım henüz basılmadıysa True (basılmış veya belirsiz adımlar tekrar gönderilmez)"""
+        return self.steps.get(step) not in (STEP_PRINTED, STEP_UNCERTAIN)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'jobId': self.job_id,
+            'idempotencyKey': self.idempotency_key,
+            'kind': self.kind,
+            'recordId': self.record_id,
+            'copies': self.copies,
+            'state': self.state,
+            'error': self.error,
+            'createdAt': self.created_at,
+            'updatedAt': self.updated_at,
+            'owner': self.owner,
+            'leaseUntil': self.lease_until,
+            'steps': dict(self.steps)
+        }
+
+
+class _Write:
+    """Yazıcı iş parçacığına gönderilen tek işlem"""
+
+    __slots__ = ('op', 'done', 'result', 'error')
+
+    def __init__(self, op: Callable[[sqlite3.Connection], Any], wait: bool):
+        self.op = op
+        self.done = threading.Event() if wait else None
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class PrintJournal:
+    """Yazdırma işlerinin yaşam döngüsünü WAL modundaki SQLite günlüğüne yazar.
+
+    Tüm yazmalar tek bir iş parçacığından geçer; kuyrukta biriken işlemler tek transaction'da
+    commit edilir (grup commit). Printer'a veri gönderilmeden önce adımın kaydı diske yazılır,
+    böylece süreç çökerse hangi etiketlerin basılmış olabileceği bilinir.
+    Açık işler sahibi olan sürecin kirasıyla tutulur; kira düzenli yenilenir, kurtarma yalnızca sahibi
+    ölmüş veya kirası dolmuş işleri alır (aynı günlüğü paylaşan diğer worker'ların işlerine dokunmaz).
+    """
+
+    def __init__(self, db_path: str = 'printJournal.db', synchronous: str = 'NORMAL', max_batch: int = 256,
+                 retention_days: float = 30, lease_seconds: float = 30):
+        self.logger = logging.getLogger(__name__)
+        self.db_path = db_path
+        self.synchronous = synchronous
+        self.max_batch = max_batch
+        self.lease_seconds = lease_seconds
+        self.boot_id = _boot_id()
+        # pid yeniden kullanılabilir; rastgele ek aynı pid'li eski süreçle karışmayı önler
+        self.owner = f"{self.boot_id}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.started_at = time.time()
+        self._queue: 'queue.Queue[Optional[_Write]]' = queue.Queue()
+        self.writes = 0
+        self.commits = 0
+
+        conn = self._connect()
+        try:
+            self._ensure_schema(conn)
+            if retention_days > 0:
+                self._prune(conn, self.started_at - retention_days * 86400)
+        finally:
+            conn.close()
+
+        self._thread = threading.Thread(target=self._write_loop, name='print-journal', daemon=True)
+        self._thread.start()
+        self._stop_event = threading.Event()
+        self._heartbeat_thread = threading.Thread(target=self._heartbeat_loop, name='print-journal-lease',
+                                                  daemon=True)
+        self._heartbeat_thread.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Transaction'lar elle yönetilir (grup commit için BEGIN ... COMMIT)
+        conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False)
+        conn.execute('PRAGMA busy_timeout = 5000')
+        conn.execute(f'PRAGMA synchronous = {self.synchronous}')
+        return conn
+
+    def _ensure_schema(self, conn: sqlite3.Connection):
+        # WAL: okuyucular yazarı beklemez, commit'ler sıralı eklemedir
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS "PrintJob" (
+                "JobId" TEXT NOT NULL CONSTRAINT "PK_PrintJob" PRIMARY KEY,
+                "IdempotencyKey" TEXT NULL,
+                "Kind" TEXT NOT NULL,
+                "RecordId" TEXT NULL,
+                "Payload" TEXT NOT NULL,
+                "Copies" INTEGER NOT NULL,
+                "State" TEXT NOT NULL,
+                "Error" TEXT NULL,
+                "CreatedAt" REAL NOT NULL,
+                "UpdatedAt" REAL NOT NULL,
+                "Owner" TEXT NULL,
+                "LeaseUntil" REAL NULL
+            )
+        """)
+        # Kira sütunları olmadan oluşturulmuş eski günlükler
+        columns = {row[1] for row in conn.execute('PRAGMA table_info("PrintJob")')}
+        for column, column_type in (('Owner', 'TEXT'), ('LeaseUntil', 'REAL')):
+            if column not in columns:
+                conn.execute(f'ALTER TABLE "PrintJob" ADD COLUMN "{column}" {column_type} NULL')
+        conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS "IX_PrintJob_IdempotencyKey" ON "PrintJob" ("IdempotencyKey")')
+        conn.execute('CREATE INDEX IF NOT EXISTS "IX_PrintJob_State" ON "PrintJob" ("State")')
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS "PrintJobStep" (
+                "JobId" TEXT NOT NULL,
+                "Step" TEXT NOT NULL,
+                "State" TEXT NOT NULL,
+                "Printer" TEXT NULL,
+                "Error" TEXT NULL,
+                "UpdatedAt" REAL NOT NULL,
+                CONSTRAINT "PK_PrintJobStep" PRIMARY KEY ("JobId", "Step")
+            )
+        """)
+
+    def _prune(self, conn: sqlite3.Connection, before: float):
+        """Saklama süresini geçmiş, tamamlanmış işleri sil"""
+        conn.execute('BEGIN')
+        conn.execute(
+            'DELETE FROM "PrintJobStep" WHERE "JobId" IN '
+            '(SELECT "JobId" FROM "PrintJob" WHERE "State" IN (?, ?) AND "UpdatedAt" < ?)',
+            (JOB_PRINTED, JOB_FAILED, before)
+        )
+        removed = conn.execute('DELETE FROM "PrintJob" WHERE "State" IN (?, ?) AND "UpdatedAt" < ?',
+                               (JOB_PRINTED, JOB_FAILED, before)).rowcount
+        conn.execute('COMMIT')
+        if removed:
+            self.logger.info(f"Yazdırma günlüğünden {removed} eski iş silindi")
+
+    def _write_loop(self):
+        conn = self._connect()
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is None:
+                break
+            # Önceki commit sürerken biriken işlemler aynı transaction'a girer
+            batch = [item]
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._commit_batch(conn, batch)
+        conn.close()
+
+    def _commit_batch(self, conn: sqlite3.Connection, batch: List[_Write]):
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for write in batch:
+                # Hatalı işlem yalnızca kendisini geri alır, aynı grubun diğer işlemleri commit edilir
+                conn.execute('SAVEPOINT journal_write')
+                try:
+                    write.result = write.op(conn)
+                    conn.execute('RELEASE journal_write')
+                except Exception as e:
+                    conn.execute('ROLLBACK TO journal_write')
+                    conn.execute('RELEASE journal_write')
+                    write.error = e
+            conn.execute('COMMIT')
+            self.commits += 1
+            self.writes += len(batch)
+        except Exception as e:
+            self.logger.error(f"Yazdırma günlüğü commit edilemedi: {e}")
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            for write in batch:
+                write.error = write.error or e
+        finally:
+            for write in batch:
+                if write.done is not None:
+                    write.done.set()
+                elif write.error is not None:
+                    self.logger.warning(f"Yazdırma günlüğü kaydı yazılamadı: {write.error}")
+
+    def _heartbeat_loop(self):
+        """Bu sürecin açık işlerinin kirasını süresi dolmadan yenile"""
+        while not self._stop_event.wait(self.lease_seconds / 3):
+            lease_until = time.time() + self.lease_seconds
+            self._write(lambda conn: conn.execute(
+                'UPDATE "PrintJob" SET "LeaseUntil" = ? WHERE "Owner" = ? AND "State" = ?',
+                (lease_until, self.owner, JOB_OPEN)
+            ))
+
+    def _write(self, op: Callable[[sqlite3.Connection], Any], wait: bool = False) -> Any:
+        """İşlemi yazıcıya gönder; wait ise commit edilene (diske yazılana) kadar bekle"""
+        write = _Write(op, wait)
+        self._queue.put(write)
+        if not wait:
+            return None
+        write.done.wait()
+        if write.error is not None:
+            raise write.error
+        return write.result
+
+    def open_job(self, kind: str, payload: Dict[str, Any], copies: int = 1, record_id: Optional[str] = None,
+                 idempotency_key: Optional[str] = None, job_id: Optional[str] = None) -> Tuple[JournalJob, bool]:
+        """İşi günlüğe kaydet; aynı anahtarla kayıtlı iş varsa onu döndür, (iş, yeni mi) döndür"""
+        job = JournalJob(job_id or uuid.uuid4().hex[:12], kind, payload, copies, record_id, idempotency_key,
+                         owner=self.owner)
+        job.lease_until = job.created_at + self.lease_seconds
+
+        def insert(conn: sqlite3.Connection) -> Optional[str]:
+            if idempotency_key is not None:
+                row = conn.execute('SELECT "JobId" FROM "PrintJob" WHERE "IdempotencyKey" = ?',
+                                   (idempotency_key,)).fetchone()
+                if row is not None:
+                    return row[0]
+            conn.execute(
+                'INSERT INTO "PrintJob" ("JobId", "IdempotencyKey", "Kind", "RecordId", "Payload", "Copies", '
+                '"State", "CreatedAt", "UpdatedAt", "Owner", "LeaseUntil") VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (job.job_id, idempotency_key, kind, record_id, json.dumps(payload, ensure_ascii=False),
+                 copies, JOB_OPEN, job.created_at, job.created_at, self.owner, job.lease_until)
+            )
+            return None
+
+        # Anahtar kontrolü ve ekleme tek yazıcıda sırayla yapılır; aynı anahtarlı eşzamanlı istekler çakışmaz
+        existing_id = self._write(insert, wait=True)
+        if existing_id is not None:
+            return self.get(existing_id), False
+        return job, True
+
+    def step_started(self, job: JournalJob, step: str):
+        """Adımı printer'a göndermeden önce diske yaz (çökmede 'belirsiz' olarak kurtarılır)"""
+        job.steps[step] = STEP_PRINTING
+        self._write(self._step_op(job.job_id, step, STEP_PRINTING), wait=True)
+
+    def step_finished(self, job: JournalJob, step: str, success: bool, printer: Optional[str] = None,
+                      error: Optional[str] = None):
+        """Adımın sonucunu kaydet (beklemeden, sonraki grup commit'le yazılır)"""
+        state = STEP_PRINTED if success else STEP_FAILED
+        job.steps[step] = state
+        self._write(self._step_op(job.job_id, step, state, printer, error))
+
+    def step_uncertain(self, job: JournalJob, step: str, printer: Optional[str] = None, error: Optional[str] = None):
+        """Gönderilmiş ama basıldığı doğrulanamayan adımı kaydet; tekrar basılmaz, operatör resolve ile kapatır"""
+        job.steps[step] = STEP_UNCERTAIN
+        self._write(self._step_op(job.job_id, step, STEP_UNCERTAIN, printer, error))
+
+    def finish_job(self, job: JournalJob, success: bool, error: Optional[str] = None):
+        """İşi kapat; belirsiz adımı olan iş sonucundan bağımsız olarak operatör kontrolüne kadar 'uncertain' kalır"""
+        if STEP_UNCERTAIN in job.steps.values():
+            job.state = JOB_UNCERTAIN
+        elif not success:
+            job.state = JOB_FAILED
+        else:
+            job.state = JOB_PRINTED
+        job.error = error
+        job.updated_at = time.time()
+        self._write(lambda conn: conn.execute(
+            'UPDATE "PrintJob" SET "State" = ?, "Error" = ?, "UpdatedAt" = ? WHERE "JobId" = ?',
+            (job.state, error, job.updated_at, job.job_id)
+        ))
+
+    def reclaim(self, job: JournalJob) -> bool:
+        """Aynı anahtarla tekrar gelen işi basılmamış adımlarından devam etmek üzere bu sürece al;
+        basılmış olabilecek (gönderilirken kalmış veya belirsiz) adımı varsa veya iş başka bir
+        süreçte hâlâ yürüyorsa False"""
+        if any(state in (STEP_PRINTING, STEP_UNCERTAIN) for state in job.steps.values()):
+            return False
+        if job.state == JOB_OPEN and not self.abandoned(job):
+            return False
+        return self._claim(job)
+
+    def abandoned(self, job: JournalJob, now: Optional[float] = None) -> bool:
+        """Açık işin sahibi ölmüş veya kirası dolmuşsa True (bu sürecin kendi işleri hiçbir zaman)"""
+        if job.owner == self.owner:
+            return False
+        if job.owner is None or job.lease_until is None or job.lease_until < (now or time.time()):
+            return True
+        boot_id, _, rest = job.owner.partition(':')
+        if boot_id != self.boot_id:
+            # Makine yeniden başlatılmış
+            return True
+        pid = rest.partition(':')[0]
+        return pid.isdigit() and _process_alive(int(pid)) is False
+
+    def _claim(self, job: JournalJob) -> bool:
+        """İşi bu sürece al; aynı anda başka bir süreç aldıysa False"""
+        previous_owner = job.owner
+        now = time.time()
+
+        def claim(conn: sqlite3.Connection) -> int:
+            return conn.execute(
+                'UPDATE "PrintJob" SET "State" = ?, "Error" = NULL, "UpdatedAt" = ?, "Owner" = ?, "LeaseUntil" = ? '
+                'WHERE "JobId" = ? AND "Owner" IS ?',
+                (JOB_OPEN, now, self.owner, now + self.lease_seconds, job.job_id, previous_owner)
+            ).rowcount
+
+        if not self._write(claim, wait=True):
+            return False
+        job.state = JOB_OPEN
+        job.error = None
+        job.updated_at = now
+        job.owner = self.owner
+        job.lease_until = now + self.lease_seconds
+        return True
+
+    def resolve(self, job: JournalJob, printed: bool):
+        """Belirsiz adımları operatörün kontrolüne göre basıldı veya basılmadı olarak işaretle ve işi kapat"""
+        state = STEP_PRINTED if printed else STEP_FAILED
+        for step, step_state in job.steps.items():
+            if step_state == STEP_UNCERTAIN:
+                job.steps[step] = state
+                self._write(self._step_op(job.job_id, step, state, error='Operatör tarafından işaretlendi'))
+        self.finish_job(job, all(step_state == STEP_PRINTED for step_state in job.steps.values()))
+
+    @staticmethod
+    def _step_op(job_id: str, step: str, state: str, printer: Optional[str] = None,
+                 error: Optional[str] = None) -> Callable[[sqlite3.Connection], Any]:
+        def op(conn: sqlite3.Connection):
+            conn.execute(
+                'INSERT INTO "PrintJobStep" ("JobId", "Step", "State", "Printer", "Error", "UpdatedAt") '
+                'VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT ("JobId", "Step") DO UPDATE SET '
+                '"State" = excluded."State", "Printer" = COALESCE(excluded."Printer", "Printer"), '
+                '"Error" = excluded."Error", "UpdatedAt" = excluded."UpdatedAt"',
+                (job_id, step, state, printer, error, time.time())
+            )
+        return op
+
+    def get(self, job_id: str) -> Optional[JournalJob]:
+        jobs = self._read('WHERE "JobId" = ?', (job_id,))
+        return jobs[0] if jobs else None
+
+    def find(self, idempotency_key: str) -> Optional[JournalJob]:
+        jobs = self._read('WHERE "IdempotencyKey" = ?', (idempotency_key,))
+        return jobs[0] if jobs else None
+
+    def jobs(self, state: Optional[str] = None, limit: int = 100) -> List[JournalJob]:
+        """Son işler (en yeni önce), isteğe bağlı duruma göre filtrelenir"""
+        if state:
+            return self._read('WHERE "State" = ? ORDER BY "CreatedAt" DESC LIMIT ?', (state, limit))
+        return self._read('ORDER BY "CreatedAt" DESC LIMIT ?', (limit,))
+
+    def _read(self, clause: str, params: Tuple) -> List[JournalJob]:
+        # WAL'da okuyucular yazıcı iş parçacığını beklemez; her okuma kendi bağlantısını kullanır
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                'SELECT "JobId", "Kind", "Payload", "Copies", "RecordId", "IdempotencyKey", "State", "Error", '
+                f'"CreatedAt", "UpdatedAt", "Owner", "LeaseUntil" FROM "PrintJob" {clause}', params
+            ).fetchall()
+            jobs = [JournalJob(row[0], row[1], json.loads(row[2]), row[3], row[4], row[5], row[6], row[7],
+                               row[8], row[9], owner=row[10], lease_until=row[11]) for row in rows]
+            for job in jobs:
+                job.steps = dict(conn.execute('SELECT "Step", "State" FROM "PrintJobStep" WHERE "JobId" = ?',
+                                              (job.job_id,)).fetchall())
+            return jobs
+        finally:
+            conn.close()
+
+    def recover(self, resumers: Dict[str, Callable[[JournalJob], Any]]) -> int:
+        """Sahibi ölmüş veya kirası dolmuş açık işleri kurtar: gönderilirken kalan adımlar belirsiz işaretlenir,
+        basılmamış adımlar işin türüne göre devam ettirilir; türü devam ettirilemeyen işler kapatılır"""
+        now = time.time()
+        # İş önce bu sürece alınır; aynı işi aynı anda kurtarmaya çalışan diğer süreç alamaz
+        unfinished = [job for job in self._read('WHERE "State" = ? ORDER BY "CreatedAt"', (JOB_OPEN,))
+                      if self.abandoned(job, now) and self._claim(job)]
+        for job in unfinished:
+            uncertain = [step for step, state in job.steps.items() if state == STEP_PRINTING]
+            for step in uncertain:
+                job.steps[step] = STEP_UNCERTAIN
+                self._write(self._step_op(job.job_id, step, STEP_UNCERTAIN,
+                                          error='Süreç yazdırma sırasında durdu'), wait=True)
+            if uncertain:
+                self.logger.warning(f"İş {job.job_id} ({job.kind}, {job.record_id}) için basılıp basılmadığı "
+                                    f"belirsiz adımlar: {', '.join(uncertain)}")
+
+            resume = resumers.get(job.kind)
+            if resume is None:
+                printed = bool(job.steps) and all(state == STEP_PRINTED for state in job.steps.values())
+                self.finish_job(job, printed, None if printed else 'Süreç iş tamamlanmadan durdu')
+                continue
+            self.logger.info(f"Yarım kalan iş devam ettiriliyor: {job.job_id} ({job.kind}, {job.record_id})")
+            try:
+                resume(job)
+            except Exception as e:
+                self.logger.error(f"İş {job.job_id} devam ettirilemedi: {e}")
+                self.finish_job(job, False, str(e))
+        return len(unfinished)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'writes': self.writes,
+            'commits': self.commits,
+            'writes_per_commit': round(self.writes / self.commits, 2) if self.commits else None,
+            'queued': self._queue.qsize()
+        }
+
+    def close(self):
+        """Kuyruktaki kayıtları yaz ve yazıcı iş parçacığını durdur"""
+        self._stop_event.set()
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
@@ -0,0 +1,84 @@
+import os
+import re
+import threading
+import time
+from typing import Dict
+
+if os.name == 'nt':
+    import msvcrt
+else:
+    import fcntl
+
+
+class PrinterLockTimeout(Exception):
+    """Printer kilidi belirtilen sürede alınamadı"""
+
+
+class PrinterLock:
+    """Aynı printer'a farklı süreçlerden gelen komut akışlarını sıraya sokan dosya kilidi"""
+
+    # Aynı süreç içindeki iş parçacıkları önce bu kilitte bekler, dosyayı yoklamaz
+    _thread_locks: Dict[str, threading.Lock] = {}
+    _thread_locks_guard = threading.Lock()
+
+    def __init__(self, printer_name: str, lock_dir: str = 'locks', timeout: float = 30.0):
+        self.printer_name = printer_name
+        self.timeout = timeout
+        safe_name = re.sub(r'[^A-Za-z0-9_.-]', '_', printer_name)
+        self.lock_path = os.path.join(lock_dir, f"{safe_name}.lock")
+        os.makedirs(lock_dir, exist_ok=True)
+
+        with PrinterLock._thread_locks_guard:
+            self._thread_lock = PrinterLock._thread_locks.setdefault(self.lock_path, threading.Lock())
+        self._file = None
+
+    def _try_lock_file(self) -> bool:
+        try:
+            if os.name == 'nt':
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    def _unlock_file(self):
+        if os.name == 'nt':
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+
+    def acquire(self):
+        deadline = time.monotonic() + self.timeout
+        if not self._thread_lock.acquire(timeout=self.timeout):
+            raise PrinterLockTimeout(f"Printer kilidi alınamadı: {self.printer_name}")
+
+        try:
+            self._file = open(self.lock_path, 'a+b')
+            while not self._try_lock_file():
+                if time.monotonic() >= deadline:
+                    raise PrinterLockTimeout(f"Printer başka bir süreç tarafından kullanılıyor: {self.printer_name}")
+                time.sleep(0.01)
+        except BaseException:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self._thread_lock.release()
+            raise
+
+    def release(self):
+        try:
+            self._unlock_file()
+        finally:
+            self._file.close()
+            self._file = None
+            self._thread_lock.release()
+
+    def __enter__(self) -> 'PrinterLock':
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
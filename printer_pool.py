@@ -0,0 +1,223 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from metrics import LatencyWindow
+
+BLUETOOTH_ROLE = 'bluetooth'
+CARTON_ROLE = 'carton'
+
+
+def role_for(is_bluetooth_label: bool) -> str:
+    return BLUETOOTH_ROLE if is_bluetooth_label else CARTON_ROLE
+
+
+class PrintUncertain(Exception):
+    """Komut printer'a gönderildi ama printer ardından hata bildirdi; etiket basılmış olabilir"""
+
+    def __init__(self, printer_name: str, message: str):
+        super().__init__(message)
+        self.printer_name = printer_name
+
+
+class PrinterState:
+    """Havuzdaki tek bir printer'ın yük ve sağlık durumu"""
+
+    def __init__(self, name: str, role: str, dpi: int, window: int = 200):
+        self.name = name
+        self.role = role
+        self.dpi = dpi
+        self.queue_depth = 0
+        self.completed = 0
+        self.failed = 0
+        self.consecutive_failures = 0
+        self.last_error: Optional[str] = None
+        self.unhealthy_until = 0.0
+        # Son işlerin süreleri (saniye) - tahmini bekleme süresi ve yüzdelikler için
+        self.recent_durations = LatencyWindow(window)
+        # Bekleyen/yazdırılan işlerin kuyruğa girdiği anlar
+        self.pending_since: List[float] = []
+
+    @property
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.unhealthy_until
+
+    @property
+    def average_duration(self) -> float:
+        average = self.recent_durations.average()
+        return average if average is not None else 1.0
+
+    @property
+    def connection_state(self) -> str:
+        if not self.healthy:
+            return 'unhealthy'
+        return 'busy' if self.queue_depth else 'idle'
+
+    def estimated_wait(self) -> float:
+        """Yeni bir işin bu printer'da bitmesi için tahmini süre"""
+        return (self.queue_depth + 1) * self.average_duration
+
+    def to_dict(self) -> Dict:
+        average = self.recent_durations.average()
+        oldest = min(self.pending_since) if self.pending_since else None
+        return {
+            'name': self.name,
+            'role': self.role,
+            'dpi': self.dpi,
+            'healthy': self.healthy,
+            'state': self.connection_state,
+            'queue_depth': self.queue_depth,
+            'oldest_job_age': round(time.monotonic() - oldest, 3) if oldest is not None else None,
+            'latency_ms': self.recent_durations.percentiles(),
+            'completed': self.completed,
+            'failed': self.failed,
+            'consecutive_failures': self.consecutive_failures,
+            'last_error': self.last_error,
+            'labels_per_minute': round(60.0 / average, 1) if average else None
+        }
+
+
+class PrinterPool:
+    """Aynı roldeki printer'lar arasında en az yüklü sağlıklı printer'a iş dağıtır"""
+
+    def __init__(self, printers: Dict[str, List[str]],
+                 print_func: Callable[[str, Any, bool, int], bool],
+                 failure_cooldown: float = 30.0,
+                 printer_dpi: Optional[Dict[str, int]] = None,
+                 default_dpi: int = 300,
+                 availability: Optional[Callable[[str], bool]] = None,
+                 busy: Optional[Callable[[str], bool]] = None,
+                 hold_timeout: float = 60.0,
+                 hold_interval: float = 0.5):
+        self.logger = logging.getLogger(__name__)
+        self._print_func = print_func
+        self._failure_cooldown = failure_cooldown
+        # Printer durumu (kağıt bitti, kapak açık vb.) bilinen bir hata bildiriyorsa False döner
+        self._availability = availability or (lambda name: True)
+        # Printer baskı sürdüğünü bildiriyorsa True döner; yeni iş printer boşalana kadar bekletilir (backpressure)
+        self._busy = busy or (lambda name: False)
+        self._hold_timeout = hold_timeout
+        self._hold_interval = hold_interval
+        self._lock = threading.Lock()
+        printer_dpi = printer_dpi or {}
+        self._printers: Dict[str, List[PrinterState]] = {
+            role: [PrinterState(name, role, printer_dpi.get(name, default_dpi)) for name in names]
+            for role, names in printers.items()
+        }
+
+    def dpis(self, role: str) -> List[int]:
+        """Roldeki printer'ların farklı DPI değerleri (her biri için ayrı çizim gerekir)"""
+        return sorted({state.dpi for state in self._printers.get(role, [])})
+
+    def _candidates(self, role: str, exclude: set, dpis) -> List[PrinterState]:
+        return [state for state in self._printers.get(role, [])
+                if state.name not in exclude and state.dpi in dpis]
+
+    def _select(self, role: str, exclude: set, dpis,
+                allow_busy: bool = False) -> Optional[Tuple[PrinterState, float]]:
+        """En kısa tahmini bekleme süresine sahip sağlıklı ve hazır printer'ı seç ve rezerve et"""
+        available = {state.name for state in self._candidates(role, exclude, dpis)
+                     if self._availability(state.name) and (allow_busy or not self._busy(state.name))}
+        with self._lock:
+            candidates = [state for state in self._candidates(role, exclude, dpis) if state.name in available]
+            if not candidates:
+                return None
+
+            healthy = [state for state in candidates if state.healthy]
+            if healthy:
+                selected = min(healthy, key=PrinterState.estimated_wait)
+            else:
+                # Hepsi hatalıysa bekleme süresi en önce dolanı tekrar dene
+                selected = min(candidates, key=lambda state: state.unhealthy_until)
+
+            selected.queue_depth += 1
+            queued_at = time.monotonic()
+            selected.pending_since.append(queued_at)
+            return selected, queued_at
+
+    def _finish(self, state: PrinterState, queued_at: float, success: bool, duration: float,
+                error: Optional[str] = None):
+        with self._lock:
+            state.queue_depth -= 1
+            state.pending_since.remove(queued_at)
+            if success:
+                state.completed += 1
+                state.consecutive_failures = 0
+                state.unhealthy_until = 0.0
+                state.recent_durations.record(duration)
+            else:
+                state.failed += 1
+                state.consecutive_failures += 1
+                state.last_error = error
+                state.unhealthy_until = time.monotonic() + self._failure_cooldown
+
+    def mark_recovered(self, name: str):
+        """Printer hatası giderildiğinde bekleme süresini dolmadan kaldır"""
+        with self._lock:
+            for states in self._printers.values():
+                for state in states:
+                    if state.name == name:
+                        state.unhealthy_until = 0.0
+
+    def _waiting_printers(self, role: str, exclude: set, dpis) -> List[str]:
+        """Hata bildirdiği veya baskı sürdüğü için iş alamayan, düzelince/boşalınca alabilecek printer'lar"""
+        return [state.name for state in self._candidates(role, exclude, dpis)
+                if not self._availability(state.name) or self._busy(state.name)]
+
+    def dispatch(self, role: str, jobs: Dict[int, Any], copies: int = 1) -> bool:
+        """İşi en az yüklü printer'a gönder, hata olursa diğer printer'lara devret"""
+        # jobs: DPI -> iş (bitmap dosyası veya spool kaydı); printer'a kendi DPI'sı için çizilen gider
+        tried = set()
+        is_bluetooth_label = role == BLUETOOTH_ROLE
+        hold_deadline = None
+
+        while True:
+            selected = self._select(role, tried, jobs)
+            if selected is None:
+                # Hazır printer yok ama hatası giderilebilecek printer varsa iş düşürülmez, bekletilir
+                waiting = self._waiting_printers(role, tried, jobs)
+                if not waiting:
+                    self.logger.error(f"'{role}' rolü için yazdırabilecek printer kalmadı")
+                    return False
+                if hold_deadline is None:
+                    hold_deadline = time.monotonic() + self._hold_timeout
+                    self.logger.warning(f"'{role}' rolündeki printer'lar hazır değil ({', '.join(waiting)}), iş bekletiliyor")
+                if time.monotonic() < hold_deadline:
+                    time.sleep(self._hold_interval)
+                    continue
+                # Yalnızca meşgul olan printer iş alabilir; süre dolunca printer'ın kendi buffer'ına gönderilir
+                selected = self._select(role, tried, jobs, allow_busy=True)
+                if selected is None:
+                    self.logger.error(f"'{role}' rolü için printer {self._hold_timeout:.0f}s içinde hazır olmadı")
+                    return False
+                self.logger.warning(f"'{role}' rolündeki printer {self._hold_timeout:.0f}s içinde boşalmadı, "
+                                    f"iş meşgul printer'a gönderiliyor")
+            state, queued_at = selected
+            tried.add(state.name)
+
+            started = time.monotonic()
+            error = None
+            try:
+                success = self._print_func(state.name, jobs[state.dpi], is_bluetooth_label, copies)
+            except PrintUncertain as e:
+                # Başka printer'a devredilirse etiket iki kez basılabilir; printer hatası giderilene kadar iş almaz
+                self._finish(state, queued_at, False, time.monotonic() - started, str(e))
+                self.logger.error(f"Printer '{state.name}' gönderimden sonra hata bildirdi, iş devredilmiyor: {e}")
+                raise
+            except Exception as e:
+                success = False
+                error = str(e)
+            self._finish(state, queued_at, success, time.monotonic() - started, error or 'Yazdırma başarısız')
+
+            if success:
+                return True
+            if not self._availability(state.name):
+                # Printer durumu hata bildiriyor: düzeldiğinde aynı printer tekrar denenebilir
+                tried.discard(state.name)
+            self.logger.warning(f"Printer '{state.name}' hata verdi, iş başka printer'a devrediliyor")
+
+    def stats(self) -> List[Dict]:
+        """Tüm printer'ların anlık durumunu döndür"""
+        with self._lock:
+            return [state.to_dict() for states in self._printers.values() for state in states]
@@ -0,0 +1,132 @@
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+# TSPL <ESC>!? durum baytının bitleri
+STATUS_FLAGS = {
+    0x01: 'head_open',
+    0x02: 'paper_jam',
+    0x04: 'out_of_paper',
+    0x08: 'out_of_ribbon',
+    0x10: 'paused',
+    0x20: 'printing',
+    0x80: 'other_error'
+}
+# Bu bitlerden biri varsa printer'a iş gönderilmez ('printing' sadece meşgul demektir)
+ERROR_MASK = 0x01 | 0x02 | 0x04 | 0x08 | 0x10 | 0x80
+# Printer baskı sürerken yeni iş bekletilir; TSPL durum baytında ayrı bir buffer-dolu biti yoktur
+BUSY_MASK = 0x20
+
+
+def decode_status(code: int) -> List[str]:
+    return [name for bit, name in STATUS_FLAGS.items() if code & bit]
+
+
+class PrinterStatus:
+    """Bir printer'ın son sorgulanan durumu"""
+
+    __slots__ = ('name', 'code', 'checked_at')
+
+    def __init__(self, name: str, code: int, checked_at: float):
+        self.name = name
+        self.code = code
+        self.checked_at = checked_at
+
+    @property
+    def error(self) -> bool:
+        return bool(self.code & ERROR_MASK)
+
+    @property
+    def busy(self) -> bool:
+        return bool(self.code & BUSY_MASK)
+
+    def to_dict(self) -> Dict:
+        return {
+            'code': self.code,
+            'flags': decode_status(self.code),
+            'error': self.error,
+            'busy': self.busy,
+            'age': round(time.monotonic() - self.checked_at, 3)
+        }
+
+
+class PrinterStatusMonitor:
+    """Printer durumlarını arka planda sorgular ve önbellekte tutar"""
+
+    def __init__(self, printer_names: List[str], query: Callable[[str], Optional[int]],
+                 interval: float = 2.0, stale_after: float = 10.0,
+                 on_recovered: Optional[Callable[[str], None]] = None):
+        self.logger = logging.getLogger(__name__)
+        self.printer_names = printer_names
+        self._query = query
+        self.interval = interval
+        self.stale_after = stale_after
+        self._on_recovered = on_recovered
+        self._statuses: Dict[str, PrinterStatus] = {}
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._poll_loop, name='printer-status', daemon=True)
+        self._thread.start()
+        self.logger.info(f"Printer durum izleme başlatıldı ({len(self.printer_names)} printer, {self.interval}s)")
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+    def _poll_loop(self):
+        while not self._stop_event.is_set():
+            for name in self.printer_names:
+                self.refresh(name)
+            self._stop_event.wait(self.interval)
+
+    def refresh(self, name: str) -> Optional[PrinterStatus]:
+        """Printer'ı hemen sorgula (printer meşgulse veya sorgu desteklenmiyorsa önbellektekini döndür)"""
+        code = self._query(name)
+        if code is None:
+            return self.get(name)
+
+        status = PrinterStatus(name, code, time.monotonic())
+        with self._lock:
+            previous = self._statuses.get(name)
+            self._statuses[name] = status
+
+        if status.error and (previous is None or previous.code != status.code):
+            self.logger.warning(f"Printer '{name}' hata bildiriyor: {', '.join(decode_status(code))}")
+        elif previous is not None and previous.error and not status.error:
+            self.logger.info(f"Printer '{name}' tekrar hazır")
+            if self._on_recovered:
+                self._on_recovered(name)
+        return status
+
+    def get(self, name: str) -> Optional[PrinterStatus]:
+        with self._lock:
+            return self._statuses.get(name)
+
+    def is_available(self, name: str) -> bool:
+        """Bilinen bir hata yoksa printer'a iş gönderilebilir (eski veya bilinmeyen durum engellemez)"""
+        status = self.get(name)
+        if status is None or time.monotonic() - status.checked_at > self.stale_after:
+            return True
+        return not status.error
+
+    def is_busy(self, name: str) -> bool:
+        """Printer baskı sürdüğünü bildirmişse tekrar sorgula; hâlâ basıyorsa True (eski veya bilinmeyen durum engellemez)"""
+        status = self.get(name)
+        if status is None or time.monotonic() - status.checked_at > self.stale_after or not status.busy:
+            return False
+        status = self.refresh(name)
+        return status is not None and status.busy
+
+    def stats(self) -> Dict[str, Optional[Dict]]:
+        with self._lock:
+            return {name: (self._statuses[name].to_dict() if name in self._statuses else None)
+                    for name in self.printer_names}
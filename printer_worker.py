@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Printer G/Ç worker'ı
+Her printer'ın TSCLIB çağrıları kendi sürecinde çalışır. TSCLIB süreç başına tek bir
+açık port tutar ve Bluetooth bağlantısı koptuğunda openport/sendcommand süresiz
+bloklanabilir; ayrı süreçte çalışan çağrı zaman aşımında süreçle birlikte öldürülür,
+diğer printer'lar etkilenmez. Ana süreçle stdin/stdout üzerinden pickle ile konuşur.
+"""
+
+import argparse
+import ctypes
+import logging
+import os
+import pickle
+import queue
+import subprocess
+import sys
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+# Printer'a tek komut olarak gönderilen, süresi etiket sayısına bağlı çağrılar
+PRINT_COMMAND_PREFIX = b'PRINT '
+
+
+class PrinterTimeout(Exception):
+    """Printer çağrısı zaman aşımına uğradı; worker süreci öldürüldü"""
+
+
+class PrinterWorker:
+    """Tek printer için TSCLIB fonksiyonlarını worker sürecine ileten vekil (TSCLIB ile aynı fonksiyonlar)"""
+
+    def __init__(self, printer_name: str, timeout: float = 10.0, print_timeout_per_label: float = 5.0,
+                 transfer_rate: float = 64 * 1024, start_timeout: float = 15.0,
+                 mock: Optional[Tuple[float, Optional[int]]] = None):
+        self.logger = logging.getLogger(__name__)
+        self.printer_name = printer_name
+        self.timeout = timeout
+        self.print_timeout_per_label = print_timeout_per_label
+        self.transfer_rate = transfer_rate
+        self.start_timeout = start_timeout
+        self.mock = mock
+        self._process: Optional[subprocess.Popen] = None
+        self._responses: 'queue.Queue' = queue.Queue()
+        # İstek ve yanıt sırası karışmasın diye aynı anda tek çağrı
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.timeouts = 0
+        self.restarts = 0
+        self.last_error: Optional[str] = None
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.poll() is None
+
+    def _start(self):
+        command = [sys.executable, os.path.abspath(__file__)]
+        if self.mock is not None:
+            time_scale, media_capacity = self.mock
+            command += ['--mock-time-scale', str(time_scale), '--mock-media-capacity', str(media_capacity or 0)]
+        if self._process is not None:
+            self.restarts += 1
+        self._process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                         cwd=os.getcwd())
+        # Her süreç kendi yanıt kuyruğunu kullanır; öldürülen sürecin geç yanıtları karışmaz
+        self._responses = queue.Queue()
+        threading.Thread(target=self._read_loop, args=(self._process, self._responses),
+                         name=f'printer-worker-{self.printer_name}', daemon=True).start()
+        self._receive('start', self.start_timeout)
+
+    @staticmethod
+    def _read_loop(process: subprocess.Popen, responses: 'queue.Queue'):
+        try:
+            while True:
+                responses.put(pickle.load(process.stdout))
+        except Exception:
+            # Süreç kapandı veya öldürüldü
+            responses.put((False, 'Printer worker süreci sonlandı'))
+
+    def _receive(self, method: str, timeout: float) -> Any:
+        try:
+            ok, result = self._responses.get(timeout=timeout)
+        except queue.Empty:
+            self.timeouts += 1
+            self.kill()
+            self.last_error = f'{method} {timeout:.0f}s içinde tamamlanmadı'
+            self.logger.error(f"Printer '{self.printer_name}' {self.last_error}, worker süreci öldürüldü")
+            raise PrinterTimeout(f"Printer '{self.printer_name}': {self.last_error}") from None
+        if not ok:
+            self.last_error = result
+            if not self.alive:
+                self.kill()
+            raise RuntimeError(result)
+        return result
+
+    def start(self):
+        """Worker sürecini önceden başlat (ilk yazdırmada DLL yükleme süresi beklenmez)"""
+        with self._lock:
+            if not self.alive:
+                self._start()
+
+    def call(self, method: str, *args, timeout: Optional[float] = None) -> Any:
+        """Fonksiyonu worker sürecinde çalıştır; süre aşılırsa süreci öldür ve PrinterTimeout fırlat"""
+        with self._lock:
+            if not self.alive:
+                self._start()
+            self.calls += 1
+            try:
+                pickle.dump((method, args), self._process.stdin)
+                self._process.stdin.flush()
+            except OSError as e:
+                self.kill()
+                raise RuntimeError(f"Printer worker'a yazılamadı: {e}") from None
+            return self._receive(method, timeout if timeout is not None else self.timeout)
+
+    def kill(self):
+        """Worker sürecini öldür; sonraki çağrı yeni süreç başlatır"""
+        if self._process is not None and self._process.poll() is None:
+            self._process.kill()
+            try:
+                self._process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                pass
+
+    def stop(self):
+        """Worker'ı düzgünce kapat"""
+        with self._lock:
+            if self.alive:
+                try:
+                    pickle.dump(None, self._process.stdin)
+                    self._process.stdin.flush()
+                    self._process.wait(timeout=5)
+                except (OSError, subprocess.TimeoutExpired):
+                    pass
+            self.kill()
+
+    # TSCLIB fonksiyonları
+    def openport(self, printer_name: bytes):
+        return self.call('openport', printer_name)
+
+    def closeport(self):
+        # Öldürülmüş süreçte port zaten kapalıdır; yalnızca kapatmak için süreç başlatılmaz
+        if self.alive:
+            return self.call('closeport')
+
+    def clearbuffer(self):
+        return self.call('clearbuffer')
+
+    def sendcommand(self, command: bytes):
+        timeout = self.timeout
+        if command.startswith(PRINT_COMMAND_PREFIX):
+            # PRINT m[,n]: süre basılacak etiket sayısıyla artar
+            counts = [int(value) for value in command[len(PRINT_COMMAND_PREFIX):].split(b',') if value.strip().isdigit()]
+            labels = counts[0] * (counts[1] if len(counts) > 1 else 1) if counts else 1
+            timeout += labels * self.print_timeout_per_label
+        return self.call('sendcommand', command, timeout=timeout)
+
+    def downloadbmp(self, file_path: bytes, image_name: bytes):
+        size = os.path.getsize(file_path.decode('utf-8'))
+        return self.call('downloadbmp', file_path, image_name, timeout=self.timeout + size / self.transfer_rate)
+
+    def sendBinaryData(self, buffer, length: int) -> int:
+        # ctypes tamponu sürece gönderilebilmesi için kopyalanır
+        data = ctypes.string_at(buffer, length)
+        return self.call('sendBinaryData', data, timeout=self.timeout + length / self.transfer_rate)
+
+    def usbportqueryprinter(self) -> int:
+        return self.call('usbportqueryprinter')
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'alive': self.alive,
+            'pid': self._process.pid if self.alive else None,
+            'calls': self.calls,
+            'timeouts': self.timeouts,
+            'restarts': self.restarts,
+            'last_error': self.last_error
+        }
+
+
+class PrinterWorkerPool:
+    """Printer adı başına bir worker süreci (ilk kullanımda başlatılır)"""
+
+    def __init__(self, **worker_options):
+        self._worker_options = worker_options
+        self._workers: Dict[str, PrinterWorker] = {}
+        self._lock = threading.Lock()
+
+    def library(self, printer_name: str) -> PrinterWorker:
+        """Printer'ın TSCLIB vekilini getir"""
+        with self._lock:
+            worker = self._workers.get(printer_name)
+            if worker is None:
+                worker = self._workers[printer_name] = PrinterWorker(printer_name, **self._worker_options)
+            return worker
+
+    def start(self, printer_names) -> bool:
+        """Verilen printer'ların worker süreçlerini başlat"""
+        for printer_name in printer_names:
+            self.library(printer_name).start()
+        return True
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            workers = dict(self._workers)
+        return {name: worker.stats() for name, worker in workers.items()}
+
+    def close(self):
+        with self._lock:
+            workers = list(self._workers.values())
+        for worker in workers:
+            worker.stop()
+
+
+def _serve(library: Any, output):
+    """Ana süreçten gelen çağrıları sırayla çalıştır"""
+    stdin = sys.stdin.buffer
+    while True:
+        try:
+            request = pickle.load(stdin)
+        except EOFError:
+            break
+        if request is None:
+            break
+        method, args = request
+        try:
+            if method == 'sendBinaryData':
+                data = args[0]
+                buffer = (ctypes.c_char * len(data)).from_buffer_copy(data)
+                result = library.sendBinaryData(buffer, len(data))
+            else:
+                result = getattr(library, method)(*args)
+            response = (True, result if isinstance(result, (int, type(None))) else None)
+        except Exception as e:
+            response = (False, str(e))
+        pickle.dump(response, output)
+        output.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Printer G/Ç worker süreci')
+    parser.add_argument('--mock-time-scale', type=float, help='TSCLIB.dll yerine sahte printer kullan')
+    parser.add_argument('--mock-media-capacity', type=int, default=0)
+    args = parser.parse_args()
+
+    # stdout yalnızca yanıtlar için kullanılır; diğer çıktılar stderr'e gider
+    output = sys.stdout.buffer
+    sys.stdout = sys.stderr
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - printer_worker - %(levelname)s - %(message)s')
+
+    started = time.monotonic()
+    if args.mock_time_scale is not None:
+        from mock_printer import MockTSCLib
+        library = MockTSCLib(args.mock_time_scale, media_capacity=args.mock_media_capacity or None)
+    else:
+        from tsc_printer_service import TSCPrinterService
+        library = TSCPrinterService().tsc_lib
+    if library is None:
+        pickle.dump((False, 'TSCLIB.dll yüklenemedi'), output)
+        output.flush()
+        raise SystemExit(1)
+    pickle.dump((True, round(time.monotonic() - started, 3)), output)
+    output.flush()
+
+    _serve(library, output)
+
+
+if __name__ == '__main__':
+    main()
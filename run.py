@@ -6,12 +6,16 @@ Bu dosya uygulamayı başlatmak için kullanılır.
 
 import os
 import sys
-from app import app
+from app import app, start_background_services
 
 if __name__ == '__main__':
     # Logs dizinini oluştur
     os.makedirs('logs', exist_ok=True)
     
+    # Isınma, printer durum izleme, barkod okuyucu (etkinse) ve yarım kalan işlerin kurtarılması - reloader'ın izleyici sürecinde başlatılmaz
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_background_services()
+    
     # Uygulamayı başlat
     app.run(
         host='0.0.0.0',
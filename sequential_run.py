@@ -0,0 +1,88 @@
+import re
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+# Pillow içeren derleyici yalnızca komut üretilirken yüklenir
+if TYPE_CHECKING:
+    from layout_compiler import RenderPlan
+
+# TSPL'in ölçeklenebilir yerleşik fontu; TEXT komutunda boyut punto olarak verilir
+COUNTER_FONT = '0'
+TRAILING_DIGITS = re.compile(r'(\d+)$')
+
+
+def increment_serial(serial: str, step: int) -> str:
+    """Seri numarasının sondaki sayısal kısmını printer sayacı gibi artır (basamak sayısı korunur)"""
+    match = TRAILING_DIGITS.search(serial)
+    if not match:
+        raise ValueError(f"Seri numarası sayıyla bitmiyor: {serial}")
+    digits = match.group(1)
+    value = str(int(digits) + step)
+    if len(value) > len(digits):
+        raise ValueError(f"Seri numarası aralığı basamak sayısını aşıyor: {serial} + {step}")
+    return serial[:match.start()] + value.zfill(len(digits))
+
+
+@dataclass(frozen=True)
+class CounterField:
+    """Printer sayacıyla basılacak metin ('text') veya barkod ('barcode') alanı"""
+    kind: str
+    index: int
+    initial: str
+
+
+@dataclass(frozen=True)
+class SequentialRun:
+    """Sabit arka plan bitmap'i, sayaç komutları ve PRINT N'den oluşan seri etiket işi"""
+    file_path: str
+    commands: Tuple[str, ...]
+    count: int
+    first_serial: str
+    last_serial: str
+    # Etiket boyutu (mm) şablon varyantından geldiyse; printer'a SIZE olarak gönderilir
+    label_size: Optional[Tuple[float, float]] = None
+
+
+def counter_commands(plan: 'RenderPlan', fields: List[CounterField]) -> List[str]:
+    """Her sayaç alanı için TSPL sayaç tanımı ve TEXT/QRCODE komutlarını üret"""
+    from layout_compiler import sanitize_text
+
+    commands = []
+    for counter, field in enumerate(fields):
+        initial = sanitize_text(field.initial, plan.ascii_only)
+        if '"' in initial:
+            raise ValueError(f"Sayaç değeri çift tırnak içeremez: {initial}")
+        name = f'@{counter}'
+        # Sayaç her etiket takımından sonra 1 artar (PRINT N -> N farklı seri)
+        commands.append(f'SET COUNTER {name} 1')
+        commands.append(f'{name}="{initial}"')
+        if field.kind == 'text':
+            slot = plan.text_slots[field.index]
+            commands.append(_text_command(plan, slot.x, slot.y, slot.font_size, name))
+        else:
+            slot = plan.barcode_slots[field.index]
+            commands.append(_qrcode_command(slot, initial, name))
+            if slot.text_alignment != 'none':
+                commands.append(_text_command(plan, slot.x, slot.y + slot.height + 5, slot.text_font_size, name))
+    return commands
+
+
+def _text_command(plan: 'RenderPlan', x: int, y: int, font_size: int, name: str) -> str:
+    # Bilgisayarda piksel olarak hesaplanan font boyutu printer'da puntoya çevrilir
+    points = max(1, round(font_size * 72 / plan.dpi))
+    return f'TEXT {x},{y},"{COUNTER_FONT}",0,{points},{points},{name}'
+
+
+def _qrcode_command(slot, data: str, name: str) -> str:
+    """Bilgisayarda çizilen QR ile aynı modül genişliği ve konumda printer QRCODE komutu"""
+    import qrcode
+
+    qr = qrcode.QRCode(version=1, error_correction=qrcode.constants.ERROR_CORRECT_L, box_size=1, border=4)
+    qr.add_data(data)
+    qr.make(fit=True)
+    modules = qr.modules_count + 2 * qr.border
+    cell = max(1, min(slot.width, slot.height) // modules)
+    # Printer sessiz bölgeyi çizmez; konum sessiz bölgenin içinden başlar
+    x = slot.x + (slot.width - modules * cell) // 2 + qr.border * cell
+    y = slot.y + (slot.height - modules * cell) // 2 + qr.border * cell
+    return f'QRCODE {x},{y},L,{cell},A,0,{name}'
@@ -0,0 +1,138 @@
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+import serial
+
+from logging_setup import PER_LABEL
+
+# .NET isimlendirmesiyle gelen ayarların pyserial karşılıkları
+PARITY_MAP = {
+    'None': serial.PARITY_NONE,
+    'Odd': serial.PARITY_ODD,
+    'Even': serial.PARITY_EVEN,
+    'Mark': serial.PARITY_MARK,
+    'Space': serial.PARITY_SPACE
+}
+
+STOP_BITS_MAP = {
+    'One': serial.STOPBITS_ONE,
+    'OnePointFive': serial.STOPBITS_ONE_POINT_FIVE,
+    'Two': serial.STOPBITS_TWO
+}
+
+
+class SerialScannerService:
+    """Seri porttaki barkod okuyucuyu dinler, okunan kodları yazdırma yoluna iletir"""
+
+    def __init__(self, settings: Dict[str, Any], on_scan: Callable[[str], None],
+                 debounce_seconds: float = 1.0):
+        self.logger = logging.getLogger(__name__)
+        self.settings = settings
+        self.on_scan = on_scan
+        self.debounce_seconds = debounce_seconds
+
+        # Okuyucu iş parçacığı yazdırmayı asla beklemez; okumalar kuyrukta sıralanır
+        self._scans: 'queue.Queue[Optional[tuple]]' = queue.Queue()
+        self._stop_event = threading.Event()
+        self._serial: Optional[serial.Serial] = None
+        self._reader_thread: Optional[threading.Thread] = None
+        self._worker_thread: Optional[threading.Thread] = None
+        self._last_code: Optional[str] = None
+        self._last_code_time = 0.0
+
+        self.scans_received = 0
+        self.duplicates_dropped = 0
+        self.scans_processed = 0
+        self.last_latency: Optional[float] = None
+
+    def _open_serial(self) -> serial.Serial:
+        return serial.Serial(
+            port=self.settings['port_name'],
+            baudrate=self.settings['baud_rate'],
+            parity=PARITY_MAP.get(self.settings['parity'], serial.PARITY_NONE),
+            bytesize=self.settings['data_bits'],
+            stopbits=STOP_BITS_MAP.get(self.settings['stop_bits'], serial.STOPBITS_ONE),
+            timeout=0.05
+        )
+
+    def start(self):
+        """Portu aç ve okuyucu/işleyici iş parçacıklarını başlat"""
+        self._serial = self._open_serial()
+        self._stop_event.clear()
+        self._reader_thread = threading.Thread(target=self._read_loop, name='scanner-reader', daemon=True)
+        self._worker_thread = threading.Thread(target=self._process_loop, name='scanner-worker', daemon=True)
+        self._reader_thread.start()
+        self._worker_thread.start()
+        self.logger.info(f"Barkod okuyucu dinleniyor: {self.settings['port_name']}")
+
+    def stop(self):
+        """Okuyucuyu durdur ve portu kapat"""
+        self._stop_event.set()
+        self._scans.put(None)
+        for thread in (self._reader_thread, self._worker_thread):
+            if thread is not None:
+                thread.join(timeout=2)
+        if self._serial is not None:
+            self._serial.close()
+            self._serial = None
+
+    def _read_loop(self):
+        buffer = b''
+        while not self._stop_event.is_set():
+            try:
+                chunk = self._serial.read(self._serial.in_waiting or 1)
+            except Exception as e:
+                self.logger.error(f"Seri port okuma hatası: {e}")
+                time.sleep(0.5)
+                continue
+            if not chunk:
+                continue
+
+            buffer += chunk
+            # Okuyucular her kodu CR ve/veya LF ile sonlandırır
+            while True:
+                end = min((index for index in (buffer.find(b'\r'), buffer.find(b'\n')) if index >= 0), default=-1)
+                if end < 0:
+                    break
+                line, buffer = buffer[:end], buffer[end + 1:]
+                code = line.decode('utf-8', errors='replace').strip()
+                if code:
+                    self._accept(code, time.monotonic())
+
+    def _accept(self, code: str, received_at: float):
+        """Aynı kodun kısa süre içindeki tekrarlarını ele, diğerlerini kuyruğa al"""
+        self.scans_received += 1
+        if code == self._last_code and received_at - self._last_code_time < self.debounce_seconds:
+            self.duplicates_dropped += 1
+            return
+        self._last_code = code
+        self._last_code_time = received_at
+        self._scans.put((code, received_at))
+
+    def _process_loop(self):
+        while not self._stop_event.is_set():
+            item = self._scans.get()
+            if item is None:
+                break
+            code, received_at = item
+            try:
+                self.on_scan(code)
+                self.scans_processed += 1
+                self.last_latency = time.monotonic() - received_at
+                self.logger.info(f"Okutulan kod işlendi: {code} ({self.last_latency * 1000:.0f} ms)", extra=PER_LABEL)
+            except Exception as e:
+                self.logger.error(f"Okutulan kod işlenirken hata ({code}): {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'port_name': self.settings['port_name'],
+            'running': self._reader_thread is not None and self._reader_thread.is_alive(),
+            'scans_received': self.scans_received,
+            'duplicates_dropped': self.duplicates_dropped,
+            'scans_processed': self.scans_processed,
+            'pending_scans': self._scans.qsize(),
+            'last_latency_ms': round(self.last_latency * 1000, 1) if self.last_latency is not None else None
+        }
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+TSC Printer Python Backend - Production sunucu
+Uygulamayı waitress ile çok iş parçacıklı (ve istenirse çok süreçli) çalıştırır.
+Aynı printer'a giden komutlar süreçler arası printer kilidiyle sıraya sokulur.
+"""
+
+import argparse
+import multiprocessing
+import os
+import socket
+
+from config import Config
+
+
+def _serve(sock: socket.socket, settings: dict, worker_index: int = 0):
+    """Verilen dinleme soketi üzerinde waitress'i başlat"""
+    from waitress import serve
+    from app import app, start_background_services
+
+    # Her worker kendi önbelleklerini ısıtır ve kendi havuzu için printer durumunu izler; seri port ve
+    # yarım kalan işlerin kurtarılması yalnızca ilk worker'da çalışır
+    start_background_services(primary=worker_index == 0)
+
+    serve(
+        app,
+        sockets=[sock],
+        threads=settings['threads'],
+        connection_limit=settings['connection_limit'],
+        backlog=settings['backlog'],
+        channel_timeout=settings['channel_timeout'],
+        ident='TSCPrinterPython'
+    )
+
+
+def _worker_main(worker_index: int, share_queue, settings: dict, inherited_sock=None):
+    """Worker süreci: soketi devral ve sunmaya başla"""
+    # Döner log dosyası süreçler arasında paylaşılamaz; her worker kendi dosyasına yazar
+    name, ext = os.path.splitext(Config.LOG_SETTINGS['file_name'])
+    Config.LOG_SETTINGS['file_name'] = f'{name}-{worker_index}{ext}'
+    if inherited_sock is not None:
+        sock = inherited_sock
+    else:
+        # Windows'ta soket ana süreçten socket.share ile gelir
+        sock = socket.fromshare(share_queue.get())
+    _serve(sock, settings, worker_index)
+
+
+def main():
+    settings = dict(Config.SERVER_SETTINGS)
+
+    parser = argparse.ArgumentParser(description='TSC Printer Python production sunucusu')
+    parser.add_argument('--host', default=settings['host'])
+    parser.add_argument('--port', type=int, default=settings['port'])
+    parser.add_argument('--processes', type=int, default=settings['processes'])
+    parser.add_argument('--threads', type=int, default=settings['threads'])
+    args = parser.parse_args()
+    settings.update(host=args.host, port=args.port, processes=args.processes, threads=args.threads)
+
+    # Logs dizinini oluştur
+    os.makedirs(Config.LOG_SETTINGS['log_dir'], exist_ok=True)
+
+    sock = socket.create_server((settings['host'], settings['port']), backlog=settings['backlog'])
+
+    if settings['processes'] <= 1:
+        _serve(sock, settings)
+        return
+
+    workers = []
+    if os.name == 'nt':
+        context = multiprocessing.get_context('spawn')
+        for worker_index in range(settings['processes']):
+            share_queue = context.Queue()
+            worker = context.Process(target=_worker_main, args=(worker_index, share_queue, settings))
+            worker.start()
+            share_queue.put(sock.share(worker.pid))
+            workers.append(worker)
+    else:
+        context = multiprocessing.get_context('fork')
+        for worker_index in range(settings['processes']):
+            worker = context.Process(target=_worker_main, args=(worker_index, None, settings, sock))
+            worker.start()
+            workers.append(worker)
+
+    sock.close()
+    try:
+        for worker in workers:
+            worker.join()
+    except KeyboardInterrupt:
+        for worker in workers:
+            worker.terminate()
+
+
+if __name__ == '__main__':
+    main()
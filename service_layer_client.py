@@ -0,0 +1,179 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import quote
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class ServiceLayerError(Exception):
+    """Service Layer isteği başarısız oldu"""
+
+
+class ServiceLayerClient:
+    """SAP Business One Service Layer istemcisi - tek oturum, bağlantı havuzu, sayfalı okuma"""
+
+    def __init__(self, settings: Dict[str, Any], session: Optional[requests.Session] = None):
+        self.logger = logging.getLogger(__name__)
+        self.base_url = settings['base_url'].rstrip('/')
+        self.company_db = settings['company_db']
+        self.username = settings['username']
+        self.password = settings['password']
+        self.serial_number_columns = settings['select_serial_number_columns']
+        self.ean_columns = settings['select_ean_columns']
+        self.page_size = settings.get('page_size', 500)
+        self.item_cache_ttl = settings.get('item_cache_ttl', 600)
+        self.timeout = settings.get('timeout', 30)
+
+        # Oturum çerezi (B1SESSION) ve bağlantılar tüm isteklerde yeniden kullanılır
+        self.session = session or requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=settings.get('pool_size', 8), max_retries=2)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.verify = settings.get('verify_ssl', False)
+
+        self._login_lock = threading.Lock()
+        self._session_expires_at = 0.0
+        self._item_cache: Dict[str, Tuple[float, Dict]] = {}
+        self._item_cache_lock = threading.Lock()
+        self.item_cache_hits = 0
+        self.item_cache_misses = 0
+        self._prefetch_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='sl-prefetch')
+        self._prefetched: Dict[str, Future] = {}
+        self._prefetch_lock = threading.Lock()
+        # Getirilen seri numaraları; okutulan kodlar önce burada aranır
+        self._serial_index: Dict[str, Dict] = {}
+
+    def login(self, force: bool = False):
+        """Oturum açık değilse (veya süresi dolmak üzereyse) giriş yap"""
+        with self._login_lock:
+            if not force and time.monotonic() < self._session_expires_at:
+                return
+
+            response = self.session.post(f"{self.base_url}/Login", json={
+                'CompanyDB': self.company_db,
+                'UserName': self.username,
+                'Password': self.password
+            }, timeout=self.timeout)
+            if response.status_code != 200:
+                raise ServiceLayerError(f"Service Layer girişi başarısız: {response.status_code} {response.text}")
+
+            # SessionTimeout dakika cinsindendir; süre dolmadan bir dakika önce yenile
+            session_timeout = response.json().get('SessionTimeout', 30)
+            self._session_expires_at = time.monotonic() + max(session_timeout - 1, 1) * 60
+            self.logger.info(f"Service Layer oturumu açıldı ({self.company_db})")
+
+    def _get(self, url: str, params: Optional[Dict[str, str]] = None) -> Dict:
+        self.login()
+        headers = {'Prefer': f'odata.maxpagesize={self.page_size}'}
+        response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+        if response.status_code == 401:
+            # Oturum sunucu tarafında düşmüş olabilir, bir kez yeniden giriş yap
+            self.login(force=True)
+            response = self.session.get(url, params=params, headers=headers, timeout=self.timeout)
+        if response.status_code != 200:
+            raise ServiceLayerError(f"Service Layer isteği başarısız: {response.status_code} {response.text}")
+        return response.json()
+
+    def iter_records(self, entity: str, select: str, filter_expr: Optional[str] = None) -> Iterator[Dict]:
+        """Varlık kayıtlarını büyük sayfalar halinde, sadece istenen kolonlarla oku"""
+        params = {'$select': select}
+        if filter_expr:
+            params['$filter'] = filter_expr
+
+        url: Optional[str] = f"{self.base_url}/{entity}"
+        while url:
+            page = self._get(url, params)
+            yield from page.get('value', [])
+
+            next_link = page.get('odata.nextLink') or page.get('@odata.nextLink')
+            if not next_link:
+                break
+            # nextLink parametreleri zaten içerir ve base_url'e göreli olabilir
+            url = next_link if next_link.startswith('http') else f"{self.base_url}/{next_link.lstrip('/')}"
+            params = None
+
+    def fetch_serial_numbers(self, filter_expr: Optional[str] = None) -> List[Dict]:
+        """Seri numarası kayıtlarını getir (önceden getirildiyse bekleyen sonucu kullan)"""
+        with self._prefetch_lock:
+            future = self._prefetched.pop(filter_expr or '', None)
+        if future is not None:
+            return future.result()
+        return self._load_serial_numbers(filter_expr)
+
+    def _load_serial_numbers(self, filter_expr: Optional[str]) -> List[Dict]:
+        records = list(self.iter_records('SerialNumberDetails', self.serial_number_columns, filter_expr))
+        for record in records:
+            if record.get('SerialNumber'):
+                self._serial_index[record['SerialNumber']] = record
+        return records
+
+    def find_serial(self, serial_number: str) -> Optional[Dict]:
+        """Seri numarası kaydını önce getirilmiş kayıtlarda, yoksa Service Layer'da ara"""
+        record = self._serial_index.get(serial_number)
+        if record is not None:
+            return record
+        escaped = serial_number.replace("'", "''")
+        records = self._load_serial_numbers(f"SerialNumber eq '{escaped}'")
+        return records[0] if records else None
+
+    def prefetch_serial_numbers(self, filter_expr: Optional[str] = None) -> Future:
+        """Sonraki üretim emrinin seri numaralarını arka planda getirmeye başla"""
+        key = filter_expr or ''
+        with self._prefetch_lock:
+            future = self._prefetched.get(key)
+            if future is None:
+                future = self._prefetch_executor.submit(self._load_serial_numbers, filter_expr)
+                self._prefetched[key] = future
+            return future
+
+    def fetch_ean_records(self, filter_expr: Optional[str] = None) -> List[Dict]:
+        """Ürün ana verisini (EAN/model/güç) toplu getir ve önbelleğe al"""
+        records = list(self.iter_records('Items', self.ean_columns, filter_expr))
+        now = time.monotonic()
+        with self._item_cache_lock:
+            for record in records:
+                if record.get('ItemCode'):
+                    self._item_cache[record['ItemCode']] = (now + self.item_cache_ttl, record)
+        return records
+
+    def get_item(self, item_code: str) -> Dict:
+        """Ürün ana verisini TTL önbellekten, yoksa Service Layer'dan getir"""
+        with self._item_cache_lock:
+            cached = self._item_cache.get(item_code)
+            if cached is not None and cached[0] > time.monotonic():
+                self.item_cache_hits += 1
+                return cached[1]
+            self.item_cache_misses += 1
+
+        escaped_code = quote(item_code.replace("'", "''"), safe='')
+        record = self._get(f"{self.base_url}/Items('{escaped_code}')", {'$select': self.ean_columns})
+        record.pop('odata.metadata', None)
+        record.pop('@odata.context', None)
+        with self._item_cache_lock:
+            self._item_cache[item_code] = (time.monotonic() + self.item_cache_ttl, record)
+        return record
+
+    def stats(self) -> Dict[str, int]:
+        with self._item_cache_lock:
+            return {
+                'entries': len(self._item_cache),
+                'hits': self.item_cache_hits,
+                'misses': self.item_cache_misses,
+                'serial_numbers': len(self._serial_index)
+            }
+
+    def close(self):
+        """Oturumu kapat ve bağlantıları bırak"""
+        self._prefetch_executor.shutdown(wait=False, cancel_futures=True)
+        try:
+            if self._session_expires_at:
+                self.session.post(f"{self.base_url}/Logout", timeout=self.timeout)
+        except Exception as e:
+            self.logger.warning(f"Service Layer çıkışı sırasında hata: {e}")
+        finally:
+            self._session_expires_at = 0.0
+            self.session.close()
@@ -0,0 +1,414 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Mapping, Optional, Tuple
+
+from dto import LabelElements, PayloadError
+from icon_asset_store import IconAssetStore
+from printer_pool import BLUETOOTH_ROLE, CARTON_ROLE
+
+# Rol varyantı tanımlanmamışsa kullanılan ortak yerleşim
+DEFAULT_VARIANT = 'default'
+VARIANT_NAMES = (DEFAULT_VARIANT, BLUETOOTH_ROLE, CARTON_ROLE)
+
+# Şablonun atandığı ürün alanları (arama sırasıyla): kalem kodu, model
+MATCH_ITEM_CODE = 'ItemCode'
+MATCH_MODEL = 'Model'
+
+# Şablonda saklanan yerleşim anahtarları
+_LAYOUT_KEYS = ('textEntries', 'iconEntries', 'barcodeEntries', 'labelSettings')
+
+
+def with_label_size(settings: Dict[str, Any], is_bluetooth_label: bool,
+                    label_size: Optional[Tuple[float, float]]) -> Dict[str, Any]:
+    """Etiket boyutu (mm) verildiyse printer ayarlarındaki rol boyutunun yerine geçer"""
+    if label_size is None:
+        return settings
+    prefix = 'bluetooth' if is_bluetooth_label else 'carton'
+    width, height = label_size
+    return dict(settings, **{f'{prefix}_label_width': width, f'{prefix}_label_height': height})
+
+
+class TemplateVariant:
+    """Şablon versiyonunun bir rol için yerleşimi ve bu yerleşimden derlenmiş planlar"""
+
+    __slots__ = ('template_name', 'version', 'name', 'layout', 'layout_key', 'label_size', 'plans')
+
+    def __init__(self, template_id: str, template_name: str, version: int, name: str, layout: Dict[str, Any]):
+        # Şablon adı ve versiyonu günlüğe yazılır; yarım kalan iş aynı varyantla devam ettirilir
+        self.template_name = template_name
+        self.version = version
+        self.name = name
+        self.layout = layout
+        # Versiyonlar değişmez; derleyici geometri özetini her etikette yeniden hesaplamaz
+        self.layout_key = ('template', template_id, version, name)
+        size = layout.get('labelSettings') or {}
+        self.label_size = (float(size['width']), float(size['height'])) \
+            if size.get('width') and size.get('height') else None
+        # DPI ve etiket boyutu başına derlenmiş planlar (ikonlar ölçeklenmiş halde); şablonla birlikte önbellekte kalır
+        self.plans: Dict[Hashable, Any] = {}
+
+    def settings(self, settings: Dict[str, Any], is_bluetooth_label: bool) -> Dict[str, Any]:
+        """Varyant etiket boyutu tanımlıyorsa printer ayarlarındaki rol boyutunun yerine geçer"""
+        return with_label_size(settings, is_bluetooth_label, self.label_size)
+
+
+class CompiledTemplate:
+    """Tek bir şablon versiyonunun değişmez hali: rol varyantları, JSON gövdesi ve ETag"""
+
+    __slots__ = ('template_id', 'name', 'version', 'variants', 'body', 'etag')
+
+    def __init__(self, template_id: str, name: str, version: int, layouts: Dict[str, Dict[str, Any]]):
+        self.template_id = template_id
+        self.name = name
+        self.version = version
+        self.variants = {variant: TemplateVariant(template_id, name, version, variant, layout)
+                         for variant, layout in layouts.items()}
+        self.body = json.dumps({'name': name, 'version': version, 'variants': layouts},
+                               ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        self.etag = hashlib.sha1(self.body).hexdigest()
+
+    def variant(self, role: str) -> TemplateVariant:
+        """Rolün varyantı; tanımlanmamışsa ortak yerleşim"""
+        return self.variants.get(role) or self.variants[DEFAULT_VARIANT]
+
+
+class _TemplateIndex:
+    """Şablon başlıkları ve ürün eşleşmeleri (revizyon değişene kadar değişmez)"""
+
+    __slots__ = ('revision', 'heads', 'names', 'matches')
+
+    def __init__(self, revision: int, heads: Dict[str, Tuple[str, int]], matches: Dict[Tuple[str, str], str]):
+        self.revision = revision
+        self.heads = heads
+        self.names = {name: template_id for template_id, (name, _) in heads.items()}
+        self.matches = matches
+
+
+class TemplateRegistry:
+    """Ürüne (ItemCode / model) göre seçilen, versiyonlu etiket şablonları ve süreç içi LRU önbelleği"""
+
+    def __init__(self, connection_factory: Callable[[], sqlite3.Connection],
+                 icon_store: IconAssetStore, cache_size: int = 32, version_check_interval: float = 1.0):
+        self.logger = logging.getLogger(__name__)
+        self._connection_factory = connection_factory
+        self._icon_store = icon_store
+        self._cache_size = cache_size
+        self._version_check_interval = version_check_interval
+        self._lock = threading.Lock()
+        self._index: Optional[_TemplateIndex] = None
+        self._last_revision_check = 0.0
+        self._cache: 'OrderedDict[Tuple[str, int], CompiledTemplate]' = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._schema_ready = False
+        self.hits = 0
+        self.misses = 0
+        self.unmatched = 0
+
+    def _ensure_schema(self, conn: sqlite3.Connection):
+        """Şablon tablolarını gerekiyorsa oluştur"""
+        if self._schema_ready:
+            return
+        in_transaction = conn.in_transaction
+        self._icon_store.ensure_schema(conn)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS "LabelTemplate" (
+                "Id" TEXT NOT NULL CONSTRAINT "PK_LabelTemplate" PRIMARY KEY,
+                "Name" TEXT NOT NULL,
+                "Version" INTEGER NOT NULL,
+                "UpdatedAt" TEXT NOT NULL
+            )
+        """)
+        conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS "IX_LabelTemplate_Name" ON "LabelTemplate" ("Name")')
+        # Her versiyon ayrı satırlarda saklanır ve değiştirilmez
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS "LabelTemplateVariant" (
+                "TemplateId" TEXT NOT NULL,
+                "Version" INTEGER NOT NULL,
+                "Variant" TEXT NOT NULL,
+                "Layout" TEXT NOT NULL,
+                CONSTRAINT "PK_LabelTemplateVariant" PRIMARY KEY ("TemplateId", "Version", "Variant")
+            )
+        """)
+        # Kalem kodu / model başına tek şablon; arama birincil anahtar üzerinden yapılır
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS "LabelTemplateMatch" (
+                "MatchType" TEXT NOT NULL,
+                "MatchValue" TEXT NOT NULL,
+                "TemplateId" TEXT NOT NULL,
+                CONSTRAINT "PK_LabelTemplateMatch" PRIMARY KEY ("MatchType", "MatchValue")
+            ) WITHOUT ROWID
+        """)
+        conn.execute('CREATE INDEX IF NOT EXISTS "IX_LabelTemplateMatch_TemplateId" '
+                     'ON "LabelTemplateMatch" ("TemplateId")')
+        # Herhangi bir şablon veya eşleşme değiştiğinde artar; diğer süreçler yalnızca bu satırı kontrol eder
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS "LabelTemplateRevision" (
+                "Id" INTEGER NOT NULL CONSTRAINT "PK_LabelTemplateRevision" PRIMARY KEY,
+                "Revision" INTEGER NOT NULL
+            )
+        """)
+        conn.execute('INSERT OR IGNORE INTO "LabelTemplateRevision" ("Id", "Revision") VALUES (1, 1)')
+        # Çağıranın açık işlemi varsa commit kararını ona bırak
+        if not in_transaction:
+            conn.commit()
+        self._schema_ready = True
+
+    def _read_revision(self, conn: sqlite3.Connection) -> int:
+        row = conn.execute('SELECT "Revision" FROM "LabelTemplateRevision" WHERE "Id" = 1').fetchone()
+        return int(row[0]) if row else 1
+
+    def _load_index(self, conn: sqlite3.Connection) -> _TemplateIndex:
+        """Şablon başlıklarını ve eşleşmeleri tek bir okuma işleminde yükle"""
+        conn.execute('BEGIN')
+        try:
+            revision = self._read_revision(conn)
+            heads = {row[0]: (row[1], int(row[2])) for row in
+                     conn.execute('SELECT "Id", "Name", "Version" FROM "LabelTemplate"')}
+            matches = {(row[0], row[1]): row[2] for row in
+                       conn.execute('SELECT "MatchType", "MatchValue", "TemplateId" FROM "LabelTemplateMatch"')}
+        finally:
+            conn.commit()
+        return _TemplateIndex(revision, heads, matches)
+
+    def _current_index(self) -> _TemplateIndex:
+        """Önbellekteki indeksi döndür, revizyon değiştiyse yeniden yükle"""
+        now = time.monotonic()
+        index = self._index
+        if index is not None and now - self._last_revision_check < self._version_check_interval:
+            return index
+
+        with self._lock:
+            index = self._index
+            if index is not None and now - self._last_revision_check < self._version_check_interval:
+                return index
+
+            conn = self._connection_factory()
+            try:
+                self._ensure_schema(conn)
+                # Başka bir süreç kaydetmiş olabilir; sadece revizyon satırını kontrol et
+                if index is None or self._read_revision(conn) != index.revision:
+                    index = self._load_index(conn)
+                    self._index = index
+                    self.logger.info(f"Şablon indeksi yüklendi: {len(index.heads)} şablon, "
+                                     f"{len(index.matches)} eşleşme (revizyon {index.revision})")
+                self._last_revision_check = now
+                return index
+            finally:
+                conn.close()
+
+    def resolve(self, item_code: Optional[str] = None, model: Optional[str] = None) -> Optional[CompiledTemplate]:
+        """Ürüne atanmış şablonun güncel versiyonu (önce kalem kodu, sonra model); eşleşme yoksa None"""
+        index = self._current_index()
+        template_id = None
+        if item_code:
+            template_id = index.matches.get((MATCH_ITEM_CODE, str(item_code)))
+        if template_id is None and model:
+            template_id = index.matches.get((MATCH_MODEL, str(model)))
+        if template_id is None or template_id not in index.heads:
+            self.unmatched += 1
+            return None
+        return self._compiled(template_id, index.heads[template_id])
+
+    def get(self, name: str, version: Optional[int] = None) -> Optional[CompiledTemplate]:
+        """Şablonu adıyla getir (versiyon verilmezse güncel versiyon)"""
+        index = self._current_index()
+        template_id = index.names.get(name)
+        if template_id is None:
+            return None
+        head_name, head_version = index.heads[template_id]
+        if version is not None and not 1 <= version <= head_version:
+            return None
+        return self._compiled(template_id, (head_name, version or head_version))
+
+    def _compiled(self, template_id: str, head: Tuple[str, int]) -> Optional[CompiledTemplate]:
+        name, version = head
+        key = (template_id, version)
+        with self._cache_lock:
+            template = self._cache.get(key)
+            if template is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return template
+            self.misses += 1
+
+        conn = self._connection_factory()
+        try:
+            layouts = {row[0]: json.loads(row[1]) for row in conn.execute(
+                'SELECT "Variant", "Layout" FROM "LabelTemplateVariant" WHERE "TemplateId" = ? AND "Version" = ?',
+                (template_id, version)
+            )}
+        finally:
+            conn.close()
+        if not layouts:
+            return None
+        template = CompiledTemplate(template_id, name, version, layouts)
+
+        with self._cache_lock:
+            self._cache[key] = template
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return template
+
+    def preload(self, limit: Optional[int] = None) -> List[CompiledTemplate]:
+        """Eşleşmesi olan şablonların güncel versiyonlarını önbelleğe al (ısınma)"""
+        index = self._current_index()
+        matched = list(dict.fromkeys(index.matches.values()))
+        limit = self._cache_size if limit is None else limit
+        templates = [self._compiled(template_id, index.heads[template_id])
+                     for template_id in matched[:limit] if template_id in index.heads]
+        return [template for template in templates if template is not None]
+
+    def save_template(self, name: str, variants: Any, item_codes: Optional[Iterable[str]] = None,
+                      models: Optional[Iterable[str]] = None) -> Tuple[int, bool]:
+        """Şablonu kaydet; yerleşim değiştiyse yeni versiyon oluşturur. (versiyon, değişti mi) döndürür"""
+        if not isinstance(name, str) or not name.strip():
+            raise PayloadError("'name' is required")
+        name = name.strip()
+        layouts = self._normalize_variants(variants)
+        # Verilmeyen eşleşme türü olduğu gibi kalır, boş liste eşleşmeleri kaldırır
+        matches = []
+        for match_type, key, values in ((MATCH_ITEM_CODE, 'itemCodes', item_codes), (MATCH_MODEL, 'models', models)):
+            if values is None:
+                continue
+            if not isinstance(values, list) or not all(isinstance(value, str) and value for value in values):
+                raise PayloadError(f"'{key}' must be a list of strings")
+            matches.append((match_type, values))
+
+        conn = self._connection_factory()
+        try:
+            self._ensure_schema(conn)
+            # Yazma kilidini baştan al; versiyon karşılaştırma ve yazma aynı işlemde kalsın
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                # Yeni yüklenen ikonları depoya al, şablonda sadece özet kalsın
+                for layout in layouts.values():
+                    for entry in layout['iconEntries']:
+                        base64_string = entry.pop('base64String', None)
+                        if base64_string:
+                            entry['assetHash'] = self._icon_store.put_base64(conn, base64_string)
+
+                row = conn.execute('SELECT "Id", "Version" FROM "LabelTemplate" WHERE "Name" = ?', (name,)).fetchone()
+                template_id, version = (row[0], int(row[1])) if row else (str(uuid.uuid4()), 0)
+                stored = {variant: json.loads(layout) for variant, layout in conn.execute(
+                    'SELECT "Variant", "Layout" FROM "LabelTemplateVariant" WHERE "TemplateId" = ? AND "Version" = ?',
+                    (template_id, version)
+                )}
+
+                changed = stored != layouts
+                if changed:
+                    version += 1
+                    conn.executemany(
+                        'INSERT INTO "LabelTemplateVariant" ("TemplateId", "Version", "Variant", "Layout") '
+                        'VALUES (?, ?, ?, ?)',
+                        [(template_id, version, variant, json.dumps(layout, ensure_ascii=False, separators=(',', ':')))
+                         for variant, layout in layouts.items()]
+                    )
+                    conn.execute(
+                        'INSERT INTO "LabelTemplate" ("Id", "Name", "Version", "UpdatedAt") VALUES (?, ?, ?, ?) '
+                        'ON CONFLICT("Id") DO UPDATE SET "Version" = excluded."Version", '
+                        '"UpdatedAt" = excluded."UpdatedAt"',
+                        (template_id, name, version, datetime.now().isoformat())
+                    )
+
+                for match_type, values in matches:
+                    current = {row[0] for row in conn.execute(
+                        'SELECT "MatchValue" FROM "LabelTemplateMatch" WHERE "MatchType" = ? AND "TemplateId" = ?',
+                        (match_type, template_id)
+                    )}
+                    if current == set(values):
+                        continue
+                    changed = True
+                    conn.execute('DELETE FROM "LabelTemplateMatch" WHERE "MatchType" = ? AND "TemplateId" = ?',
+                                 (match_type, template_id))
+                    # Başka şablona atanmış kalem kodu / model bu şablona taşınır
+                    conn.executemany(
+                        'INSERT OR REPLACE INTO "LabelTemplateMatch" ("MatchType", "MatchValue", "TemplateId") '
+                        'VALUES (?, ?, ?)',
+                        [(match_type, value, template_id) for value in values]
+                    )
+
+                if changed:
+                    conn.execute('UPDATE "LabelTemplateRevision" SET "Revision" = "Revision" + 1 WHERE "Id" = 1')
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        finally:
+            conn.close()
+
+        if changed:
+            self.invalidate()
+        self.logger.info(f"Şablon kaydedildi: {name} (versiyon {version}, "
+                         f"{'değişti' if changed else 'değişmedi'})")
+        return version, changed
+
+    @staticmethod
+    def _normalize_variants(variants: Any) -> Dict[str, Dict[str, Any]]:
+        """Varyantları doğrula ve yalnızca yerleşim anahtarlarını içeren sözlüklere çevir"""
+        if not isinstance(variants, Mapping) or not variants:
+            raise PayloadError("'variants' must be a non-empty object")
+        unknown = [variant for variant in variants if variant not in VARIANT_NAMES]
+        if unknown:
+            raise PayloadError(f"Unknown template variant: {', '.join(map(str, unknown))}")
+        if DEFAULT_VARIANT not in variants and not all(role in variants for role in (BLUETOOTH_ROLE, CARTON_ROLE)):
+            raise PayloadError(f"'variants' must define '{DEFAULT_VARIANT}' or both "
+                               f"'{BLUETOOTH_ROLE}' and '{CARTON_ROLE}'")
+
+        layouts = {}
+        for variant, layout in variants.items():
+            # Çizim elemanları yazdırmadaki gibi doğrulanır; hatalı şablon kaydedilmez
+            LabelElements.from_payload(layout)
+            label_settings = layout.get('labelSettings') or {}
+            if not isinstance(label_settings, Mapping) or not all(
+                    isinstance(label_settings.get(key, 0), (int, float)) for key in ('width', 'height')):
+                raise PayloadError(f"'variants.{variant}.labelSettings' must have numeric width and height")
+            # Kopyalanır; ikon verisi depoya alınırken istek gövdesi değişmez
+            layouts[variant] = json.loads(json.dumps({
+                key: layout.get(key, {} if key == 'labelSettings' else []) for key in _LAYOUT_KEYS
+            }))
+        return layouts
+
+    def list_templates(self) -> List[Dict[str, Any]]:
+        """Tüm şablonlar, güncel versiyonları ve eşleşmeleri"""
+        conn = self._connection_factory()
+        try:
+            self._ensure_schema(conn)
+            templates = {row[0]: {'name': row[1], 'version': row[2], 'updatedAt': row[3],
+                                  'variants': [], 'itemCodes': [], 'models': []}
+                         for row in conn.execute('SELECT "Id", "Name", "Version", "UpdatedAt" '
+                                                 'FROM "LabelTemplate" ORDER BY "Name"')}
+            for template_id, variant in conn.execute(
+                    'SELECT v."TemplateId", v."Variant" FROM "LabelTemplateVariant" v '
+                    'JOIN "LabelTemplate" t ON t."Id" = v."TemplateId" AND t."Version" = v."Version"'):
+                templates[template_id]['variants'].append(variant)
+            for match_type, value, template_id in conn.execute(
+                    'SELECT "MatchType", "MatchValue", "TemplateId" FROM "LabelTemplateMatch" ORDER BY "MatchValue"'):
+                if template_id in templates:
+                    templates[template_id]['itemCodes' if match_type == MATCH_ITEM_CODE else 'models'].append(value)
+        finally:
+            conn.close()
+        return list(templates.values())
+
+    def invalidate(self):
+        """Şablon indeksini yeniden yüklet (versiyonlar değişmez, derlenmiş şablonlar önbellekte kalır)"""
+        with self._lock:
+            self._last_revision_check = 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        index = self._index
+        with self._cache_lock:
+            entries = len(self._cache)
+        return {
+            'templates': len(index.heads) if index is not None else None,
+            'entries': entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'unmatched': self.unmatched
+        }
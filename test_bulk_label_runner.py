@@ -0,0 +1,52 @@
+import json
+
+import pytest
+
+from bulk_label_runner import BulkLabelRunner
+from print_journal import PrintJournal
+
+
+@pytest.fixture
+def journal(tmp_path):
+    journal = PrintJournal(str(tmp_path / 'journal.db'))
+    yield journal
+    journal.close()
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / 'records.jsonl'
+    path.write_text(''.join(json.dumps({'SerialNumber': f'SN{index}'}) + '\n' for index in range(3)),
+                    encoding='utf-8')
+    return str(path)
+
+
+def make_runner(journal, rendered, printed):
+    def render(record):
+        rendered.append(record['SerialNumber'])
+        return {'carton': record['SerialNumber']}
+
+    def print_rendered(role, targets):
+        printed.append(targets)
+        return True
+
+    return BulkLabelRunner(render, print_rendered, journal=journal)
+
+
+def test_records_printed_after_checkpoint_are_not_rendered_again(tmp_path, journal, source):
+    rendered, printed = [], []
+    checkpoint_path = str(tmp_path / 'checkpoint.json')
+    assert make_runner(journal, rendered, printed).run(source, checkpoint_path)
+    assert printed == ['SN0', 'SN1', 'SN2']
+
+    # Önceki çalıştırma checkpoint yazamadan durmuş gibi: yalnızca günlük basıldığını biliyor
+    (tmp_path / 'checkpoint.json').unlink()
+    rendered.clear()
+    runner = make_runner(journal, rendered, printed)
+
+    assert runner.run(source, checkpoint_path)
+    assert rendered == []
+    assert printed == ['SN0', 'SN1', 'SN2']
+    assert runner.progress()['skipped'] == 3
+    with open(checkpoint_path, encoding='utf-8') as f:
+        assert json.load(f)['last_printed'] == 2
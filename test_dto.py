@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+from dto import MAX_COORDINATE_MM, MAX_FONT_SIZE_MM, LabelElements, PayloadError
+
+
+def text_payload(**entry):
+    return {'textEntries': [dict({'text': 'SN1', 'x': 1, 'y': 1}, **entry)]}
+
+
+def test_numeric_strings_are_accepted():
+    elements = LabelElements.from_payload(text_payload(fontSize='10.5', x='2', y=3))
+
+    text = elements.texts[0]
+    assert (text.font_size, text.x_coordinate, text.y_coordinate) == (10.5, 2.0, 3)
+
+
+@pytest.mark.parametrize('entry', [
+    {'fontSize': 'nan'},
+    {'fontSize': 'NaN'},
+    {'x': 'inf'},
+    {'y': '-inf'},
+    {'x': float('nan')},
+    {'y': float('inf')},
+])
+def test_non_finite_numbers_are_rejected(entry):
+    with pytest.raises(PayloadError, match='finite'):
+        LabelElements.from_payload(text_payload(**entry))
+
+
+def test_json_nan_and_infinity_are_rejected():
+    # json.loads NaN/Infinity değişmezlerini float olarak okur
+    payload = json.loads('{"textEntries": [{"text": "SN1", "x": Infinity, "y": NaN}]}')
+    with pytest.raises(PayloadError, match=r"'textEntries\[0\]\.x' must be a finite number"):
+        LabelElements.from_payload(payload)
+
+
+@pytest.mark.parametrize('entry, message', [
+    ({'fontSize': MAX_FONT_SIZE_MM + 1}, 'fontSize'),
+    ({'fontSize': -1}, 'fontSize'),
+    ({'x': MAX_COORDINATE_MM + 1}, 'x'),
+    ({'y': -MAX_COORDINATE_MM - 1}, 'y'),
+    ({'x': 10 ** 400}, 'x'),
+])
+def test_out_of_range_numbers_are_rejected(entry, message):
+    with pytest.raises(PayloadError, match=message):
+        LabelElements.from_payload(text_payload(**entry))
+
+
+def test_barcode_and_icon_sizes_are_bounded():
+    with pytest.raises(PayloadError, match='textFontSize'):
+        LabelElements.from_payload({'barcodeEntries': [{'barcodeData': '1', 'textFontSize': 'inf'}]})
+    with pytest.raises(PayloadError, match='width'):
+        LabelElements.from_payload({'iconEntries': [{'assetHash': 'h1', 'width': 1e9}]})
+
+
+def test_icon_without_image_is_skipped():
+    elements = LabelElements.from_payload({'iconEntries': [{'x': 1, 'y': 1}]})
+    assert elements.icons == ()
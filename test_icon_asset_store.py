@@ -0,0 +1,75 @@
+import base64
+import multiprocessing
+import sqlite3
+
+from icon_asset_store import IconAssetStore
+
+ICONS = {f'icon-{index}': b'\x89PNG\r\n\x1a\n' + bytes([index]) * 16 for index in range(20)}
+
+
+def create_legacy_database(db_path: str):
+    """Base64String kolonlu eski IconInfo tablosu"""
+    conn = sqlite3.connect(db_path)
+    conn.execute("""
+        CREATE TABLE "IconInfo" (
+            "Id" TEXT NOT NULL CONSTRAINT "PK_IconInfo" PRIMARY KEY,
+            "Base64String" TEXT NOT NULL,
+            "XCoordinate" INTEGER NOT NULL,
+            "YCoordinate" INTEGER NOT NULL,
+            "Width" INTEGER NOT NULL,
+            "Height" INTEGER NOT NULL
+        )
+    """)
+    conn.executemany('INSERT INTO "IconInfo" VALUES (?, ?, 0, 0, 10, 10)',
+                     [(icon_id, base64.b64encode(data).decode('ascii')) for icon_id, data in ICONS.items()])
+    conn.commit()
+    conn.close()
+
+
+def migrate_worker(db_path: str, barrier, errors):
+    store = IconAssetStore(lambda: sqlite3.connect(db_path, timeout=10))
+    barrier.wait()
+    try:
+        conn = store._connection_factory()
+        try:
+            store.ensure_schema(conn)
+        finally:
+            conn.close()
+    except Exception as e:
+        errors.put(repr(e))
+
+
+def test_legacy_icons_are_migrated(tmp_path):
+    db_path = str(tmp_path / 'labels.db')
+    create_legacy_database(db_path)
+    store = IconAssetStore(lambda: sqlite3.connect(db_path))
+
+    conn = sqlite3.connect(db_path)
+    store.ensure_schema(conn)
+    rows = conn.execute('SELECT "Id", "AssetHash", "Base64String" FROM "IconInfo"').fetchall()
+    conn.close()
+
+    assert all(base64_string == '' for _, _, base64_string in rows)
+    assert {icon_id: store.load_bytes(asset_hash) for icon_id, asset_hash, _ in rows} == ICONS
+
+
+def test_concurrent_workers_migrate_once(tmp_path):
+    db_path = str(tmp_path / 'labels.db')
+    create_legacy_database(db_path)
+    barrier = multiprocessing.Barrier(4)
+    errors = multiprocessing.Queue()
+    workers = [multiprocessing.Process(target=migrate_worker, args=(db_path, barrier, errors)) for _ in range(4)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=30)
+
+    assert all(worker.exitcode == 0 for worker in workers)
+    assert errors.empty()
+    conn = sqlite3.connect(db_path)
+    columns = [row[1] for row in conn.execute('PRAGMA table_info("IconInfo")')]
+    migrated = conn.execute('SELECT COUNT(*) FROM "IconInfo" WHERE "AssetHash" IS NOT NULL').fetchone()[0]
+    assets = conn.execute('SELECT COUNT(*) FROM "IconAsset"').fetchone()[0]
+    conn.close()
+    assert columns.count('AssetHash') == 1
+    assert migrated == assets == len(ICONS)
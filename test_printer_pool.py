@@ -0,0 +1,158 @@
+import threading
+import time
+
+import pytest
+
+from mock_printer import MockTSCLib
+from printer_pool import CARTON_ROLE, PrinterPool, PrintUncertain
+from printer_status import ERROR_MASK, PrinterStatusMonitor, decode_status
+
+PRINTERS = ['carton-1', 'carton-2']
+
+
+@pytest.fixture
+def lib():
+    return MockTSCLib(time_scale=0)
+
+
+def query(lib: MockTSCLib, name: str) -> int:
+    lib.openport(name.encode('utf-8'))
+    try:
+        return lib.usbportqueryprinter()
+    finally:
+        lib.closeport()
+
+
+def make_monitor(lib: MockTSCLib, recovered=None) -> PrinterStatusMonitor:
+    return PrinterStatusMonitor(PRINTERS, query=lambda name: query(lib, name), interval=0.01,
+                                on_recovered=recovered)
+
+
+def make_pool(lib: MockTSCLib, monitor: PrinterStatusMonitor, names=PRINTERS, **kwargs) -> PrinterPool:
+    def print_func(name: str, job, is_bluetooth_label: bool, copies: int) -> bool:
+        # app.print_job gibi: gönder, ardından durum sorgula; gönderimden sonra hata varsa sonuç belirsizdir
+        lib.openport(name.encode('utf-8'))
+        try:
+            lib.sendcommand(f'PRINT 1,{copies}'.encode('ascii'))
+        finally:
+            lib.closeport()
+        status = monitor.refresh(name)
+        if status is not None and status.error:
+            raise PrintUncertain(name, f"{name}: {', '.join(decode_status(status.code))}")
+        return True
+
+    return PrinterPool({CARTON_ROLE: list(names)}, print_func=print_func, default_dpi=300,
+                       availability=monitor.is_available, busy=monitor.is_busy, **kwargs)
+
+
+def test_status_bits_decode_to_errors(lib):
+    monitor = make_monitor(lib)
+    assert not monitor.refresh('carton-1').error
+
+    lib.printer('carton-1').paused = True
+    status = monitor.refresh('carton-1')
+    assert status.error and decode_status(status.code) == ['paused']
+    # 'printing' biti yalnızca meşgul demektir
+    assert not 0x20 & ERROR_MASK
+
+
+def test_error_printer_is_skipped_for_failover(lib):
+    lib.printer('carton-1').head_open = True
+    monitor = make_monitor(lib)
+    for name in PRINTERS:
+        monitor.refresh(name)
+    pool = make_pool(lib, monitor)
+
+    assert pool.dispatch(CARTON_ROLE, {300: 'label'})
+    assert lib.printer('carton-1').labels_printed == 0
+    assert lib.printer('carton-2').labels_printed == 1
+
+
+def test_job_is_held_until_printer_recovers(lib):
+    lib.printer('carton-1').out_of_paper = True
+    recovered = []
+    monitor = make_monitor(lib, recovered.append)
+    monitor.refresh('carton-1')
+    pool = make_pool(lib, monitor, names=['carton-1'], hold_timeout=5.0, hold_interval=0.01)
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(success=pool.dispatch(CARTON_ROLE, {300: 'label'})))
+    thread.start()
+
+    time.sleep(0.1)
+    assert thread.is_alive() and lib.printer('carton-1').labels_printed == 0
+    # Rulo takıldı; izleyici düzeldiğini görünce bekleyen iş basılır
+    lib.printer('carton-1').refill()
+    monitor.refresh('carton-1')
+    thread.join(timeout=2)
+
+    assert result == {'success': True}
+    assert recovered == ['carton-1']
+    assert lib.printer('carton-1').labels_printed == 1
+
+
+def test_hold_gives_up_after_timeout(lib):
+    lib.printer('carton-1').paused = True
+    monitor = make_monitor(lib)
+    monitor.refresh('carton-1')
+    pool = make_pool(lib, monitor, names=['carton-1'], hold_timeout=0.05, hold_interval=0.01)
+
+    assert not pool.dispatch(CARTON_ROLE, {300: 'label'})
+    assert lib.printer('carton-1').labels_printed == 0
+
+
+def test_busy_printer_is_skipped_for_idle_one(lib):
+    lib.printer('carton-1').printing = True
+    monitor = make_monitor(lib)
+    status = monitor.refresh('carton-1')
+    assert status.busy and not status.error
+    pool = make_pool(lib, monitor)
+
+    assert pool.dispatch(CARTON_ROLE, {300: 'label'})
+    assert lib.printer('carton-1').labels_printed == 0
+    assert lib.printer('carton-2').labels_printed == 1
+
+
+def test_job_is_held_while_printer_is_busy(lib):
+    lib.printer('carton-1').printing = True
+    monitor = make_monitor(lib)
+    monitor.refresh('carton-1')
+    pool = make_pool(lib, monitor, names=['carton-1'], hold_timeout=5.0, hold_interval=0.01)
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(success=pool.dispatch(CARTON_ROLE, {300: 'label'})))
+    thread.start()
+
+    time.sleep(0.1)
+    assert thread.is_alive() and lib.printer('carton-1').labels_printed == 0
+    # Önceki baskı bitti; bekleyen iş printer tekrar sorgulanınca gönderilir
+    lib.printer('carton-1').printing = False
+    thread.join(timeout=2)
+
+    assert result == {'success': True}
+    assert lib.printer('carton-1').labels_printed == 1
+
+
+def test_busy_printer_gets_job_after_hold_timeout(lib):
+    lib.printer('carton-1').printing = True
+    monitor = make_monitor(lib)
+    monitor.refresh('carton-1')
+    pool = make_pool(lib, monitor, names=['carton-1'], hold_timeout=0.05, hold_interval=0.01)
+
+    # Meşgul printer hata bildirmiyor: süre dolunca iş düşürülmez, printer'ın buffer'ına gider
+    assert pool.dispatch(CARTON_ROLE, {300: 'label'})
+    assert lib.printer('carton-1').labels_printed == 1
+
+
+def test_error_after_send_is_not_failed_over(lib):
+    # Rulo bu etikette biter: komut kabul edilir, durum ardından out_of_paper bildirir
+    lib.printer('carton-1').media_remaining = 0
+    monitor = make_monitor(lib)
+    # Yükleri eşit printer'lardan ilki (carton-1) seçilir
+    pool = make_pool(lib, monitor)
+
+    with pytest.raises(PrintUncertain) as error:
+        pool.dispatch(CARTON_ROLE, {300: 'label'})
+
+    assert error.value.printer_name == 'carton-1'
+    assert lib.printer('carton-2').labels_printed == 0
+    assert not monitor.is_available('carton-1')
+    assert not [state for state in pool.stats() if state['name'] == 'carton-1'][0]['healthy']
@@ -0,0 +1,76 @@
+import os
+import queue
+
+import pytest
+
+pty = pytest.importorskip('pty')
+
+from serial_scanner_service import SerialScannerService
+
+
+@pytest.fixture
+def scanner():
+    """Sahte seri port (pty) üzerinde çalışan okuyucu; testler master ucuna yazar"""
+    master, slave = pty.openpty()
+    scans: 'queue.Queue[str]' = queue.Queue()
+    services = []
+
+    def start(debounce_seconds: float = 1.0) -> SerialScannerService:
+        service = SerialScannerService({
+            'port_name': os.ttyname(slave),
+            'baud_rate': 9600,
+            'parity': 'None',
+            'data_bits': 8,
+            'stop_bits': 'One'
+        }, on_scan=scans.put, debounce_seconds=debounce_seconds)
+        service.start()
+        services.append(service)
+        return service
+
+    def write(data: bytes):
+        os.write(master, data)
+
+    def read(count: int):
+        return [scans.get(timeout=2) for _ in range(count)]
+
+    yield start, write, read, scans
+    for service in services:
+        service.stop()
+    os.close(master)
+    os.close(slave)
+
+
+def test_codes_are_framed_by_cr_lf_and_crlf(scanner):
+    start, write, read, scans = scanner
+    service = start()
+
+    write(b'SN1\r\nSN2\nSN3\r')
+    # Kod birden fazla parçada gelebilir
+    write(b'SN')
+    write(b'4\n')
+
+    assert read(4) == ['SN1', 'SN2', 'SN3', 'SN4']
+    assert scans.empty()
+    assert service.stats()['scans_received'] == 4
+
+
+def test_repeated_code_within_debounce_is_dropped(scanner):
+    start, write, read, scans = scanner
+    service = start(debounce_seconds=5.0)
+
+    write(b'SN1\rSN1\rSN2\rSN1\r')
+
+    # Aynı kodun art arda tekrarı elenir, araya başka kod girince tekrar kabul edilir
+    assert read(3) == ['SN1', 'SN2', 'SN1']
+    assert service.duplicates_dropped == 1
+
+
+def test_repeated_code_after_debounce_is_accepted(scanner):
+    start, write, read, scans = scanner
+    service = start(debounce_seconds=0.0)
+
+    write(b'SN1\r')
+    assert read(1) == ['SN1']
+    write(b'SN1\r')
+    assert read(1) == ['SN1']
+    assert service.duplicates_dropped == 0
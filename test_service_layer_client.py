@@ -0,0 +1,161 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from service_layer_client import ServiceLayerClient, ServiceLayerError
+
+SERIALS = [{'SerialNumber': f'SN{index}', 'ItemCode': 'IC1'} for index in range(5)]
+
+
+class FakeServiceLayer(ThreadingHTTPServer):
+    """Login, oturum çerezi, sayfalama ve 401 davranışını taklit eden yerel Service Layer"""
+
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), FakeServiceLayerHandler)
+        self.sessions = set()
+        self.logins = 0
+        self.requests = []
+        self.page_size = 2
+
+    @property
+    def base_url(self) -> str:
+        return f'http://127.0.0.1:{self.server_address[1]}/b1s/v1'
+
+    def drop_sessions(self):
+        """Sunucu tarafında oturumları düşür (ör. Service Layer yeniden başladı)"""
+        self.sessions.clear()
+
+
+class FakeServiceLayerHandler(BaseHTTPRequestHandler):
+    server: FakeServiceLayer
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status: int, body, headers=()):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _session(self):
+        cookies = dict(part.strip().split('=', 1) for part in (self.headers.get('Cookie') or '').split(';') if '=' in part)
+        return cookies.get('B1SESSION')
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        if self.path.endswith('/Login'):
+            if body.get('Password') != 'secret':
+                self._reply(401, {'error': {'message': 'Invalid credentials'}})
+                return
+            self.server.logins += 1
+            session = f'session-{self.server.logins}'
+            self.server.sessions.add(session)
+            self._reply(200, {'SessionId': session, 'SessionTimeout': 30},
+                        headers=[('Set-Cookie', f'B1SESSION={session}; Path=/b1s/v1')])
+            return
+        self._reply(404, {})
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        self.server.requests.append(self.path)
+        if self._session() not in self.server.sessions:
+            self._reply(401, {'error': {'message': 'Invalid session'}})
+            return
+        query = parse_qs(url.query)
+        if url.path.endswith('/SerialNumberDetails'):
+            skip = int(query.get('$skip', ['0'])[0])
+            page = SERIALS[skip:skip + self.server.page_size]
+            body = {'value': page}
+            if skip + self.server.page_size < len(SERIALS):
+                # Service Layer nextLink'i base_url'e göreli ve parametreleriyle birlikte döndürür
+                body['odata.nextLink'] = f"SerialNumberDetails?$select={query['$select'][0]}" \
+                                         f"&$skip={skip + self.server.page_size}"
+            self._reply(200, body)
+        elif url.path.endswith("/Items('IC1')"):
+            self._reply(200, {'odata.metadata': 'meta', 'ItemCode': 'IC1', 'BarCode': '8690000000001'})
+        else:
+            self._reply(404, {})
+
+
+@pytest.fixture
+def server():
+    server = FakeServiceLayer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(server):
+    client = ServiceLayerClient({
+        'base_url': server.base_url,
+        'company_db': 'TEST',
+        'username': 'manager',
+        'password': 'secret',
+        'select_serial_number_columns': 'SerialNumber,ItemCode',
+        'select_ean_columns': 'ItemCode,BarCode',
+        'item_cache_ttl': 0.2,
+        'timeout': 5
+    })
+    yield client
+    client.close()
+
+
+def test_login_is_reused_between_requests(server, client):
+    client.get_item('IC1')
+    client.fetch_serial_numbers()
+    assert server.logins == 1
+
+
+def test_relogin_after_server_drops_session(server, client):
+    client.fetch_serial_numbers()
+    server.drop_sessions()
+
+    records = client.fetch_serial_numbers()
+
+    assert [record['SerialNumber'] for record in records] == [record['SerialNumber'] for record in SERIALS]
+    assert server.logins == 2
+
+
+def test_failed_login_raises(server, client):
+    client.password = 'wrong'
+    with pytest.raises(ServiceLayerError):
+        client.get_item('IC1')
+
+
+def test_next_link_pages_are_followed(server, client):
+    records = client.fetch_serial_numbers()
+
+    assert [record['SerialNumber'] for record in records] == [record['SerialNumber'] for record in SERIALS]
+    assert len(server.requests) == 3
+    # Sonraki sayfalarda parametreler nextLink'ten gelir, tekrar eklenmez
+    assert all(request.count('%24select') + request.count('$select') == 1 for request in server.requests)
+    assert client.find_serial('SN3') == SERIALS[3]
+    assert len(server.requests) == 3
+
+
+def test_item_cache_hits_until_ttl_expires(server, client):
+    first = client.get_item('IC1')
+    second = client.get_item('IC1')
+
+    assert first == second == {'ItemCode': 'IC1', 'BarCode': '8690000000001'}
+    assert len(server.requests) == 1
+    assert client.stats()['hits'] == 1
+
+    time.sleep(0.25)
+    client.get_item('IC1')
+    assert len(server.requests) == 2
+    assert client.stats()['misses'] == 2
@@ -0,0 +1,56 @@
+import pytest
+
+from config import Config
+from mock_printer import MockTSCLib
+from template_registry import with_label_size
+from tsc_printer_service import TSCPrinterService
+
+
+class RecordingTSCLib(MockTSCLib):
+    """Gönderilen TSPL komutlarını da kaydeden sahte printer"""
+
+    def __init__(self):
+        super().__init__(time_scale=0)
+        self.commands = []
+
+    def sendcommand(self, command: bytes):
+        self.commands.append(command.decode('utf-8'))
+        super().sendcommand(command)
+
+
+@pytest.fixture
+def lib():
+    return RecordingTSCLib()
+
+
+@pytest.fixture
+def settings(tmp_path):
+    return dict(Config.PRINTER_SETTINGS, printer_lock_dir=str(tmp_path / 'locks'))
+
+
+@pytest.fixture
+def label_file(tmp_path):
+    path = tmp_path / 'label.bmp'
+    path.write_bytes(b'BM' + bytes(64))
+    return str(path)
+
+
+@pytest.mark.parametrize('is_bluetooth_label', [True, False])
+def test_variant_label_size_is_sent_as_size(lib, settings, label_file, is_bluetooth_label):
+    service = TSCPrinterService(library=lib)
+    # Kare olmayan varyant boyutu: yükseklik genişlikten ayrı gönderilmeli
+    variant_settings = with_label_size(settings, is_bluetooth_label, (80.0, 29.0))
+
+    assert service.print_label(label_file, variant_settings, is_bluetooth_label=is_bluetooth_label,
+                               printer_name='printer-1')
+
+    assert [command for command in lib.commands if command.startswith('SIZE ')] == ['SIZE 80.0 mm, 29.0 mm']
+    assert lib.printer('printer-1').label_height_mm == 29.0
+
+
+def test_role_size_from_settings_is_sent_without_variant(lib, settings, label_file):
+    service = TSCPrinterService(library=lib)
+
+    assert service.print_label(label_file, settings, is_bluetooth_label=False, printer_name='printer-1')
+
+    assert f"SIZE {settings['carton_label_width']} mm, {settings['carton_label_height']} mm" in lib.commands
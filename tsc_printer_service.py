@@ -1,28 +1,67 @@
 import ctypes
 import os
-from typing import Dict, Any
+import threading
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Dict, Any, Optional
 import logging
 
+from logging_setup import PER_LABEL
+from printer_lock import PrinterLock, PrinterLockTimeout
+
+if TYPE_CHECKING:
+    from printer_worker import PrinterWorkerPool
+
 class TSCPrinterService:
-    def __init__(self):
-        # Logger'ı UTF-8 encoding ile yapılandır
+    def __init__(self, lazy: bool = False, library: Optional[Any] = None,
+                 io_workers: Optional['PrinterWorkerPool'] = None):
+        # Kayıtlar root logger'daki kuyruk üzerinden yazılır (logging_setup)
         self.logger = logging.getLogger(__name__)
         
-        # Eğer handler yoksa ekle
-        if not self.logger.handlers:
-            import sys
-            handler = logging.StreamHandler(sys.stdout)
-            handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
-            self.logger.addHandler(handler)
-            self.logger.setLevel(logging.INFO)
+        # TSCLIB tek bir açık port durumu tutar; komut akışları iç içe geçmemeli
+        self._port_lock = threading.Lock()
         
-        # TSCLIB.dll fonksiyonlarını yükle
-        try:
-            self.tsc_lib = ctypes.CDLL("TSCLIB.dll")
-            self._setup_function_signatures()
-        except Exception as e:
-            self.logger.error(f"TSCLIB.dll yüklenemedi: {e}")
-            self.tsc_lib = None
+        # Verilirse printer çağrıları printer başına ayrı süreçte çalışır (zaman aşımında süreç öldürülür);
+        # her sürecin kendi portu olduğundan farklı printer'lar birbirini beklemez
+        self.io_workers = io_workers
+        self._port_locks: Dict[str, threading.Lock] = {}
+        self._session = threading.local()
+        
+        self.supports_binary = False
+        self.supports_status = False
+        self.tsc_lib = None
+        # Verilirse TSCLIB.dll yerine kullanılır (ör. yük testi için sahte printer)
+        self._library_override = library
+        self._library_loaded = False
+        self._library_lock = threading.Lock()
+        
+        # Hızlı başlangıç modunda DLL ilk yazdırmada veya ısınmada yüklenir
+        if not lazy:
+            self.load_library()
+    
+    def load_library(self) -> bool:
+        """TSCLIB.dll fonksiyonlarını yükle (süreç başına bir kez denenir)"""
+        with self._library_lock:
+            if not self._library_loaded:
+                self._library_loaded = True
+                if self._library_override is not None:
+                    self.tsc_lib = self._library_override
+                    self.supports_binary = hasattr(self.tsc_lib, 'sendBinaryData')
+                    self.supports_status = hasattr(self.tsc_lib, 'usbportqueryprinter')
+                    return True
+                try:
+                    self.tsc_lib = ctypes.CDLL("TSCLIB.dll")
+                    self._setup_function_signatures()
+                except Exception as e:
+                    self.logger.error(f"TSCLIB.dll yüklenemedi: {e}")
+                    self.tsc_lib = None
+            return self.tsc_lib is not None
+    
+    @property
+    def library_state(self) -> str:
+        """TSCLIB.dll durumu: loaded, failed veya not_loaded (henüz denenmedi)"""
+        if self.tsc_lib is not None:
+            return 'loaded'
+        return 'failed' if self._library_loaded else 'not_loaded'
     
     def _setup_function_signatures(self):
         """TSCLIB.dll fonksiyon imzalarını ayarla"""
@@ -46,66 +85,202 @@ class TSCPrinterService:
             # downloadbmp
             self.tsc_lib.downloadbmp.argtypes = [ctypes.c_char_p, ctypes.c_char_p]
             self.tsc_lib.downloadbmp.restype = None
+            
+            # sendBinaryData (eski DLL sürümlerinde bulunmayabilir)
+            try:
+                self.tsc_lib.sendBinaryData.argtypes = [ctypes.c_void_p, ctypes.c_int]
+                self.tsc_lib.sendBinaryData.restype = ctypes.c_int
+                self.supports_binary = True
+            except AttributeError:
+                self.logger.warning("TSCLIB.dll sendBinaryData fonksiyonunu içermiyor")
+            
+            # usbportqueryprinter - <ESC>!? durum baytı (USB bağlantılı printer'lar)
+            try:
+                self.tsc_lib.usbportqueryprinter.argtypes = []
+                self.tsc_lib.usbportqueryprinter.restype = ctypes.c_ubyte
+                self.supports_status = True
+            except AttributeError:
+                self.logger.warning("TSCLIB.dll usbportqueryprinter fonksiyonunu içermiyor")
     
-    def print_label(self, file_path: str, settings: Dict[str, Any], is_bluetooth_label: bool = False):
+    def print_label(self, file_path: str, settings: Dict[str, Any], is_bluetooth_label: bool = False,
+                    printer_name: Optional[str] = None, copies: int = 1):
         """Etiket yazdırma işlemi"""
-        if not self.tsc_lib:
+        if not self.load_library():
             self.logger.error("TSCLIB.dll yüklenemedi, yazdırma işlemi yapılamıyor")
             return False
         
         try:
-            # Printer adını belirle
-            printer_name = (settings['bluetooth_printer_name'] if is_bluetooth_label 
-                          else settings['carton_printer_name'])
-            
-            # Printer'a bağlan
-            self._open_port(printer_name)
-            
-            # Buffer'ı temizle
-            self._clear_buffer()
-            
-            # Printer'ı konfigüre et
-            self._configure_printer(settings, is_bluetooth_label)
+            with self._printer_session(settings, is_bluetooth_label, printer_name):
+                # Bitmap'i yükle ve yazdır
+                self._download_bmp(file_path, "label.bmp")
+                self._send_command('PUTBMP 0,0,"label.bmp",8,80')
+                self._send_command(f'PRINT 1,{copies}')
             
-            # Bitmap'i yükle ve yazdır
-            self._download_bmp(file_path, "label.bmp")
-            self._send_command('PUTBMP 0,0,"label.bmp",8,80')
-            self._send_command('PRINT 1,1')
+            self.logger.info(f"Etiket başarıyla yazdırıldı: {file_path} ({copies} kopya)", extra=PER_LABEL)
+            return True
             
-            # Bağlantıyı kapat
-            self._close_port()
+        except Exception as e:
+            self.logger.error(f"Yazdırma işlemi sırasında hata: {e}")
+            return False
+    
+    def print_raster(self, header: bytes, data: memoryview, settings: Dict[str, Any],
+                     is_bluetooth_label: bool = False, printer_name: Optional[str] = None, copies: int = 1):
+        """Paketlenmiş 1-bit raster'ı TSPL BITMAP komutuyla doğrudan yazdır"""
+        if not self.load_library():
+            self.logger.error("TSCLIB.dll yüklenemedi, yazdırma işlemi yapılamıyor")
+            return False
+        if not self.supports_binary:
+            self.logger.error("TSCLIB.dll sendBinaryData desteklemiyor, raster yazdırılamıyor")
+            return False
+        
+        try:
+            with self._printer_session(settings, is_bluetooth_label, printer_name):
+                # Başlık ve raster ayrı gönderilir; raster spool eşlemesinden kopyalanmadan geçer
+                self._send_binary(header)
+                self._send_binary(data)
+                self._send_binary(b'\r\n')
+                self._send_command(f'PRINT 1,{copies}')
             
-            self.logger.info(f"Etiket başarıyla yazdırıldı: {file_path}")
+            self.logger.info(f"Raster etiket başarıyla yazdırıldı ({copies} kopya)", extra=PER_LABEL)
             return True
             
         except Exception as e:
             self.logger.error(f"Yazdırma işlemi sırasında hata: {e}")
             return False
     
+    def print_sequence(self, file_path: str, commands, count: int, settings: Dict[str, Any],
+                       is_bluetooth_label: bool = False, printer_name: Optional[str] = None):
+        """Sabit arka planı bir kez yükle, seri alanlarını printer sayaçlarıyla N etiket olarak bas"""
+        if not self.load_library():
+            self.logger.error("TSCLIB.dll yüklenemedi, yazdırma işlemi yapılamıyor")
+            return False
+        
+        try:
+            with self._printer_session(settings, is_bluetooth_label, printer_name):
+                self._download_bmp(file_path, "label.bmp")
+                self._send_command('PUTBMP 0,0,"label.bmp",8,80')
+                for command in commands:
+                    self._send_command(command)
+                # Her takımda sayaçlar artar: N farklı seri numarası
+                self._send_command(f'PRINT {count},1')
+        
+            self.logger.info(f"Seri etiket işi başarıyla yazdırıldı: {count} etiket", extra=PER_LABEL)
+            return True
+        
+        except Exception as e:
+            self.logger.error(f"Yazdırma işlemi sırasında hata: {e}")
+            return False
+    
+    def query_status(self, printer_name: str, settings: Dict[str, Any], timeout: float = 0.5) -> Optional[int]:
+        """Printer durum baytını sorgula; printer meşgulse veya sorgu desteklenmiyorsa None"""
+        if not self.load_library() or not self.supports_status:
+            return None
+        # Yazdırma sürerken beklemeyiz; durum bir sonraki turda sorgulanır
+        port_lock = self._port_lock_for(printer_name)
+        if not port_lock.acquire(timeout=timeout):
+            return None
+        try:
+            with PrinterLock(printer_name, lock_dir=settings.get('printer_lock_dir', 'locks'), timeout=timeout):
+                self._open_port(printer_name)
+                try:
+                    return int(self._library.usbportqueryprinter()) & 0xFF
+                finally:
+                    self._close_port()
+        except PrinterLockTimeout:
+            return None
+        except Exception as e:
+            self.logger.warning(f"Printer durumu sorgulanamadı ({printer_name}): {e}")
+            return None
+        finally:
+            port_lock.release()
+    
+    @contextmanager
+    def _printer_session(self, settings: Dict[str, Any], is_bluetooth_label: bool,
+                         printer_name: Optional[str] = None):
+        """Printer'ı kilitle, portu aç, buffer'ı temizle ve yapılandır; sonunda portu kapat"""
+        # Printer adını belirle (havuzdan gelmediyse ayarlardaki tek printer)
+        if printer_name is None:
+            printer_name = (settings['bluetooth_printer_name'] if is_bluetooth_label 
+                          else settings['carton_printer_name'])
+        
+        # Aynı printer'ı kullanan diğer worker süreçleriyle de sıraya gir
+        printer_lock = PrinterLock(
+            printer_name,
+            lock_dir=settings.get('printer_lock_dir', 'locks'),
+            timeout=settings.get('printer_lock_timeout', 30.0)
+        )
+        with self._port_lock_for(printer_name), printer_lock:
+            # Printer'a bağlan
+            self._open_port(printer_name)
+            try:
+                # Buffer'ı temizle
+                self._clear_buffer()
+                
+                # Printer'ı konfigüre et
+                self._configure_printer(settings, is_bluetooth_label)
+                
+                yield
+            finally:
+                # Bağlantıyı kapat
+                self._close_port()
+    
+    def _port_lock_for(self, printer_name: str) -> threading.Lock:
+        """Worker süreçleriyle printer başına, değilse süreçteki tek TSCLIB portu için ortak kilit"""
+        if self.io_workers is None:
+            return self._port_lock
+        with self._library_lock:
+            lock = self._port_locks.get(printer_name)
+            if lock is None:
+                lock = self._port_locks[printer_name] = threading.Lock()
+            return lock
+    
+    @property
+    def _library(self) -> Any:
+        """Açık oturumun kütüphanesi (printer'ın worker'ı) veya süreçteki TSCLIB"""
+        return getattr(self._session, 'library', None) or self.tsc_lib
+    
     def _open_port(self, printer_name: str):
         """Printer portunu aç"""
         if self.tsc_lib:
-            self.tsc_lib.openport(printer_name.encode('utf-8'))
+            if self.io_workers is not None:
+                self._session.library = self.io_workers.library(printer_name)
+            try:
+                self._library.openport(printer_name.encode('utf-8'))
+            except Exception:
+                self._session.library = None
+                raise
     
     def _send_command(self, command: str):
         """Printer'a komut gönder"""
         if self.tsc_lib:
-            self.tsc_lib.sendcommand(command.encode('utf-8'))
+            self._library.sendcommand(command.encode('utf-8'))
+    
+    def _send_binary(self, data):
+        """Printer'a ham veri gönder (bytes veya yazılabilir tampon, kopyalamadan)"""
+        if self.tsc_lib:
+            if isinstance(data, bytes):
+                buffer = ctypes.c_char_p(data)
+            else:
+                buffer = (ctypes.c_char * len(data)).from_buffer(data)
+            self._library.sendBinaryData(buffer, len(data))
     
     def _clear_buffer(self):
         """Printer buffer'ını temizle"""
         if self.tsc_lib:
-            self.tsc_lib.clearbuffer()
+            self._library.clearbuffer()
     
     def _close_port(self):
         """Printer portunu kapat"""
         if self.tsc_lib:
-            self.tsc_lib.closeport()
+            try:
+                self._library.closeport()
+            finally:
+                self._session.library = None
     
     def _download_bmp(self, file_path: str, image_name: str):
         """Bitmap dosyasını printer'a yükle"""
         if self.tsc_lib:
-            self.tsc_lib.downloadbmp(file_path.encode('utf-8'), image_name.encode('utf-8'))
+            self._library.downloadbmp(file_path.encode('utf-8'), image_name.encode('utf-8'))
     
     def _configure_printer(self, settings: Dict[str, Any], is_bluetooth_label: bool):
         """Printer ayarlarını yapılandır"""
@@ -120,7 +295,7 @@ class TSCPrinterService:
         self._send_command(f'DIRECTION {direction}')
         self._send_command(f'DENSITY {settings["density"]}')
         self._send_command(f'SPEED {settings["speed"]}')
-        self._send_command(f'SIZE {label_width} mm, {label_width} mm')
+        self._send_command(f'SIZE {label_width} mm, {label_height} mm')
         self._send_command(f'GAP {settings["gap_height"]} mm, {settings["gap_offset"]} mm')
         self._send_command('TEAR ON' if settings['tear_off'] else 'TEAR OFF')
         self._send_command('AUTO CALIBRATION')